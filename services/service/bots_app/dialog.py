@@ -0,0 +1,455 @@
+# bots_app/dialog.py
+"""
+Диалог заявок на опломбирование и показаний воды — один для вебхука
+WhatsApp и Telegram-ботов клиентов и контролёров.
+
+Шаги описаны таблицей NODES. Dialog компилирует её один раз: вопросы
+собираются заранее для каждого языка, ответы на вопросы с вариантами
+раскладываются в словарь «номер или подпись кнопки → переход». Шаг
+диалога — два поиска в словарях и, где нужно, один запрос к БД.
+Каналы только передают текст сообщения и показывают Turn по-своему:
+WhatsApp — вопрос с пронумерованными вариантами, Telegram — кнопками.
+"""
+
+from datetime import date, timedelta
+from functools import lru_cache
+
+from django.utils import timezone
+
+from meter_app.models import Reading, Seal
+from meter_app.external_api.accounts import account_exists
+from bots_app.management.commands.bot_utils import save_seal_request, submit_readings
+
+TECH_PHONE = "+7 701 123 45 67"
+
+# На сколько дней вперёд (начиная с сегодня) принимаются заявки на опломбирование
+SEAL_DAYS = 14
+
+# Метки вариантов в текстовых каналах
+MARKS = ("1️⃣", "2️⃣", "3️⃣", "4️⃣")
+
+# все тексты на двух языках: вопросы шагов, подписи вариантов (opt_*) и уведомления
+TEXTS = {
+    'ru': {
+        'lang_prompt':     "🌐 Выберите язык:",
+        'opt_ru':          "Русский",
+        'opt_kz':          "Қазақша",
+        'lang_invalid':    "❌ 1 или 2 енгізіңіз / введите 1 или 2",
+        'welcome':         "👋 Добро пожаловать!",
+        'menu':            "Выберите действие:",
+        'opt_seal':        "Опломбирование",
+        'opt_read':        "Показания воды",
+        'opt_support':     "Техподдержка",
+        'opt_lang':        "Сменить язык",
+        'support':         f"☎️ Техподдержка: {TECH_PHONE}",
+        'invalid_choice':  "❌ Пожалуйста, выберите пункт меню.",
+        'enter_ls_seal':   "📝 Введите лицевой счёт для опломбирования:",
+        'enter_ls_read':   "📘 Введите лицевой счёт для показаний:",
+        'ls_not_found':    "❌ ЛС не найден, возвращаю в меню.",
+        'enter_reason':    "Укажите причину опломбирования:",
+        'choose_water':    "Выберите тип воды:",
+        'opt_cold':        "Холодная",
+        'opt_hot':         "Горячая",
+        'invalid_water':   "❌ Неправильный выбор, возвращаю в меню.",
+        'choose_date':     "🗓 Выберите дату:",
+        'invalid_date':    "❌ Неверная дата, возвращаю в меню.",
+        'date_busy':       "❌ На этот день уже есть заявка, возвращаю в меню.",
+        'choose_slot':     "⏰ Выберите слот:",
+        'opt_morning':     "До обеда",
+        'opt_afternoon':   "После обеда",
+        'invalid_slot':    "❌ Неправильный выбор, возвращаю в меню.",
+        'slot_busy':       "❌ Этот слот уже занят, выберите другой.",
+        'seal_success':    "✅ Заявка принята!\nЛС: {ls}\nПричина: {reason}\nТип воды: {kind}\nДата: {date}\nСлот: {slot}",
+        'enter_cold':      "❄️ Введите показание ХОЛОДНОЙ воды:",
+        'enter_hot':       "🔥 Теперь — показание ГОРЯЧЕЙ воды:",
+        'invalid_number':  "❌ Некорректное число, возвращаю в меню.",
+        'less_than_prev':  "❌ {value} < предыдущего ({prev}), возвращаю в меню.",
+        'rejected':        "❌ {error}",
+        'reading_success': "✅ Показания сохранены:\n❄️ {cold}\n🔥 {hot}",
+        'error':           "❌ Что-то пошло не так, возвращаю в меню.",
+    },
+    'kz': {
+        'lang_prompt':     "🌐 Тілді таңдаңыз:",
+        'opt_ru':          "Русский",
+        'opt_kz':          "Қазақша",
+        'lang_invalid':    "❌ 1 или 2 енгізіңіз / введите 1 или 2",
+        'welcome':         "👋 Қош келдіңіз!",
+        'menu':            "Әрекетті таңдаңыз:",
+        'opt_seal':        "Пломба қою",
+        'opt_read':        "Су көрсеткіштері",
+        'opt_support':     "Тех қолдау",
+        'opt_lang':        "Тілді ауыстыру",
+        'support':         f"☎️ Тех қолдау: {TECH_PHONE}",
+        'invalid_choice':  "❌ Өтінеміз, мәзірден таңдаңыз.",
+        'enter_ls_seal':   "📝 Есепшот нөмірін енгізіңіз:",
+        'enter_ls_read':   "📘 Көрсеткіш үшін есепшот нөмірін енгізіңіз:",
+        'ls_not_found':    "❌ Есепшот табылмады, басты мәзірге ораламыз.",
+        'enter_reason':    "Пломба себебін жазыңыз:",
+        'choose_water':    "Суды таңдаңыз:",
+        'opt_cold':        "Суық",
+        'opt_hot':         "Ыстық",
+        'invalid_water':   "❌ Қате таңдау, басты мәзірге ораламыз.",
+        'choose_date':     "🗓 Күнді таңдаңыз:",
+        'invalid_date':    "❌ Қате күн, басты мәзірге ораламыз.",
+        'date_busy':       "❌ Осы күнге өтініш бар, басты мәзірге ораламыз.",
+        'choose_slot':     "⏰ Уақытты таңдаңыз:",
+        'opt_morning':     "Таңертең",
+        'opt_afternoon':   "Күні бойы",
+        'invalid_slot':    "❌ Қате таңдау, басты мәзірге ораламыз.",
+        'slot_busy':       "❌ Бұл уақыт бос емес, басқасын таңдаңыз.",
+        'seal_success':    "✅ Өтініш қабылданды!\nЕсепшот: {ls}\nСебеп: {reason}\nСу түрі: {kind}\nКүн: {date}\nУақыт: {slot}",
+        'enter_cold':      "❄️ Суық көрсеткіш енгізіңіз:",
+        'enter_hot':       "🔥 Ыстық көрсеткіш енгізіңіз:",
+        'invalid_number':  "❌ Қате сан, басты мәзірге ораламыз.",
+        'less_than_prev':  "❌ {value} < алдыңғы ({prev}), басты мәзірге ораламыз.",
+        'rejected':        "❌ {error}",
+        'reading_success': "✅ Көрсеткіштер сақталды:\n❄️ {cold}\n🔥 {hot}",
+        'error':           "❌ Қате, басты мәзірге ораламыз.",
+    }
+}
+
+
+class Prompt:
+    """
+    Вопрос шага на одном языке: text — сам вопрос, buttons — подписи
+    вариантов (кнопки Telegram), numbered — вопрос с пронумерованными
+    вариантами для текстовых каналов. Собирается при компиляции диалога.
+    """
+    __slots__ = ("text", "buttons", "numbered", "width")
+
+    def __init__(self, text: str, buttons=(), marks=MARKS, width: int = 2):
+        self.text     = text
+        self.buttons  = tuple(buttons)
+        self.numbered = "\n".join([text, *(f"{m} {b}" for m, b in zip(marks, self.buttons))])
+        self.width    = width
+
+    def rows(self) -> list:
+        return [list(self.buttons[i:i + self.width]) for i in range(0, len(self.buttons), self.width)]
+
+
+class Go:
+    """
+    Переход шага: новое состояние и уведомление (ключ TEXTS и параметры
+    подстановки), которое показывается перед вопросом этого состояния.
+    reset очищает данные диалога, кроме языка.
+    """
+    __slots__ = ("state", "notice", "params", "reset")
+
+    def __init__(self, state: str, notice: str = None, reset: bool = False, **params):
+        self.state  = state
+        self.notice = notice
+        self.params = params
+        self.reset  = reset
+
+
+class Input:
+    """
+    Шаг со свободным ответом: accept(ctx, data, text) -> Go.
+    """
+    static = True
+
+    def __init__(self, prompt: str, accept):
+        self.prompt = prompt
+        self.accept = accept
+
+    def prompt_for(self, lang: str):
+        return Prompt(TEXTS[lang][self.prompt]) if self.prompt else None
+
+
+class Choice(Input):
+    """
+    Шаг с вариантами: options — [(ключ подписи, значение, переход)], где
+    переход — Go или функция (ctx, data) -> Go. Ответ узнаётся по номеру
+    варианта или по подписи на любом языке; значение пишется в data[field].
+    """
+
+    def __init__(self, prompt: str, options: list, invalid: Go, field: str = None):
+        self.prompt  = prompt
+        self.options = options
+        self.invalid = invalid
+        self.field   = field
+        self.answers = {}
+        for number, (label, value, go) in enumerate(options, start=1):
+            self.answers[str(number)] = (value, go)
+            for texts in TEXTS.values():
+                self.answers[texts[label].casefold()] = (value, go)
+
+    def prompt_for(self, lang: str):
+        return Prompt(TEXTS[lang][self.prompt], [TEXTS[lang][label] for label, _, _ in self.options])
+
+    def accept(self, ctx, data: dict, text: str) -> Go:
+        try:
+            value, go = self.answers[text.casefold()]
+        except KeyError:
+            return self.invalid
+        if self.field:
+            data[self.field] = value
+        return go(ctx, data) if callable(go) else go
+
+
+@lru_cache(maxsize=2)
+def _calendar(today: date):
+    """
+    Варианты дат на SEAL_DAYS дней от today: ответы (номер и dd.mm → дата)
+    и вопросы по языкам. Пересобираются раз в сутки.
+    """
+    days = [today + timedelta(days=i) for i in range(SEAL_DAYS)]
+    answers = {}
+    for number, day in enumerate(days, start=1):
+        answers[str(number)] = answers[day.strftime("%d.%m")] = day
+    labels = [day.strftime("%d.%m") for day in days]
+    marks = [f"{number}." for number in range(1, SEAL_DAYS + 1)]
+    prompts = {
+        lang: Prompt(TEXTS[lang]['choose_date'], labels, marks=marks, width=4)
+        for lang in TEXTS
+    }
+    return answers, prompts
+
+
+class DateChoice(Input):
+    """
+    Выбор дня заявки из ближайших SEAL_DAYS: accept(ctx, data, day) -> Go,
+    day — None, если ответ не из вариантов.
+    """
+    static = False
+
+    def __init__(self, prompt: str, on_day):
+        self.prompt = prompt
+        self.on_day = on_day
+
+    def prompt_for(self, lang: str):
+        return _calendar(date.today())[1][lang]
+
+    def accept(self, ctx, data: dict, text: str) -> Go:
+        return self.on_day(ctx, data, _calendar(date.today())[0].get(text))
+
+
+class Turn:
+    """
+    Результат шага: новое состояние и данные диалога, уведомление
+    и вопрос нового состояния (None, если диалог закончен).
+    """
+    __slots__ = ("state", "data", "notice", "prompt")
+
+    def __init__(self, state: str, data: dict, notice: str = None, prompt: Prompt = None):
+        self.state  = state
+        self.data   = data
+        self.notice = notice
+        self.prompt = prompt
+
+    def text(self, numbered: bool = True) -> str:
+        parts = [self.notice] if self.notice else []
+        if self.prompt is not None:
+            parts.append(self.prompt.numbered if numbered else self.prompt.text)
+        return "\n".join(parts)
+
+
+class InlineWriter:
+    """
+    Заявки и показания пишутся в БД сразу; ошибки правил
+    (ValueError из submit_readings) возвращаются абоненту.
+    """
+
+    def save_seal(self, user, account, reason, day, timeslot, water_type):
+        save_seal_request(
+            telegram_id=user, account=account, reason=reason,
+            date=day, timeslot=timeslot, water_type=water_type,
+        )
+
+    def save_readings(self, user, account, cold, hot, when):
+        submit_readings(user, account, cold, hot, when)
+
+
+class Context:
+    """
+    Чем диалог пользуется в конкретном боте: user — собеседник (телефон,
+    id в Telegram), writer — куда пишутся заявки и показания,
+    check_account — проверка введённого ЛС.
+    """
+
+    def __init__(self, user, writer, check_account=account_exists):
+        self.user          = user
+        self.writer        = writer
+        self.check_account = check_account
+
+
+# ——— проверки в БД: по одному запросу, ЛС сразу через join с users ———
+
+def last_readings(account: str):
+    """
+    Последние показания [холодная, горячая] по ЛС или None.
+    """
+    row = (
+        Reading.objects.using('meter')
+        .filter(user__number=account, punumber=account)
+        .order_by('-createdate')
+        .values_list('readings', 'reading2')
+        .first()
+    )
+    return [float(row[0]), float(row[1])] if row else None
+
+
+def date_busy(account: str, day: date) -> bool:
+    return Seal.objects.using('meter').filter(user__number=account, scheduledate=day).exists()
+
+
+def slot_taken(day: date, timeslot: str) -> bool:
+    return Seal.objects.using('meter').filter(scheduledate=day, type=timeslot, status='new').exists()
+
+
+# ——— шаги ———
+
+def _label(data: dict, key: str) -> str:
+    return TEXTS[data.get('lang', 'ru')][f"opt_{key}"]
+
+
+def _number(text: str):
+    try:
+        return float(text.replace(",", "."))
+    except ValueError:
+        return None
+
+
+def _account_step(next_state: str, load_prev: bool = False):
+    def accept(ctx, data, text):
+        if not ctx.check_account(text):
+            return Go("CHOOSE_ACTION", "ls_not_found")
+        data['ls'] = text
+        if load_prev:
+            # предыдущие показания читаются один раз и живут в данных диалога:
+            # шаги холодной и горячей воды к БД не обращаются
+            data['prev'] = last_readings(text)
+        return Go(next_state)
+    return accept
+
+
+def seal_reason(ctx, data, text):
+    data['reason'] = text
+    return Go("SEAL_TYPE")
+
+
+def seal_date(ctx, data, day):
+    if day is None:
+        return Go("CHOOSE_ACTION", "invalid_date")
+    if date_busy(data['ls'], day):
+        return Go("CHOOSE_ACTION", "date_busy")
+    data['date'] = day.isoformat()
+    return Go("SEAL_SLOT")
+
+
+def seal_slot(ctx, data):
+    day = date.fromisoformat(data['date'])
+    if slot_taken(day, data['slot']):
+        return Go("SEAL_SLOT", "slot_busy")
+    ctx.writer.save_seal(ctx.user, data['ls'], data['reason'], day, data['slot'], data['kind'])
+    return Go(
+        "END", "seal_success", reset=True,
+        ls=data['ls'], reason=data['reason'], kind=_label(data, data['kind']),
+        date=day.strftime('%d.%m.%Y'), slot=_label(data, data['slot']),
+    )
+
+
+def _reading_step(index: int, field: str):
+    def accept(ctx, data, text):
+        value = _number(text)
+        if value is None:
+            return Go("CHOOSE_ACTION", "invalid_number")
+        prev = data['prev'][index] if data.get('prev') else None
+        if prev is not None and value < prev:
+            return Go("CHOOSE_ACTION", "less_than_prev", value=value, prev=prev)
+        data[field] = value
+        if field == "cold":
+            return Go("READING_HOT")
+        try:
+            ctx.writer.save_readings(ctx.user, data['ls'], data['cold'], value, timezone.now())
+        except ValueError as e:
+            return Go("CHOOSE_ACTION", "rejected", error=e)
+        return Go("END", "reading_success", reset=True, cold=data['cold'], hot=value)
+    return accept
+
+
+# любое сообщение вне диалога начинает его с выбора языка
+_START = Input(None, lambda ctx, data, text: Go("CHOOSE_LANG"))
+
+NODES = {
+    "":                _START,
+    "END":             _START,
+    "CHOOSE_LANG":     Choice("lang_prompt", [
+                           ("opt_ru", "ru", Go("CHOOSE_ACTION", "welcome")),
+                           ("opt_kz", "kz", Go("CHOOSE_ACTION", "welcome")),
+                       ], invalid=Go("CHOOSE_LANG", "lang_invalid"), field="lang"),
+    "CHOOSE_ACTION":   Choice("menu", [
+                           ("opt_seal",    None, Go("SEAL_ACCOUNT")),
+                           ("opt_read",    None, Go("READING_ACCOUNT")),
+                           ("opt_support", None, Go("END", "support", reset=True)),
+                           ("opt_lang",    None, Go("CHOOSE_LANG")),
+                       ], invalid=Go("CHOOSE_ACTION", "invalid_choice")),
+    # — опломбирование —
+    "SEAL_ACCOUNT":    Input("enter_ls_seal", _account_step("SEAL_REASON")),
+    "SEAL_REASON":     Input("enter_reason", seal_reason),
+    "SEAL_TYPE":       Choice("choose_water", [
+                           ("opt_cold", "cold", Go("SEAL_DATE")),
+                           ("opt_hot",  "hot",  Go("SEAL_DATE")),
+                       ], invalid=Go("CHOOSE_ACTION", "invalid_water", reset=True), field="kind"),
+    "SEAL_DATE":       DateChoice("choose_date", seal_date),
+    "SEAL_SLOT":       Choice("choose_slot", [
+                           ("opt_morning",   "morning",   seal_slot),
+                           ("opt_afternoon", "afternoon", seal_slot),
+                       ], invalid=Go("CHOOSE_ACTION", "invalid_slot"), field="slot"),
+    # — показания воды —
+    "READING_ACCOUNT": Input("enter_ls_read", _account_step("READING_COLD", load_prev=True)),
+    "READING_COLD":    Input("enter_cold", _reading_step(0, "cold")),
+    "READING_HOT":     Input("enter_hot",  _reading_step(1, "hot")),
+}
+
+
+class Dialog:
+    """
+    Скомпилированная таблица шагов. finish — состояние после заявки,
+    показаний или справки: END (следующее сообщение начнёт диалог
+    с выбора языка) или CHOOSE_ACTION (сразу меню).
+    """
+
+    def __init__(self, nodes: dict = NODES, finish: str = "END"):
+        self.nodes  = nodes
+        self.finish = finish
+        self.prompts = {
+            lang: {
+                state: node.prompt_for(lang)
+                for state, node in nodes.items() if node.static
+            }
+            for lang in TEXTS
+        }
+
+    def prompt(self, state: str, lang: str):
+        try:
+            return self.prompts[lang][state]
+        except KeyError:
+            node = self.nodes.get(state)
+            return node.prompt_for(lang) if node is not None else None
+
+    def turn(self, go: Go, data: dict) -> Turn:
+        lang  = data.get('lang', 'ru')
+        state = self.finish if go.state == "END" else go.state
+        if go.reset:
+            data = {'lang': lang}
+        notice = TEXTS[lang][go.notice] if go.notice else None
+        if notice and go.params:
+            notice = notice.format(**go.params)
+        return Turn(state, data, notice, self.prompt(state, lang))
+
+    def enter(self, state: str, data: dict = None) -> Turn:
+        """
+        Начать диалог с шага state (например, из меню контролёра).
+        """
+        return self.turn(Go(state), dict(data or {}))
+
+    def handle(self, state: str, data: dict, text: str, ctx: Context) -> Turn:
+        data = dict(data or {})
+        node = self.nodes.get(state or "")
+        if node is None:
+            # непредвиденное — возвращаем в меню
+            go = Go("CHOOSE_ACTION", "error", reset=True)
+        else:
+            go = node.accept(ctx, data, text.strip())
+        return self.turn(go, data)
@@ -1,32 +1,58 @@
 # bots_app/management/commands/bot_utils.py
 
 import datetime
+from functools import partial
+from django.db import connections, transaction
 from django.utils import timezone
 from meter_app.models import Reading, MeterUser, Seal
+from meter_app.api.cache import touch_tables
+from meter_app.external_api.accounts import publish_added
+from meter_app.external_api.tasks import refresh_rollup_meters
+
+# поле Reading для каждого вида воды
+READING_FIELDS = {'cold': 'readings', 'hot': 'reading2'}
+
+# Сколько времени после подачи показания месяца можно исправить
+EDIT_WINDOW = datetime.timedelta(hours=24)
 
-def get_last_record(telegram_id: int, account: str) -> Reading | None:
-    try:
-        mu = MeterUser.objects.using('meter').get(number=account)
-    except MeterUser.DoesNotExist:
-        return None
 
+def get_last_record(telegram_id: int, account: str) -> Reading | None:
+    # одним запросом: ЛС абонента — через join с users
     return (
         Reading.objects
         .using('meter')
-        .filter(user_id=mu.id, punumber=account)
+        .filter(user__number=account, punumber=account)
         .order_by('-createdate')
         .first()
     )
 
-def save_or_update_reading(
-    telegram_id: int,
-    account: str,
-    new_value: float,
-    water_type: str,
-    when: datetime.datetime
-) -> Reading:
+def readings_changed(meter_id: int) -> None:
+    """
+    После коммита записи показания: новая версия кэша Reading для API и
+    пересчёт свёртки счётчика — исправление обновляет строку на месте,
+    инкрементальное обновление по id его не видит.
+    """
+    touch_tables('meter', Reading)
+    if meter_id:
+        transaction.on_commit(
+            partial(refresh_rollup_meters.delay, 'readings', [meter_id]),
+            using='meter', robust=True,
+        )
+
+def _lock_account(account: str) -> None:
+    """
+    Блокировка ЛС до конца транзакции (advisory lock PostgreSQL): подачи
+    и создание MeterUser по одному ЛС идут по очереди, даже когда строк,
+    которые можно заблокировать, ещё нет. В SQLite запись и так последовательна.
+    """
+    connection = connections['meter']
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [account])
+
+def _meter_user_id(account: str) -> int:
+    _lock_account(account)
     now = timezone.now()
-    # создание/поиск MeterUser
     defaults_mu = {
         'isactual': False, 'joined': now, 'last_logged_in': now,
         'type': '', 'intent': '', 'intententity': '', 'intentmeter': '',
@@ -34,49 +60,101 @@ def save_or_update_reading(
         'isadmin': False, 'username': '', 'phone': '',
         'lang': '', 'return_menu': '',
     }
-    mu, _ = MeterUser.objects.using('meter').get_or_create(
+    mu, created = MeterUser.objects.using('meter').get_or_create(
         number=account, defaults=defaults_mu
     )
-    last = get_last_record(telegram_id, account)
-    if last:
-        prev_val = last.readings if water_type == 'cold' else last.reading2
-        if new_value < prev_val:
-            raise ValueError(f"Новое показание {new_value} < предыдущее {prev_val}")
-        if now - last.createdate > datetime.timedelta(hours=24):
-            raise ValueError("Прошло больше 24 часов — править нельзя")
+    if created:
+        touch_tables('meter', MeterUser)
+        # другим процессам — только закоммиченного абонента
+        transaction.on_commit(partial(publish_added, "users", account), using='meter', robust=True)
+    return mu.id
 
+def _submit(account: str, values: dict, when: datetime.datetime) -> Reading:
+    """
+    Пишет показания values ({'cold': ..., 'hot': ...}, можно одно) за месяц when.
+    В одной транзакции: блокировка ЛС, чтение последнего показания и одна
+    запись — UPDATE строки месяца или INSERT новой. MeterUser читается,
+    только если показаний по ЛС ещё нет.
+    """
+    now = timezone.now()
     ym = when.strftime("%Y%m")
-    defaults_rd = {
-        'entity': last.entity if last else '',
-        'code': last.code if last else '',
-        'disabled': last.disabled if last else False,
-        'meterid': last.meterid if last else 0,
-        'disconnected': last.disconnected if last else False,
-        'corrected': last.corrected if last else False,
-        'isactual': last.isactual if last else False,
-        'sourcecode': last.sourcecode if last else '',
-        'restricted': last.restricted if last else False,
-        'consumption': last.consumption if last else 0,
-        'operator_id': last.operator_id if last else 0,
-        'erc_meter_id': last.erc_meter_id if last else 0,
-        # ставим нужное поле readings или reading2
-        'readings': new_value if water_type == 'cold' else (last.readings if last else 0.0),
-        'reading2': new_value if water_type == 'hot' else (last.reading2 if last else 0.0),
-        'createdate': when,
-    }
-    reading, created = Reading.objects.using('meter').get_or_create(
-        user_id=mu.id, punumber=account, yearmonth=ym, defaults=defaults_rd
-    )
-    if not created:
-        if water_type == 'cold':
-            reading.readings = new_value
-            fields = ['readings', 'createdate']
-        else:
-            reading.reading2 = new_value
-            fields = ['reading2', 'createdate']
-        reading.createdate = when
-        reading.save(update_fields=fields)
-    return reading
+    fields = {READING_FIELDS[kind]: value for kind, value in values.items()}
+
+    with transaction.atomic(using='meter'):
+        # параллельная подача по тому же ЛС ждёт коммита — и первая, когда
+        # показаний ещё нет и FOR UPDATE блокировать нечего
+        _lock_account(account)
+        last = (
+            Reading.objects
+            .using('meter')
+            .select_for_update(of=('self',))
+            .filter(user__number=account, punumber=account)
+            .order_by('-createdate')
+            .first()
+        )
+        if last:
+            for field, new_value in fields.items():
+                prev_val = getattr(last, field)
+                if new_value < prev_val:
+                    raise ValueError(f"Новое показание {new_value} < предыдущее {prev_val}")
+
+        if last and last.yearmonth == ym:
+            # показание месяца уже подано — исправляем его
+            if now - last.createdate > EDIT_WINDOW:
+                raise ValueError("Прошло больше 24 часов — править нельзя")
+            Reading.objects.using('meter').filter(pk=last.pk).update(createdate=when, **fields)
+            for field, new_value in fields.items():
+                setattr(last, field, new_value)
+            last.createdate = when
+            readings_changed(last.meterid)
+            return last
+
+        # новый месяц: служебные поля и не поданное значение — из прошлого показания
+        defaults_rd = {
+            'entity': last.entity if last else '',
+            'code': last.code if last else '',
+            'disabled': last.disabled if last else False,
+            'meterid': last.meterid if last else 0,
+            'disconnected': last.disconnected if last else False,
+            'corrected': last.corrected if last else False,
+            'isactual': last.isactual if last else False,
+            'sourcecode': last.sourcecode if last else '',
+            'restricted': last.restricted if last else False,
+            'consumption': last.consumption if last else 0,
+            'operator_id': last.operator_id if last else 0,
+            'erc_meter_id': last.erc_meter_id if last else 0,
+            'readings': last.readings if last else 0.0,
+            'reading2': last.reading2 if last else 0.0,
+        }
+        defaults_rd.update(fields)
+        reading = Reading.objects.using('meter').create(
+            user_id=last.user_id if last else _meter_user_id(account),
+            punumber=account, yearmonth=ym, createdate=when, **defaults_rd
+        )
+        readings_changed(reading.meterid)
+        return reading
+
+def submit_readings(
+    telegram_id: int,
+    account: str,
+    cold: float,
+    hot: float,
+    when: datetime.datetime
+) -> Reading:
+    """
+    Холодная и горячая вода одной подачей: проверка обоих значений
+    и одна запись в одной транзакции (см. _submit).
+    """
+    return _submit(account, {'cold': cold, 'hot': hot}, when)
+
+def save_or_update_reading(
+    telegram_id: int,
+    account: str,
+    new_value: float,
+    water_type: str,
+    when: datetime.datetime
+) -> Reading:
+    return _submit(account, {water_type: new_value}, when)
 
 def save_seal_request(
     telegram_id: int,
@@ -93,50 +171,32 @@ def save_seal_request(
     """
     now = timezone.now()
 
-    # 0) Найти или создать MeterUser
-    defaults_mu = {
-        'isactual': False,
-        'joined': now,
-        'last_logged_in': now,
-        'type': '',
-        'intent': '',
-        'intententity': '',
-        'intentmeter': '',
-        'intentmetercode': '',
-        'intentseal': '',
-        'name': '',
-        'isadmin': False,
-        'username': '',
-        'phone': '',
-        'lang': '',
-        'return_menu': '',
-    }
-    mu, _ = MeterUser.objects.using('meter').get_or_create(
-        number=account,
-        defaults=defaults_mu
-    )
-
     # Определяем, холодная или горячая
     kind = (water_type or '').lower()
     ishot = kind in ('hot', 'горячая')
     iscold = kind in ('cold', 'холодная')
 
-    # 1) Создать саму Seal-заявку, заполняя все NOT NULL-поля:
-    return Seal.objects.using('meter').create(
-        user_id         = mu.id,
-        txt             = reason,
-        createdate      = now,
-        type            = timeslot,
-        entity          = '',       # если нужно, можно сюда вписать account
-        phone           = '',
-        status          = 'new',
-        ishot           = ishot,
-        iscold          = iscold,
-        iselect         = False,
-        operatorid      = 0,
-        verificationcode= '',
-        verificationphone='',
-        aktnumber       = '',
-        scheduledate    = date,
-        # answer и answer_date nullable — можно опустить
-    )
+    with transaction.atomic(using='meter'):
+        # 0) Найти или создать MeterUser (под блокировкой ЛС)
+        user_id = _meter_user_id(account)
+
+        # 1) Создать саму Seal-заявку, заполняя все NOT NULL-поля:
+        touch_tables('meter', Seal)
+        return Seal.objects.using('meter').create(
+            user_id         = user_id,
+            txt             = reason,
+            createdate      = now,
+            type            = timeslot,
+            entity          = '',       # если нужно, можно сюда вписать account
+            phone           = '',
+            status          = 'new',
+            ishot           = ishot,
+            iscold          = iscold,
+            iselect         = False,
+            operatorid      = 0,
+            verificationcode= '',
+            verificationphone='',
+            aktnumber       = '',
+            scheduledate    = date,
+            # answer и answer_date nullable — можно опустить
+        )
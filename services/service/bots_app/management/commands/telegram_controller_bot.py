@@ -2,7 +2,6 @@
 
 import os
 from functools import wraps
-from datetime import date, timedelta
 
 from django.core.management.base import BaseCommand
 from django.utils import timezone
@@ -11,13 +10,11 @@ from asgiref.sync import sync_to_async
 from telegram import (
     Update,
     ReplyKeyboardMarkup,
-    InlineKeyboardButton,
-    InlineKeyboardMarkup
+    ReplyKeyboardRemove,
 )
 from telegram.ext import (
     ApplicationBuilder,
     MessageHandler,
-    CallbackQueryHandler,
     ConversationHandler,
     filters,
     ContextTypes
@@ -25,6 +22,10 @@ from telegram.ext import (
 
 from bots_app.creds.botTOKENS import telegraim_api_cont
 from meter_app.models import Controller, MeterUser, Address, UserArea, Seal, Reading
+from meter_app.api.cache import touch_tables
+from meter_app.external_api.accounts import user_exists
+from bots_app.dialog import Context, Dialog, InlineWriter
+from bots_app.management.commands.bot_utils import readings_changed
 
 # ——— состояния FSM ———
 (
@@ -32,15 +33,14 @@ from meter_app.models import Controller, MeterUser, Address, UserArea, Seal, Rea
     AUTH_PASSWORD,
     SELECT_LANG,
     MAIN_MENU,
-    INPUT_READ_LS,
-    INPUT_COLD,
-    INPUT_HOT,
-    INPUT_SEAL_LS,
-    INPUT_SEAL_REASON,
-    INPUT_SEAL_TYPE,
-    INPUT_SEAL_DATE,
-    INPUT_SEAL_SLOT,
-) = range(12)
+    DIALOG,
+) = range(5)
+
+# Шаги показаний и заявки ведёт общий диалог bots_app.dialog (состояние
+# DIALOG); его состояние и данные лежат в ctx.user_data["dialog"].
+# Когда диалог возвращается в меню или завершён — показываем меню контролёра.
+CONTROLLER_DIALOG = Dialog(finish="END")
+DIALOG_EXIT = ("CHOOSE_ACTION", "END")
 
 
 def login_markup():
@@ -118,36 +118,8 @@ class Command(BaseCommand):
                     MessageHandler(filters.Regex("^(🚪|Выйти|Шығу)$"), cancel),
                     MessageHandler(filters.ALL, fallback_to_menu),
                 ],
-                INPUT_READ_LS: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, read_ls),
-                    MessageHandler(filters.ALL, fallback_to_menu),
-                ],
-                INPUT_COLD: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, read_cold),
-                    MessageHandler(filters.ALL, fallback_to_menu),
-                ],
-                INPUT_HOT: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, read_hot),
-                    MessageHandler(filters.ALL, fallback_to_menu),
-                ],
-                INPUT_SEAL_LS: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, seal_ls),
-                    MessageHandler(filters.ALL, fallback_to_menu),
-                ],
-                INPUT_SEAL_REASON: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, seal_reason),
-                    MessageHandler(filters.ALL, fallback_to_menu),
-                ],
-                INPUT_SEAL_TYPE: [
-                    MessageHandler(filters.Regex("^(Холодная|Горячая)$"), seal_type),
-                    MessageHandler(filters.ALL, fallback_to_menu),
-                ],
-                INPUT_SEAL_DATE: [
-                    CallbackQueryHandler(process_seal_date, pattern=r"^seal_date:"),
-                    MessageHandler(filters.ALL, fallback_to_menu),
-                ],
-                INPUT_SEAL_SLOT: [
-                    CallbackQueryHandler(process_seal_slot, pattern=r"^slot:"),
+                DIALOG: [
+                    MessageHandler(filters.TEXT & ~filters.COMMAND, dialog_step),
                     MessageHandler(filters.ALL, fallback_to_menu),
                 ],
             },
@@ -268,263 +240,122 @@ async def show_all_ls(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
     return MAIN_MENU
 
 
-# ——— Показания воды ———
-
-@login_required
-async def menu_readings(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    lang = ctx.user_data.get("lang", "ru")
-    area = ctx.user_data["area_id"]
-    uas = await sync_to_async(list)(
-        UserArea.objects.using("meter")
-            .filter(area_id=area)
-            .select_related("user")
-    )
-    if not uas:
-        await update.message.reply_text(
-            lang=="kz" and "Аймақта абоненттер жоқ." or "В вашем районе нет абонентов.",
-            reply_markup=main_menu_markup(lang)
+# ——— Показания воды и опломбирование ———
+
+class ControllerWriter(InlineWriter):
+    """
+    Запись контролёра: его id в operatorid, показания — одной строкой cold+hot.
+    """
+
+    def __init__(self, controller_id: int):
+        self.controller_id = controller_id
+
+    def save_seal(self, user, account, reason, day, timeslot, water_type):
+        mu = MeterUser.objects.using("meter").get(number=account)
+        touch_tables("meter", Seal)
+        Seal.objects.using("meter").create(
+            user            = mu,
+            txt             = reason,
+            createdate      = timezone.now(),
+            type            = timeslot,
+            entity          = account,
+            phone           = "",
+            status          = "new",
+            ishot           = (water_type == "hot"),
+            iscold          = (water_type == "cold"),
+            iselect         = False,
+            operatorid      = self.controller_id,
+            verificationcode= "",
+            verificationphone="",
+            aktnumber       = "",
+            scheduledate    = day,
         )
-        return MAIN_MENU
 
-    nums = [ua.user.number for ua in uas]
-    prompt = (lang=="kz" and "📘 Есепшот нөмірін енгізіңіз:" 
-                    or "📘 Введите лицевой счёт:")
-    await update.message.reply_text(prompt + "\n" + "\n".join(nums))
-    return INPUT_READ_LS
-
-
-@login_required
-async def read_ls(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    lang = ctx.user_data.get("lang", "ru")
-    ls = update.message.text.strip()
-    ok = await sync_to_async(
-        MeterUser.objects.using("meter").filter(number=ls).exists
-    )()
-    if not ok:
-        await update.message.reply_text(
-            lang=="kz" and "❌ Есепшот табылмады." or "❌ ЛС не найден.",
-            reply_markup=main_menu_markup(lang)
+    def save_readings(self, user, account, cold, hot, when):
+        mu = MeterUser.objects.using("meter").get(number=account)
+        Reading.objects.using("meter").create(
+            user_id      = mu.id,
+            entity       = account,
+            punumber     = account,
+            readings     = cold,
+            reading2     = hot,
+            createdate   = when,
+            code         = "",
+            disabled     = False,
+            meterid      = 0,
+            disconnected = False,
+            corrected    = False,
+            isactual     = True,
+            sourcecode   = "both",
+            yearmonth    = when.strftime("%Y%m"),
+            restricted   = False,
+            consumption  = int(cold + hot),
+            operator_id  = self.controller_id,
+            erc_meter_id = 0,
         )
-        return MAIN_MENU
-
-    ctx.user_data["ls"] = ls
-    await update.message.reply_text(
-        lang=="kz" and "❄️ Суық көрсеткіш енгізіңіз:" or "❄️ Введите показание холодной воды:"
-    )
-    return INPUT_COLD
-
+        readings_changed(0)
 
-@login_required
-async def read_cold(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    lang = ctx.user_data.get("lang", "ru")
-    try:
-        cold = float(update.message.text.replace(",", "."))
-    except ValueError:
-        await update.message.reply_text(
-            lang=="kz" and "❌ Қате сан." or "❌ Некорректное число.",
-            reply_markup=main_menu_markup(lang)
-        )
-        return MAIN_MENU
 
-    ctx.user_data["cold"] = cold
-    await update.message.reply_text(
-        lang=="kz" and "🔥 Ыстық көрсеткіш енгізіңіз:" or "🔥 Теперь — показание горячей воды:"
-    )
-    return INPUT_HOT
+def dialog_markup(turn):
+    if turn.prompt is None or not turn.prompt.buttons:
+        return ReplyKeyboardRemove()
+    return ReplyKeyboardMarkup(turn.prompt.rows(), resize_keyboard=True, one_time_keyboard=True)
 
 
-@login_required
-async def read_hot(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+async def show_turn(update: Update, ctx: ContextTypes.DEFAULT_TYPE, turn, header: str = None):
     lang = ctx.user_data.get("lang", "ru")
-    try:
-        hot = float(update.message.text.replace(",", "."))
-    except ValueError:
-        await update.message.reply_text(
-            lang=="kz" and "❌ Қате сан." or "❌ Некорректное число.",
-            reply_markup=main_menu_markup(lang)
-        )
+    if turn.state in DIALOG_EXIT:
+        ctx.user_data.pop("dialog", None)
+        text = turn.notice or (lang=="kz" and "Келесі?" or "Что дальше?")
+        await update.message.reply_text(text, reply_markup=main_menu_markup(lang))
         return MAIN_MENU
 
-    ls   = ctx.user_data["ls"]
-    cold = ctx.user_data["cold"]
-    uid  = ctx.user_data["controller_id"]
-    mu   = await sync_to_async(MeterUser.objects.using("meter").get)(number=ls)
-
-    # одна запись cold+hot
-    await sync_to_async(Reading.objects.using("meter").create)(
-        user_id      = mu.id,
-        entity       = ls,
-        punumber     = ls,
-        readings     = cold,
-        reading2     = hot,
-        createdate   = timezone.now(),
-        code         = "",
-        disabled     = False,
-        meterid      = 0,
-        disconnected = False,
-        corrected    = False,
-        isactual     = True,
-        sourcecode   = "both",
-        yearmonth    = timezone.now().strftime("%Y%m"),
-        restricted   = False,
-        consumption  = int(cold + hot),
-        operatorid   = uid,
-        erc_meter_id = 0,
-    )
-
-    text = lang=="kz" and f"✅ Көрсеткіштер сақталды:\n❄️ {cold}\n🔥 {hot}" \
-                        or f"✅ Показания сохранены:\n❄️ {cold}\n🔥 {hot}"
-    await update.message.reply_text(text, reply_markup=main_menu_markup(lang))
-    return MAIN_MENU
+    ctx.user_data["dialog"] = {"state": turn.state, "data": turn.data}
+    text = turn.text(numbered=False)
+    if header:
+        text = header + "\n" + text
+    await update.message.reply_text(text, reply_markup=dialog_markup(turn))
+    return DIALOG
 
 
-# ——— Опломбирование ———
-
-@login_required
-async def menu_seals(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+async def start_dialog(update: Update, ctx: ContextTypes.DEFAULT_TYPE, state: str):
     lang = ctx.user_data.get("lang", "ru")
     area = ctx.user_data["area_id"]
-    uas = await sync_to_async(list)(
+    nums = await sync_to_async(list)(
         UserArea.objects.using("meter")
             .filter(area_id=area)
-            .select_related("user")
+            .values_list("user__number", flat=True)
     )
-    if not uas:
+    if not nums:
         await update.message.reply_text(
             lang=="kz" and "Аймақта абоненттер жоқ." or "В вашем районе нет абонентов.",
             reply_markup=main_menu_markup(lang)
         )
         return MAIN_MENU
 
-    nums = [ua.user.number for ua in uas]
-    prompt = lang=="kz" and "📝 Есепшот нөмірін енгізіңіз:" or "📝 Введите ЛС для опломбирования:"
-    await update.message.reply_text(prompt + "\n" + "\n".join(nums))
-    return INPUT_SEAL_LS
+    turn = CONTROLLER_DIALOG.enter(state, {"lang": lang})
+    return await show_turn(update, ctx, turn, header="\n".join(nums))
 
 
 @login_required
-async def seal_ls(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    lang = ctx.user_data.get("lang", "ru")
-    ls = update.message.text.strip()
-    ok = await sync_to_async(MeterUser.objects.using("meter").filter(number=ls).exists)()
-    if not ok:
-        await update.message.reply_text(
-            lang=="kz" and "❌ Есепшот табылмады." or "❌ ЛС не найден.",
-            reply_markup=main_menu_markup(lang)
-        )
-        return MAIN_MENU
-
-    ctx.user_data["ls"] = ls
-    await update.message.reply_text(
-        lang=="kz" and "Пломба себебін жазыңыз:" or "Укажите причину опломбирования:"
-    )
-    return INPUT_SEAL_REASON
-
-
-@login_required
-async def seal_reason(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    lang = ctx.user_data.get("lang", "ru")
-    ctx.user_data["reason"] = update.message.text.strip()
-    kb = ReplyKeyboardMarkup([["Холодная", "Горячая"]], resize_keyboard=True, one_time_keyboard=True)
-    await update.message.reply_text(
-        lang=="kz" and "Суды таңдаңыз:\n1️⃣ Суық\n2️⃣ Ыстық" or "Для какого типа воды опломбирование?",
-        reply_markup=kb
-    )
-    return INPUT_SEAL_TYPE
-
-
-@login_required
-async def seal_type(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    lang = ctx.user_data.get("lang", "ru")
-    kind = update.message.text.strip()
-    ctx.user_data["seal_kind"] = kind.lower()
-    today = date.today()
-    buttons = [
-        InlineKeyboardButton(
-            (today + timedelta(days=i)).strftime("%d.%m"),
-            callback_data=f"seal_date:{(today + timedelta(days=i)).isoformat()}"
-        ) for i in range(14)
-    ]
-    kb = [buttons[i:i+4] for i in range(0, len(buttons), 4)]
-    await update.message.reply_text(
-        lang=="kz" and "🗓 Күнді таңдаңыз:" or "🗓 Выберите дату:",
-        reply_markup=InlineKeyboardMarkup(kb)
-    )
-    return INPUT_SEAL_DATE
+async def menu_readings(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    return await start_dialog(update, ctx, "READING_ACCOUNT")
 
 
 @login_required
-async def process_seal_date(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    lang = ctx.user_data.get("lang", "ru")
-    q = update.callback_query
-    await q.answer()
-    sel = date.fromisoformat(q.data.split(":", 1)[1])
-    ctx.user_data["date"] = sel
-    slots = InlineKeyboardMarkup([[ 
-        InlineKeyboardButton("🕘 До обеда", callback_data="slot:morning"),
-        InlineKeyboardButton("🕒 После обеда", callback_data="slot:afternoon"),
-    ]])
-    await q.message.edit_text(
-        lang=="kz" and "⏰ Уақытты таңдаңыз:" or "⏰ Выберите слот:",
-        reply_markup=slots
-    )
-    return INPUT_SEAL_SLOT
+async def menu_seals(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    return await start_dialog(update, ctx, "SEAL_ACCOUNT")
 
 
 @login_required
-async def process_seal_slot(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
-    lang = ctx.user_data.get("lang", "ru")
-    q = update.callback_query
-    await q.answer()
-    code = q.data.split(":", 1)[1]
-    slot_label = lang=="kz" and ("Таңертең","Күні бойы")[0 if code=="morning" else 1] \
-                or ("До обеда","После обеда")[0 if code=="morning" else 1]
-
-    ls     = ctx.user_data["ls"]
-    reason = ctx.user_data["reason"]
-    kind   = ctx.user_data["seal_kind"]
-    sel    = ctx.user_data["date"]
-    uid    = ctx.user_data["controller_id"]
-
-    exists = await sync_to_async(
-        Seal.objects.using("meter")
-            .filter(scheduledate=sel, type=code, status="new")
-            .exists
-    )()
-    if exists:
-        await q.answer(lang=="kz" and "❌ Бұл уақыт бос емес." or "❌ Слот занят.", show_alert=True)
-        return await process_seal_date(update, ctx)
-
-    mu = await sync_to_async(MeterUser.objects.using("meter").get)(number=ls)
-    await sync_to_async(Seal.objects.using("meter").create)(
-        user            = mu,
-        txt             = reason,
-        createdate      = timezone.now(),
-        type            = code,
-        entity          = ls,
-        phone           = "",
-        status          = "new",
-        ishot           = (kind=="горячая"),
-        iscold          = (kind=="холодная"),
-        iselect         = False,
-        operatorid      = uid,
-        verificationcode= "",
-        verificationphone="",
-        aktnumber       = "",
-        scheduledate    = sel
+async def dialog_step(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
+    dialog = ctx.user_data.get("dialog") or {}
+    controller_id = ctx.user_data["controller_id"]
+    turn = await sync_to_async(CONTROLLER_DIALOG.handle)(
+        dialog.get("state"), dialog.get("data"), update.message.text or "",
+        Context(controller_id, ControllerWriter(controller_id), check_account=user_exists),
     )
-
-    msg = (
-        f"📤 {lang=='kz' and 'Өтініш қабылданды!' or 'Заявка принята!'}\n"
-        f"{lang=='kz' and 'Есепшот' or 'ЛС'}: {ls}\n"
-        f"{lang=='kz' and 'Себеп' or 'Причина'}: {reason}\n"
-        f"{lang=='kz' and 'Су түрі' or 'Тип'}: {kind}\n"
-        f"{lang=='kz' and 'Күн' or 'Дата'}: {sel.strftime('%d.%m.%Y')}\n"
-        f"{lang=='kz' and 'Уақыт' or 'Слот'}: {slot_label}"
-    )
-    await q.message.edit_text(msg)
-    await q.message.reply_text(lang=="kz" and "Келесі?" or "Что дальше?", reply_markup=main_menu_markup(lang))
-    return MAIN_MENU
+    return await show_turn(update, ctx, turn)
 
 
 async def cancel(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
@@ -0,0 +1,145 @@
+# bots_app/session_store.py
+
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router, transaction
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+
+from meter_app.models import WhatsAppSession
+
+# Ключ сессии в кэше
+SESSION_KEY = "whatsapp:session:{}"
+
+# Когда кэш начал хранить сессии (time.time()): ключ без TTL, пропадает
+# только вместе с содержимым кэша
+CACHE_EPOCH_KEY = "whatsapp:session:epoch"
+
+# Сколько живёт сессия без сообщений (секунды)
+DEFAULT_SESSION_TTL = 24 * 60 * 60
+
+
+def normalize_phone(phone_raw: str) -> str:
+    return phone_raw.replace("whatsapp:", "")
+
+
+class Session:
+    """
+    Состояние диалога FSM вебхука: state и data, как у WhatsAppSession.
+    save() сохраняет через хранилище, из которого сессия получена.
+    """
+
+    def __init__(self, store, phone: str, state: str = "", data: dict = None):
+        self.store = store
+        self.phone = phone
+        self.state = state
+        self.data  = data or {}
+
+    def clear(self):
+        self.state = ""
+        self.data = {}
+
+    def save(self):
+        self.store.save(self)
+
+
+class DatabaseSessionStore:
+    """
+    Сессия — строка WhatsAppSession: чтение и запись в PostgreSQL на каждое сообщение.
+    """
+    name = "db"
+
+    def load(self, phone: str) -> Session:
+        sess, _ = WhatsAppSession.objects.get_or_create(phone=phone, defaults={'data': {}, 'state': ''})
+        return Session(self, phone, sess.state or "", sess.data)
+
+    def save(self, session: Session):
+        WhatsAppSession.objects.update_or_create(
+            phone=session.phone, defaults={'state': session.state, 'data': session.data},
+        )
+
+
+class CacheSessionStore:
+    """
+    Сессия живёт в кэше (Redis из settings.CACHES) с TTL, который
+    продлевается каждым сообщением. В WhatsAppSession изменения пишутся
+    задачей Celery для аудита после коммита — вебхук не ждёт PostgreSQL
+    и не держит блокировку строки сессии. Если ключа в кэше нет, а кэш
+    очищен меньше TTL назад (CACHE_EPOCH_KEY), сессия поднимается из
+    WhatsAppSession, пока её копия там не старше TTL; в остальных случаях
+    сессия просто истекла и БД не читается.
+    """
+    name = "cache"
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, "WHATSAPP_SESSION_CACHE", "default")]
+        self.ttl = getattr(settings, "WHATSAPP_SESSION_TTL", DEFAULT_SESSION_TTL)
+
+    def load(self, phone: str) -> Session:
+        key = SESSION_KEY.format(phone)
+        cached = self.cache.get_many([key, CACHE_EPOCH_KEY])
+        payload = cached.get(key)
+        if payload is None:
+            payload = self._restore(phone, cached.get(CACHE_EPOCH_KEY))
+        return Session(self, phone, payload.get("state") or "", payload.get("data"))
+
+    def _restore(self, phone: str, epoch) -> dict:
+        now = time.time()
+        if epoch is None:
+            self.cache.add(CACHE_EPOCH_KEY, now, timeout=None)
+        elif now - epoch >= self.ttl:
+            # кэш старше TTL: сессии в нём нет, потому что она истекла
+            return {}
+        fresh = timezone.now() - timedelta(seconds=self.ttl)
+        row = WhatsAppSession.objects.filter(phone=phone, updated__gte=fresh).first()
+        return {"state": row.state, "data": row.data} if row else {}
+
+    def save(self, session: Session):
+        self.cache.set(
+            SESSION_KEY.format(session.phone),
+            {"state": session.state, "data": session.data},
+            timeout=self.ttl,
+        )
+        args = (session.phone, session.state, session.data, time.time())
+        transaction.on_commit(partial(_persist_later, args), using=router.db_for_write(WhatsAppSession))
+
+
+def _persist_later(args):
+    from bots_app.tasks import persist_whatsapp_session
+
+    try:
+        persist_whatsapp_session.delay(*args)
+    except OperationalError:
+        # брокер недоступен — аудит пишем сами, сессия уже в кэше
+        persist_whatsapp_session(*args)
+
+
+def persist_session(phone: str, state: str, data: dict, saved_at: float):
+    """
+    Записывает состояние в WhatsAppSession, если оно новее записанного:
+    задачи одной сессии могут выполниться не по порядку.
+    """
+    updated = datetime.fromtimestamp(saved_at, tz=dt_timezone.utc)
+    rows = WhatsAppSession.objects.filter(phone=phone, updated__lt=updated).update(
+        state=state, data=data, updated=updated,
+    )
+    if not rows:
+        WhatsAppSession.objects.get_or_create(phone=phone, defaults={'state': state, 'data': data})
+
+
+SESSION_STORES = {
+    CacheSessionStore.name:    CacheSessionStore,
+    DatabaseSessionStore.name: DatabaseSessionStore,
+}
+
+
+def get_session_store(name: str = None):
+    name = name or getattr(settings, "WHATSAPP_SESSION_BACKEND", CacheSessionStore.name)
+    try:
+        return SESSION_STORES[name]()
+    except KeyError:
+        raise ValueError(f"Неизвестное хранилище сессий: {name}. Доступны: {', '.join(SESSION_STORES)}")
@@ -0,0 +1,65 @@
+# bots_app/tasks.py
+from datetime import date, datetime
+
+from celery import shared_task
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from meter_app.models import Seal
+from .management.commands.bot_utils import save_seal_request, submit_readings
+from .session_store import persist_session
+
+# Повторы отложенной записи, пока БД meter недоступна или перегружена:
+# экспоненциальная пауза до 5 минут со случайным разбросом
+WRITE_RETRY = {
+    "autoretry_for":     (DatabaseError,),
+    "retry_backoff":     True,
+    "retry_backoff_max": 300,
+    "retry_jitter":      True,
+    "max_retries":       8,
+}
+
+
+@shared_task(ignore_result=True)
+def persist_whatsapp_session(phone: str, state: str, data: dict, saved_at: float):
+    # копия сессии вебхука для аудита; сам вебхук читает сессию из кэша
+    persist_session(phone, state, data, saved_at)
+
+
+def notify_whatsapp(phone: str, text: str):
+    """
+    Отдельное сообщение абоненту через Twilio REST (вне ответа на вебхук).
+    Без учётных данных Twilio ничего не отправляет.
+    """
+    if not (settings.TWILIO_ACCOUNT_SID and settings.TWILIO_AUTH_TOKEN and settings.TWILIO_WHATSAPP_FROM):
+        return
+    from twilio.rest import Client
+
+    Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN).messages.create(
+        from_=settings.TWILIO_WHATSAPP_FROM, to=phone, body=text,
+    )
+
+
+@shared_task(ignore_result=True, **WRITE_RETRY)
+def save_whatsapp_seal(phone: str, account: str, reason: str, day: str, timeslot: str, water_type: str):
+    day = date.fromisoformat(day)
+    with transaction.atomic(using="meter"):
+        # повтор задачи после успешного коммита не создаёт вторую заявку
+        if Seal.objects.using("meter").filter(
+            user__number=account, scheduledate=day, type=timeslot, txt=reason,
+        ).exists():
+            return
+        save_seal_request(
+            telegram_id=phone, account=account, reason=reason,
+            date=day, timeslot=timeslot, water_type=water_type,
+        )
+
+
+@shared_task(ignore_result=True, **WRITE_RETRY)
+def save_whatsapp_readings(phone: str, account: str, cold: float, hot: float, when: str):
+    when = datetime.fromisoformat(when)
+    try:
+        submit_readings(phone, account, cold, hot, when)
+    except ValueError as e:
+        # правила (меньше предыдущего, прошло 24 ч) не лечатся повтором
+        notify_whatsapp(phone, f"❌ {e}")
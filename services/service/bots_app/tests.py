@@ -1,3 +1,305 @@
-from django.test import TestCase
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from meter_app.models import WhatsAppSession
+
+
+# отложенные записи и аудит сессий — задачи Celery, в тестах выполняются сразу
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+class WhatsAppSessionStoreTest(TestCase):
+    databases = ['meter',]
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def _send(self, body, phone='whatsapp:+77010000001'):
+        # копия для аудита уходит в очередь после коммита
+        with self.captureOnCommitCallbacks(using='meter', execute=True):
+            resp = self.client.post(reverse('whatsapp-webhook'), {'From': phone, 'Body': body})
+        self.assertEqual(resp.status_code, 200)
+        return resp.content.decode('utf-8')
+
+    def test_session_is_read_from_cache(self):
+        from bots_app.session_store import CacheSessionStore
+
+        self.assertIn('Выберите язык', self._send('привет'))
+        self.assertIn('Добро пожаловать', self._send('1'))
+
+        session = CacheSessionStore().load('+77010000001')
+        self.assertEqual((session.state, session.data), ('CHOOSE_ACTION', {'lang': 'ru'}))
+        # копия для аудита записана задачей Celery
+        self.assertEqual(WhatsAppSession.objects.get(phone='+77010000001').state, 'CHOOSE_ACTION')
+
+        # следующее сообщение не читает WhatsAppSession
+        with self.assertNumQueries(0, using='meter'):
+            CacheSessionStore().load('+77010000001')
+
+    def test_session_restored_from_audit_copy(self):
+        self._send('привет')
+        self._send('2')
+        caches['default'].clear()
+        self.assertIn('Тех қолдау', self._send('3'))
+
+    @override_settings(WHATSAPP_SESSION_TTL=60)
+    def test_stale_audit_copy_is_ignored(self):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        self._send('привет')
+        self._send('1')
+        caches['default'].clear()
+        WhatsAppSession.objects.update(updated=timezone.now() - timedelta(minutes=5))
+        self.assertIn('Выберите язык', self._send('3'))
+
+    @override_settings(WHATSAPP_SESSION_TTL=60)
+    def test_expired_session_does_not_read_database(self):
+        import time
+        from bots_app.session_store import CACHE_EPOCH_KEY, CacheSessionStore
+
+        caches['default'].set(CACHE_EPOCH_KEY, time.time() - 120, timeout=None)
+        with self.assertNumQueries(0, using='meter'):
+            session = CacheSessionStore().load('+77010000003')
+        self.assertEqual(session.state, '')
+
+    def test_out_of_order_audit_write_is_skipped(self):
+        import time
+        from bots_app.session_store import persist_session
+
+        now = time.time()
+        persist_session('+77010000002', 'SEAL_DATE', {}, now)
+        persist_session('+77010000002', 'SEAL_TYPE', {}, now - 10)
+        self.assertEqual(WhatsAppSession.objects.get(phone='+77010000002').state, 'SEAL_DATE')
+
+    @override_settings(WHATSAPP_SESSION_BACKEND='db')
+    def test_database_backend(self):
+        self._send('привет')
+        self._send('1')
+        self.assertEqual(WhatsAppSession.objects.get(phone='+77010000001').state, 'CHOOSE_ACTION')
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+class WhatsAppAsyncWebhookTest(TestCase):
+    databases = ['meter',]
+
+    def setUp(self):
+        from meter_app.external_api.accounts import publish_refresh
+        from meter_app.external_api.bot_benchmark import seed_bot_tables
+
+        caches['default'].clear()
+        seed_bot_tables(1, using='meter', months=0, seals=0, areas=1)
+        publish_refresh()
+
+    async def _send(self, client, body):
+        resp = await client.post(
+            reverse('whatsapp-webhook-async'), {'From': 'whatsapp:+77010000003', 'Body': body},
+        )
+        self.assertEqual(resp.status_code, 200)
+        return resp.content.decode('utf-8')
+
+    async def test_readings_are_saved_in_background(self):
+        from decimal import Decimal
+        from django.test import AsyncClient
+        from meter_app.models import Reading
+
+        client = AsyncClient()
+        for body in ('привет', '1', '2', '10000000', '12,5'):
+            await self._send(client, body)
+        self.assertIn('Показания сохранены', await self._send(client, '3'))
+
+        # задачи в тесте выполняются сразу: запись сделана до ответа
+        reading = await Reading.objects.using('meter').aget(punumber='10000000')
+        self.assertEqual((reading.readings, reading.reading2), (Decimal('12.5'), Decimal('3')))
+
+    def test_repeated_seal_task_creates_one_request(self):
+        from bots_app.tasks import save_whatsapp_seal
+        from meter_app.models import Seal
+
+        args = ('whatsapp:+77010000003', '10000000', 'замена', '2025-01-10', 'morning', 'холодная')
+        save_whatsapp_seal.delay(*args)
+        save_whatsapp_seal.delay(*args)
+        self.assertEqual(Seal.objects.using('meter').filter(user__number='10000000').count(), 1)
+
+
+class DialogTest(TestCase):
+    databases = ['meter',]
+
+    class Writer:
+        def __init__(self):
+            self.seals, self.readings = [], []
+
+        def save_seal(self, *args):
+            self.seals.append(args)
+
+        def save_readings(self, *args):
+            self.readings.append(args[:4])
+
+    def setUp(self):
+        from meter_app.external_api.accounts import publish_refresh
+        from meter_app.external_api.bot_benchmark import seed_bot_tables
+
+        seed_bot_tables(1, using='meter', months=0, seals=0, areas=1)
+        publish_refresh()
+
+    def _run(self, dialog, answers, state=''):
+        from bots_app.dialog import Context
+
+        writer, data = self.Writer(), {}
+        for text in answers:
+            turn = dialog.handle(state, data, text, Context(42, writer))
+            state, data = turn.state, turn.data
+        return turn, writer
+
+    def test_numbered_prompts_are_precompiled(self):
+        from bots_app.dialog import Dialog
+
+        dialog = Dialog()
+        turn, _ = self._run(dialog, ['привет'])
+        self.assertEqual(turn.text(), "🌐 Выберите язык:\n1️⃣ Русский\n2️⃣ Қазақша")
+        self.assertIs(turn.prompt, dialog.prompts['ru']['CHOOSE_LANG'])
+
+    def test_button_labels_drive_seal_dialog(self):
+        from datetime import date, timedelta
+        from bots_app.dialog import Dialog
+
+        day = date.today() + timedelta(days=1)
+        turn, writer = self._run(Dialog(finish='CHOOSE_ACTION'), [
+            'Қазақша', 'Пломба қою', '10000000', 'ауыстыру', 'Ыстық', day.strftime('%d.%m'), 'Таңертең',
+        ], state='CHOOSE_LANG')
+
+        self.assertEqual(turn.state, 'CHOOSE_ACTION')
+        self.assertEqual(turn.data, {'lang': 'kz'})
+        self.assertIn('Өтініш қабылданды', turn.notice)
+        self.assertEqual(turn.prompt.buttons[0], 'Пломба қою')
+        self.assertEqual(writer.seals, [(42, '10000000', 'ауыстыру', day, 'morning', 'hot')])
+
+    def test_busy_slot_is_asked_again(self):
+        from datetime import date
+        from bots_app.dialog import Context, Dialog
+        from bots_app.management.commands.bot_utils import save_seal_request
+
+        save_seal_request(1, '10000000', 'замена', date.today(), 'morning', 'cold')
+        data = {'lang': 'ru', 'ls': '10000001', 'reason': 'замена', 'kind': 'cold', 'date': date.today().isoformat()}
+        writer = self.Writer()
+        with self.assertNumQueries(1, using='meter'):
+            turn = Dialog().handle('SEAL_SLOT', data, '1', Context(42, writer))
+        self.assertEqual(turn.state, 'SEAL_SLOT')
+        self.assertIn('слот уже занят', turn.text())
+        self.assertEqual(writer.seals, [])
+
+    def test_readings_checked_against_previous(self):
+        from django.utils import timezone
+        from bots_app.dialog import Context, Dialog
+        from bots_app.management.commands.bot_utils import save_or_update_reading
+        from meter_app.external_api.accounts import account_exists
+
+        save_or_update_reading(1, '10000000', 5, 'cold', timezone.now())
+        save_or_update_reading(1, '10000000', 1, 'hot',  timezone.now())
+
+        # ЛС проверяется по индексу в памяти, предыдущие показания — одним запросом
+        account_exists('10000000')
+        with self.assertNumQueries(1, using='meter'):
+            turn = Dialog().handle('READING_ACCOUNT', {'lang': 'ru'}, '10000000', Context(42, self.Writer()))
+        self.assertEqual((turn.state, turn.data['prev']), ('READING_COLD', [5.0, 1.0]))
+
+        turn, writer = self._run(Dialog(), ['2', '10000000', '4'], state='CHOOSE_ACTION')
+        self.assertEqual(turn.state, 'CHOOSE_ACTION')
+        self.assertIn('4.0 < предыдущего (5.0)', turn.notice)
+
+        turn, writer = self._run(Dialog(), ['2', '10000000', '6', '1,5'], state='CHOOSE_ACTION')
+        self.assertEqual(writer.readings, [(42, '10000000', 6.0, 1.5)])
+        self.assertEqual(turn.state, 'END')
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+class SubmitReadingsTest(TestCase):
+    databases = ['meter',]
+
+    def setUp(self):
+        from meter_app.external_api.bot_benchmark import seed_bot_tables
+
+        seed_bot_tables(1, using='meter', months=0, seals=0, areas=1)
+
+    def _readings(self):
+        from meter_app.models import Reading
+
+        return list(
+            Reading.objects.using('meter').filter(punumber='10000000')
+            .values_list('yearmonth', 'readings', 'reading2')
+        )
+
+    def test_month_row_is_updated_in_one_statement(self):
+        from decimal import Decimal
+        from django.db import connections
+        from django.utils import timezone
+        from bots_app.management.commands.bot_utils import submit_readings
+
+        now = timezone.now()
+        submit_readings(1, '10000000', 5, 1, now)
+        # повторная подача за месяц: блокирующее чтение и один UPDATE (+ SAVEPOINT/RELEASE,
+        # в PostgreSQL ещё advisory-блокировка ЛС)
+        locks = connections['meter'].vendor == 'postgresql'
+        with self.assertNumQueries(4 + locks, using='meter'):
+            submit_readings(1, '10000000', 6, 2, now)
+        self.assertEqual(self._readings(), [(now.strftime('%Y%m'), Decimal('6'), Decimal('2'))])
+
+    def test_correction_refreshes_cache_and_rollup(self):
+        from django.utils import timezone
+        from bots_app.management.commands.bot_utils import submit_readings
+        from meter_app.api.cache import table_version
+        from meter_app.external_api.rollup import refresh_rollup
+        from meter_app.models import ConsumptionRollup, Reading
+
+        now = timezone.now()
+        submit_readings(1, '10000000', 5, 1, now)
+        Reading.objects.using('meter').update(meterid=7)
+        refresh_rollup('readings')
+        version = table_version(Reading)
+        # исправление обновляет строку на месте: версия кэша и свёртка счётчика — после коммита
+        with self.captureOnCommitCallbacks(using='meter', execute=True):
+            submit_readings(1, '10000000', 6, 2, now)
+        self.assertNotEqual(table_version(Reading), version)
+        rollup = ConsumptionRollup.objects.using('meter').get(source='readings', meter_id=7)
+        self.assertEqual(rollup.last_value, 6)
+
+    def test_new_user_is_published_after_commit(self):
+        from datetime import date
+        from django.db import transaction
+        from bots_app.management.commands.bot_utils import save_seal_request
+        from meter_app.external_api.accounts import user_exists
+
+        self.assertFalse(user_exists('10000099'))
+        with self.assertRaises(RuntimeError), transaction.atomic(using='meter'):
+            save_seal_request(1, '10000099', 'замена', date.today(), 'morning', 'cold')
+            raise RuntimeError
+        self.assertFalse(user_exists('10000099'))
+
+        with self.captureOnCommitCallbacks(using='meter', execute=True):
+            save_seal_request(1, '10000099', 'замена', date.today(), 'morning', 'cold')
+        self.assertTrue(user_exists('10000099'))
+
+    def test_rules_reject_whole_submission(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from bots_app.management.commands.bot_utils import submit_readings
+        from meter_app.models import Reading
+
+        now = timezone.now()
+        submit_readings(1, '10000000', 5, 1, now)
+        with self.assertRaisesMessage(ValueError, 'предыдущее'):
+            submit_readings(1, '10000000', 6, 0.5, now)
+
+        Reading.objects.using('meter').update(createdate=now - timedelta(hours=25))
+        with self.assertRaisesMessage(ValueError, '24 часов'):
+            submit_readings(1, '10000000', 7, 2, now)
+        self.assertEqual([row[1:] for row in self._readings()], [(5, 1)])
+
+    def test_new_month_carries_previous_values(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from bots_app.management.commands.bot_utils import save_or_update_reading
+
+        now = timezone.now()
+        save_or_update_reading(1, '10000000', 5, 'cold', now - timedelta(days=40))
+        save_or_update_reading(1, '10000000', 8, 'cold', now)
+        self.assertEqual(sorted(row[1:] for row in self._readings()), [(5, 0), (8, 0)])
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import whatsapp_webhook
+from .views import whatsapp_webhook, whatsapp_webhook_async
 
 urlpatterns = [
     path('whatsapp/webhook/', whatsapp_webhook, name='whatsapp-webhook'),
+    path('whatsapp/webhook/async/', whatsapp_webhook_async, name='whatsapp-webhook-async'),
 ]
\ No newline at end of file
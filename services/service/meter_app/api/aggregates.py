@@ -0,0 +1,83 @@
+from django.http import Http404
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from meter_app.api.cache import CachedResponseMixin
+from meter_app.external_api.rollup import (
+    GROUPS, PERIODS, ROLLUP_PERIOD, SOURCES, aggregate, has_rollup, rollup,
+)
+from meter_app.models import ConsumptionRollup
+
+
+class AggregateView(CachedResponseMixin, APIView):
+    """
+    Агрегаты показаний: /api/aggregates/<источник>/?group=meter|account|sector&period=month|day.
+    Фильтры: ?meter=, ?account=, ?sector=, ?from= / ?to= (начало периода, включительно).
+    Помесячные агрегаты читаются из свёртки ConsumptionRollup, если она
+    построена для источника; ?live=1 — посчитать по сырым показаниям.
+    """
+
+    def get_source(self):
+        source = SOURCES.get(self.kwargs["source"])
+        if source is None:
+            raise Http404("Неизвестный источник показаний")
+        return source
+
+    def get_cache_models(self):
+        source = self.get_source()
+        return (source.model, ConsumptionRollup) + source.depends
+
+    def get_params(self, params):
+        group = params.get("group", "meter")
+        period = params.get("period", ROLLUP_PERIOD)
+        errors = {}
+        if group not in GROUPS:
+            errors["group"] = [f"Допустимые значения: {', '.join(GROUPS)}"]
+        if period not in PERIODS:
+            errors["period"] = [f"Допустимые значения: {', '.join(PERIODS)}"]
+
+        filters = {"account": params.get("account") or None, "sector": params.get("sector") or None}
+        meter = params.get("meter")
+        if meter:
+            try:
+                filters["meters"] = [int(meter)]
+            except ValueError:
+                errors["meter"] = ["Ожидается целое число"]
+        for name, key in (("from", "since"), ("to", "until")):
+            value = params.get(name)
+            if not value:
+                continue
+            try:
+                filters[key] = parse_date(value)
+            except ValueError:
+                filters[key] = None
+            if filters[key] is None:
+                errors[name] = ["Ожидается дата YYYY-MM-DD"]
+        if errors:
+            raise ValidationError(errors)
+        return group, period, filters
+
+    def aggregate(self, request, source):
+        group, period, filters = self.get_params(request.query_params)
+        live = request.query_params.get("live") in ("1", "true")
+        if period == ROLLUP_PERIOD and not live and has_rollup(source):
+            rows = rollup(source, group, **filters)
+        else:
+            rows = aggregate(source, group, period, **filters)
+        return Response([
+            {
+                group:      row["key"],
+                "period":   row["period"].isoformat(),
+                "readings": row["readings"],
+                **{
+                    name: None if row[name] is None else "{:f}".format(row[name])
+                    for name in ("sum", "min", "max", "last", "delta")
+                },
+            }
+            for row in rows
+        ])
+
+    def get(self, request, source):
+        return self.cached_response(self.aggregate, request, source)
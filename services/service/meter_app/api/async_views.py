@@ -0,0 +1,186 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.exceptions import ValidationError
+
+from meter_app.api.cache import response_tag
+from meter_app.api.export import (
+    CONTENT_TYPES, EXPORT_CHUNK_SIZE, EXPORT_TABLES, LINES_PER_CHUNK,
+    csv_row, csv_writer, ndjson_line,
+)
+from meter_app.api.fast import build_columns, convert_rows, list_fields
+from meter_app.api.filters import QueryParamFilter
+from meter_app.api.pagination import IdCursorPagination
+from meter_app.api.views import (
+    ErcDataViewSet, ReadingsSuViewSet, EnergoDeviceViewSet, EnergoDeviceDataViewSet,
+    IotMeterViewSet, IotMeterDataViewSet, ImportRunViewSet,
+)
+
+# Таблицы асинхронного API: имя в URL → viewset синхронного API
+# (оттуда берутся queryset и разрешённые фильтры)
+ASYNC_VIEWSETS = {
+    "erc-data":       ErcDataViewSet,
+    "readings-su":    ReadingsSuViewSet,
+    "energo-devices": EnergoDeviceViewSet,
+    "energo-data":    EnergoDeviceDataViewSet,
+    "iot-meters":     IotMeterViewSet,
+    "iot-data":       IotMeterDataViewSet,
+    "import-runs":    ImportRunViewSet,
+}
+
+SAFE_METHODS = ("GET", "HEAD")
+
+
+def _viewset(table):
+    viewset = ASYNC_VIEWSETS.get(table)
+    if viewset is None:
+        raise Http404("Неизвестная таблица")
+    return viewset
+
+
+def _int_param(params, name, default=None):
+    value = params.get(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: ["Ожидается целое число"]})
+
+
+async def _conditional(request, model, fmt="json"):
+    """
+    (ETag, Last-Modified, ответ 304 или None) — как у синхронного API.
+    Версия таблицы читается из кэша, поэтому вызов уходит в поток.
+    """
+    etag, last_modified = await sync_to_async(response_tag)((model,), request, fmt)
+    return etag, last_modified, get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def _tagged(response, etag, last_modified):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+async def table_list(request, table):
+    """
+    Асинхронный список: /api/async/<таблица>/. Те же ?fields= и фильтры,
+    что в синхронном API; страницы листаются по id: ?after=<id>&page_size=.
+    """
+    if request.method not in SAFE_METHODS:
+        return HttpResponseNotAllowed(SAFE_METHODS)
+    viewset = _viewset(table)
+    model = viewset.queryset.model
+    try:
+        names = list_fields(model, request.GET.get("fields"))
+        lookups = QueryParamFilter().get_lookups(viewset, model, request.GET)
+        after = _int_param(request.GET, "after")
+        page_size = max(1, min(
+            _int_param(request.GET, "page_size", IdCursorPagination.page_size),
+            IdCursorPagination.max_page_size,
+        ))
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400)
+
+    etag, last_modified, response = await _conditional(request, model)
+    if response is not None:
+        return _tagged(response, etag, last_modified)
+
+    columns = build_columns(model, names)
+    pk = model._meta.pk.attname
+    values = [attname for _, attname, _ in columns]
+    if pk not in values:
+        values.append(pk)
+    qs = viewset.queryset.filter(**lookups).order_by(pk)
+    if after is not None:
+        qs = qs.filter(pk__gt=after)
+    # одна лишняя строка — признак того, что есть следующая страница
+    rows = [row async for row in qs.values(*values)[:page_size + 1]]
+
+    next_url = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        params = request.GET.copy()
+        params["after"] = rows[-1][pk]
+        next_url = request.build_absolute_uri("?" + params.urlencode())
+    response = JsonResponse({"next": next_url, "results": convert_rows(columns, rows)})
+    return _tagged(response, etag, last_modified)
+
+
+async def table_detail(request, table, pk):
+    if request.method not in SAFE_METHODS:
+        return HttpResponseNotAllowed(SAFE_METHODS)
+    viewset = _viewset(table)
+    model = viewset.queryset.model
+    try:
+        columns = build_columns(model, list_fields(model, request.GET.get("fields")))
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400)
+
+    etag, last_modified, response = await _conditional(request, model)
+    if response is not None:
+        return _tagged(response, etag, last_modified)
+    try:
+        row = await viewset.queryset.values(*(attname for _, attname, _ in columns)).aget(pk=pk)
+    except model.DoesNotExist:
+        raise Http404("Запись не найдена")
+    return _tagged(JsonResponse(convert_rows(columns, [row])[0]), etag, last_modified)
+
+
+async def _lines(fmt, columns, rows):
+    if fmt == "ndjson":
+        async for row in rows:
+            yield ndjson_line(columns, [row[c] for c in columns])
+    else:
+        writer = csv_writer()
+        yield writer.writerow(columns)
+        async for row in rows:
+            yield writer.writerow(csv_row([row[c] for c in columns]))
+
+
+async def _grouped(lines):
+    chunk = []
+    async for line in lines:
+        chunk.append(line)
+        if len(chunk) >= LINES_PER_CHUNK:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+async def table_export(request, table, fmt):
+    """
+    Асинхронная потоковая выгрузка: /api/async/export/<таблица>.ndjson|csv.
+    Строки читаются aiterator() по EXPORT_CHUNK_SIZE; под ASGI медленный
+    клиент не держит поток воркера, пока выгрузка идёт.
+    """
+    if request.method not in SAFE_METHODS:
+        return HttpResponseNotAllowed(SAFE_METHODS)
+    model = EXPORT_TABLES.get(table)
+    if model is None or fmt not in CONTENT_TYPES:
+        raise Http404("Неизвестная таблица или формат выгрузки")
+    try:
+        after = _int_param(request.GET, "after")
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400)
+
+    etag, last_modified, response = await _conditional(request, model, fmt)
+    if response is not None:
+        return _tagged(response, etag, last_modified)
+
+    columns = [f.attname for f in model._meta.concrete_fields]
+    qs = model.objects.using("meter").order_by("pk")
+    if after is not None:
+        qs = qs.filter(pk__gt=after)
+    # values(), а не values_list(): в Django 4.2 values_list().aiterator()
+    # выполняет запрос синхронно прямо в event loop
+    rows = qs.values(*columns).aiterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    response = StreamingHttpResponse(_grouped(_lines(fmt, columns, rows)), content_type=CONTENT_TYPES[fmt])
+    filename = model._meta.db_table.split(".")[-1].strip('"')
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return _tagged(response, etag, last_modified)
@@ -0,0 +1,166 @@
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from redis.exceptions import RedisError
+from rest_framework.response import Response
+
+# Версия таблицы: время последнего коммита записи в неё (time.time_ns)
+VERSION_KEY = "meter_api:version:{}"
+
+# Сколько живёт версия (секунды): запись мимо touch_tables и сигналов
+# (ручной SQL) перестаёт отдаваться из кэша самое позднее через это время
+DEFAULT_VERSION_TTL = 60 * 60
+
+# Готовые данные ответа: ключ — хэш версии таблицы, формата и полного URL
+# (в данных абсолютные ссылки next/previous, поэтому хост — часть ключа)
+RESPONSE_KEY = "meter_api:response:{}"
+
+# Ошибки недоступного кэша: API тогда отвечает без кэша, а не 500
+CACHE_ERRORS = (RedisError, OSError)
+
+# Сколько хранится ответ, если версия таблицы не менялась (секунды)
+DEFAULT_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _cache():
+    return caches[getattr(settings, "METER_API_CACHE", "default")]
+
+
+def _version_key(model) -> str:
+    return VERSION_KEY.format(model._meta.db_table)
+
+
+def _version_ttl() -> int:
+    return getattr(settings, "METER_API_VERSION_TTL", DEFAULT_VERSION_TTL)
+
+
+def table_version(model) -> int:
+    """
+    Текущая версия таблицы model. Если версии ещё нет (кэш пуст или очищен),
+    таблица считается изменённой сейчас — старые ETag после этого не совпадут.
+    """
+    cache = _cache()
+    key = _version_key(model)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=_version_ttl())
+        version = cache.get(key)
+    return version
+
+
+def bump_table_version(*models):
+    cache = _cache()
+    version = time.time_ns()
+    cache.set_many({_version_key(model): version for model in models}, timeout=_version_ttl())
+
+
+def touch_tables(using: str, *models):
+    """
+    Поднимает версии таблиц models после коммита текущей транзакции на БД using
+    (вне транзакции — сразу). Откат транзакции версии не трогает.
+    """
+    transaction.on_commit(partial(bump_table_version, *models), using=using, robust=True)
+
+
+def touch_on_write(sender, using, **kwargs):
+    """
+    Приёмник post_save / post_delete (MeterAppConfig.ready): поштучные
+    записи через ORM — админка, боты — тоже поднимают версию. Массовые
+    записи импорта сигналов не шлют и вызывают touch_tables сами.
+    """
+    touch_tables(using, sender)
+
+
+def touch_on_m2m(sender, instance, model, using, **kwargs):
+    # связь многие-ко-многим меняет промежуточную таблицу и обе стороны
+    touch_tables(using, sender, type(instance), model)
+
+
+def touch_app_tables(sender, using, **kwargs):
+    """
+    Приёмник post_migrate: миграции с переписыванием данных поднимают версии
+    всех таблиц приложения.
+    """
+    try:
+        bump_table_version(*sender.get_models())
+    except CACHE_ERRORS:
+        # без кэша нечего сбрасывать — версии начнутся заново
+        pass
+
+
+def response_tag(models, request, fmt: str = "") -> tuple:
+    """
+    (ETag, Last-Modified в секундах) ответа на request, который читает таблицы models.
+    """
+    versions = [(model._meta.db_table, table_version(model)) for model in models]
+    raw = f"{versions}:{fmt}:{request.build_absolute_uri()}"
+    digest = hashlib.md5(raw.encode("utf-8"), usedforsecurity=False).hexdigest()
+    return f'"{digest}"', max(version for _, version in versions) // 10**9
+
+
+class CachedResponseMixin:
+    """
+    Условный GET и кэш ответов для read-only viewset'ов. Ответ зависит
+    только от пути с параметрами и версии таблицы, которую поднимает
+    каждая запись (импорт, сигналы ORM, миграции) и которая живёт не
+    дольше METER_API_VERSION_TTL, поэтому:
+      * If-None-Match / If-Modified-Since без изменений — 304 без запроса к БД;
+      * иначе данные ответа берутся из кэша, пока таблица не изменилась.
+    Если кэш недоступен, ответ собирается из БД без ETag и без кэширования.
+    """
+    cache_timeout = None
+
+    def get_cache_models(self):
+        """
+        Таблицы, от которых зависит ответ; по умолчанию — модель queryset.
+        """
+        return (self.get_queryset().model,)
+
+    def get_cache_timeout(self):
+        if self.cache_timeout is not None:
+            return self.cache_timeout
+        return getattr(settings, "METER_API_CACHE_TIMEOUT", DEFAULT_CACHE_TIMEOUT)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        try:
+            etag, last_modified = response_tag(
+                self.get_cache_models(), request, request.accepted_renderer.format
+            )
+        except CACHE_ERRORS:
+            return handler(request, *args, **kwargs)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            cache = _cache()
+            key = RESPONSE_KEY.format(etag.strip('"'))
+            try:
+                data = cache.get(key)
+            except CACHE_ERRORS:
+                data = None
+            if data is not None:
+                response = Response(data)
+            else:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                try:
+                    cache.set(key, response.data, timeout=self.get_cache_timeout())
+                except CACHE_ERRORS:
+                    pass
+
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        # клиент может хранить ответ, но перед использованием обязан сверить ETag
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
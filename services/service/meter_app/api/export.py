@@ -0,0 +1,133 @@
+import csv
+import datetime
+import json
+from decimal import Decimal
+
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+from django.views.decorators.http import condition, require_GET
+
+from meter_app.api.cache import response_tag, table_version
+from meter_app.models import ReadingsSU, EnergoDeviceData, IotMeterData, ErcData, EnergoDevice, IotMeter
+
+# Таблицы, доступные для выгрузки: имя в URL → модель
+EXPORT_TABLES = {
+    "readings-su":    ReadingsSU,
+    "energo-data":    EnergoDeviceData,
+    "iot-data":       IotMeterData,
+    "erc-data":       ErcData,
+    "energo-devices": EnergoDevice,
+    "iot-meters":     IotMeter,
+}
+
+# Строк на один запрос к серверному курсору
+EXPORT_CHUNK_SIZE = 2000
+
+# Строк в одном куске ответа: меньше вызовов write у WSGI-сервера
+LINES_PER_CHUNK = 500
+
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson; charset=utf-8",
+    "csv":    "text/csv; charset=utf-8",
+}
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} не сериализуется в JSON")
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+class _Echo:
+    # csv.writer пишет сюда, а writerow возвращает готовую строку
+    def write(self, value):
+        return value
+
+
+def _grouped(lines):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= LINES_PER_CHUNK:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def ndjson_line(columns, row) -> str:
+    return json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False) + "\n"
+
+
+def csv_writer():
+    return csv.writer(_Echo(), lineterminator="\n")
+
+
+def csv_row(row) -> list:
+    return [_csv_value(v) for v in row]
+
+
+def ndjson_lines(columns, rows):
+    for row in rows:
+        yield ndjson_line(columns, row)
+
+
+def csv_lines(columns, rows):
+    writer = csv_writer()
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(csv_row(row))
+
+
+def _export_etag(request, table, fmt):
+    model = EXPORT_TABLES.get(table)
+    return response_tag((model,), request, fmt)[0] if model is not None else None
+
+
+def _export_last_modified(request, table, fmt):
+    model = EXPORT_TABLES.get(table)
+    if model is None:
+        return None
+    return datetime.datetime.fromtimestamp(table_version(model) // 10**9, datetime.timezone.utc)
+
+
+@require_GET
+@condition(etag_func=_export_etag, last_modified_func=_export_last_modified)
+def export_table(request, table, fmt):
+    """
+    Потоковая выгрузка таблицы целиком: /api/export/<таблица>.ndjson|csv.
+    Строки читаются серверным курсором (values_list().iterator()) и сразу
+    отдаются клиенту — память воркера не зависит от размера таблицы.
+    ?after=<id> — продолжить выгрузку после указанного id.
+    Поддерживает условный GET: пока импорт не менял таблицу — 304.
+    """
+    model = EXPORT_TABLES.get(table)
+    if model is None or fmt not in CONTENT_TYPES:
+        raise Http404("Неизвестная таблица или формат выгрузки")
+
+    columns = [f.attname for f in model._meta.concrete_fields]
+    qs = model.objects.using("meter").order_by("pk")
+    after = request.GET.get("after")
+    if after:
+        try:
+            qs = qs.filter(pk__gt=int(after))
+        except ValueError:
+            return HttpResponseBadRequest("after должен быть целым числом")
+    rows = qs.values_list(*columns).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    lines = ndjson_lines(columns, rows) if fmt == "ndjson" else csv_lines(columns, rows)
+    response = StreamingHttpResponse(_grouped(lines), content_type=CONTENT_TYPES[fmt])
+    filename = model._meta.db_table.split(".")[-1].strip('"')
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return response
@@ -0,0 +1,123 @@
+import decimal
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+
+def _decimal(field):
+    exp = decimal.Decimal(1).scaleb(-field.decimal_places)
+
+    def convert(value):
+        # как DecimalField из DRF: округление до decimal_places и строка
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return "{:f}".format(value.quantize(exp, rounding=decimal.ROUND_HALF_UP))
+    return convert
+
+
+def _datetime(tz):
+    def convert(value):
+        # как DateTimeField из DRF: текущий часовой пояс, ISO 8601, UTC → «Z»
+        if tz is not None:
+            value = value.astimezone(tz) if timezone.is_aware(value) else timezone.make_aware(value, tz)
+        value = value.isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+    return convert
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def field_converter(field, tz):
+    """
+    Функция приведения значения из .values() к виду, который отдал бы
+    ModelSerializer; None — значение отдаётся как есть.
+    """
+    if isinstance(field, models.DecimalField):
+        return _decimal(field)
+    if isinstance(field, models.DateTimeField):
+        return _datetime(tz)
+    if isinstance(field, (models.DateField, models.TimeField)):
+        return _isoformat
+    return None
+
+
+def model_fields(model):
+    """
+    Имя в ответе → поле модели (для ForeignKey имя без _id, как у ModelSerializer).
+    """
+    return {f.name: f for f in model._meta.concrete_fields}
+
+
+def list_fields(model, requested):
+    """
+    Имена колонок ответа из параметра ?fields=a,b,c (пусто — все поля модели).
+    """
+    available = model_fields(model)
+    if not requested:
+        return list(available)
+    names = [name.strip() for name in requested.split(",") if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValidationError({"fields": [f"Неизвестные поля: {', '.join(unknown)}"]})
+    return names
+
+
+def build_columns(model, names):
+    """
+    [(имя в ответе, колонка .values(), конвертер)] для колонок names.
+    """
+    fields = model_fields(model)
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+    return [(name, fields[name].attname, field_converter(fields[name], tz)) for name in names]
+
+
+def convert_rows(columns, rows):
+    data = []
+    append = data.append
+    for row in rows:
+        item = {}
+        for name, attname, convert in columns:
+            value = row[attname]
+            item[name] = value if convert is None or value is None else convert(value)
+        append(item)
+    return data
+
+
+class FastListMixin:
+    """
+    Быстрый list() для read-only viewset'ов: строки берутся из .values()
+    и приводятся заранее подготовленными конвертерами по каждой колонке,
+    минуя ModelSerializer. ?fields=a,b,c — отдать только эти колонки.
+    """
+
+    def get_list_fields(self, model):
+        return list_fields(model, self.request.query_params.get("fields"))
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        model = queryset.model
+        fields = model_fields(model)
+        names = self.get_list_fields(model)
+        columns = build_columns(model, names)
+
+        # курсору нужны поля сортировки, даже если клиент их не просил
+        ordering = getattr(self.paginator, "ordering", None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        extra = [o.lstrip("-") for o in ordering if o.lstrip("-") not in names]
+        values = [attname for _, attname, _ in columns] + [fields[name].attname for name in extra]
+
+        rows = queryset.values(*values)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            rows = page
+
+        data = convert_rows(columns, rows)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+# Суффиксы параметров-границ диапазона: ?rdate_from=...&rdate_to=... (обе включительно)
+RANGE_LOOKUPS = {
+    "_from": "gte",
+    "_to":   "lte",
+}
+
+
+def _to_python(field, raw: str):
+    value = field.to_python(raw.strip())
+    if isinstance(field, models.DateTimeField) and settings.USE_TZ \
+            and value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+class QueryParamFilter(BaseFilterBackend):
+    """
+    Серверная фильтрация по естественным ключам таблицы.
+    Viewset перечисляет поля в filter_fields:
+      * ?<поле>=v — точное совпадение, ?<поле>=v1,v2 — любое из значений;
+    и в filter_range_fields:
+      * ?<поле>_from=v / ?<поле>_to=v — границы диапазона.
+    Значения приводятся полем модели; некорректное значение — ответ 400.
+    """
+
+    def get_lookups(self, view, model, params):
+        lookups, errors = {}, {}
+        for name in getattr(view, "filter_fields", ()):
+            raw = params.get(name)
+            if not raw:
+                continue
+            field = model._meta.get_field(name)
+            try:
+                values = [_to_python(field, v) for v in raw.split(",") if v.strip()]
+            except DjangoValidationError as e:
+                errors[name] = e.messages
+                continue
+            if len(values) == 1:
+                lookups[field.attname] = values[0]
+            elif values:
+                lookups[f"{field.attname}__in"] = values
+
+        for name in getattr(view, "filter_range_fields", ()):
+            field = model._meta.get_field(name)
+            for suffix, lookup in RANGE_LOOKUPS.items():
+                raw = params.get(name + suffix, "").strip()
+                if not raw:
+                    # пустая граница — фильтр не задан
+                    continue
+                try:
+                    lookups[f"{field.attname}__{lookup}"] = _to_python(field, raw)
+                except DjangoValidationError as e:
+                    errors[name + suffix] = e.messages
+
+        if errors:
+            raise ValidationError(errors)
+        return lookups
+
+    def filter_queryset(self, request, queryset, view):
+        lookups = self.get_lookups(view, queryset.model, request.query_params)
+        return queryset.filter(**lookups) if lookups else queryset
@@ -0,0 +1,108 @@
+from django.db import models
+from django.db.models import F, Func, Value
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация по id: следующая страница — WHERE id > последнего,
+    без OFFSET, поэтому глубина листания не влияет на скорость запроса.
+    """
+    ordering = "id"
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
+class _Row(Func):
+    # значение-строка (a, b): сравнение (dt, id) > (%s, %s) идёт по индексу (dt, id)
+    template = "(%(expressions)s)"
+    output_field = models.Field()
+
+
+class TimeCursorPagination(IdCursorPagination):
+    """
+    Keyset-пагинация временного ряда по паре (time_field, id): курсор хранит
+    время и id последней строки, следующая страница — WHERE (time, id) > (...).
+    Курсор DRF держит позицию только по первому полю сортировки и строки
+    с одинаковым временем (все счётчики отчитываются в один час) листал бы
+    через OFFSET. Нужен индекс (time_field, id).
+    """
+    time_field = None
+
+    @property
+    def ordering(self):
+        return (self.time_field, "id")
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        if self.cursor and self.cursor.position:
+            when, pk = self._parse_position(self.cursor.position)
+            bound = _Row(Value(when, output_field=models.DateTimeField()), Value(pk))
+            queryset = queryset.alias(
+                _position=_Row(F(self.time_field), F("id")),
+            ).filter(**{"_position__lt" if reverse else "_position__gt": bound})
+
+        order = [f"-{name}" for name in self.ordering] if reverse else list(self.ordering)
+        rows = list(queryset.order_by(*order)[:self.page_size + 1])
+        more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+        # назад листали со страницы, которая дальше; вперёд — с той, что раньше
+        started = self.cursor is not None
+        self.has_next, self.has_previous = (started, more) if reverse else (more, started)
+        return self.page
+
+    def _parse_position(self, position: str) -> tuple:
+        when, _, pk = position.rpartition("|")
+        try:
+            when, pk = parse_datetime(when), int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if when is None:
+            raise NotFound(self.invalid_cursor_message)
+        return when, pk
+
+    def _position(self, row) -> str:
+        if isinstance(row, dict):
+            when, pk = row[self.time_field], row["id"]
+        else:
+            when, pk = getattr(row, self.time_field), row.pk
+        return f"{when.isoformat()}|{pk}"
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self._position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self._position(self.page[0])))
+
+
+class IotDataCursorPagination(TimeCursorPagination):
+    # временной ряд IoT листается по времени показания (индекс iot_meter_data_dt_id_idx)
+    time_field = "dt"
+
+
+class EnergoDataCursorPagination(TimeCursorPagination):
+    time_field = "datetime"
+
+
+class ImportRunCursorPagination(IdCursorPagination):
+    # новые прогоны — первыми
+    ordering = "-id"
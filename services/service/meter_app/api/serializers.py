@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from meter_app.models import ErcData, ReadingsSU, EnergoDevice , EnergoDeviceData , IotMeter , IotMeterData
+from meter_app.models import ErcData, ReadingsSU, EnergoDevice , EnergoDeviceData , IotMeter , IotMeterData, ImportRun
 
 class ErcDataSerializer(serializers.ModelSerializer):
     class Meta:
@@ -29,4 +29,9 @@ class IotMeterSerializer(serializers.ModelSerializer):
 class IotMeterDataSerializer(serializers.ModelSerializer):
     class Meta:
         model = IotMeterData
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+
+class ImportRunSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportRun
+        fields = "__all__"
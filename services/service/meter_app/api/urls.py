@@ -1,5 +1,10 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import ErcDataViewSet, ReadingsSuViewSet ,EnergoDeviceViewSet ,EnergoDeviceDataViewSet ,IotMeterViewSet ,IotMeterDataViewSet
+
+from .aggregates import AggregateView
+from .async_views import table_detail, table_export, table_list
+from .export import export_table
+from .views import ErcDataViewSet, ReadingsSuViewSet ,EnergoDeviceViewSet ,EnergoDeviceDataViewSet ,IotMeterViewSet ,IotMeterDataViewSet, ImportRunViewSet
 
 router = DefaultRouter()
 router.register(r'erc-data',       ErcDataViewSet,            basename='erc-data')
@@ -8,5 +13,14 @@ router.register(r'energo-devices', EnergoDeviceViewSet,       basename='energo-d
 router.register(r'energo-data',    EnergoDeviceDataViewSet,   basename='energo-data')
 router.register(r'iot-meters',     IotMeterViewSet,           basename='iot-meters')
 router.register(r'iot-data',       IotMeterDataViewSet,       basename='iot-data')
+router.register(r'import-runs',    ImportRunViewSet,          basename='import-runs')
+
+urlpatterns = router.urls + [
+    path('export/<slug:table>.<str:fmt>', export_table, name='export'),
+    path('aggregates/<slug:source>/', AggregateView.as_view(), name='aggregates'),
 
-urlpatterns = router.urls
\ No newline at end of file
+    # асинхронный вариант чтения; без удержания потока на запрос — только под ASGI (service/asgi.py)
+    path('async/export/<slug:table>.<str:fmt>', table_export, name='async-export'),
+    path('async/<slug:table>/',                table_list,   name='async-list'),
+    path('async/<slug:table>/<int:pk>/',       table_detail, name='async-detail'),
+]
\ No newline at end of file
@@ -1,28 +1,57 @@
 from rest_framework import viewsets
-from meter_app.models import ErcData, ReadingsSU , EnergoDevice ,EnergoDeviceData ,IotMeter ,IotMeterData
-from meter_app.api.serializers import ErcDataSerializer, ReadingsSuSerializer ,EnergoDeviceSerializer ,EnergoDeviceDataSerializer ,IotMeterSerializer ,IotMeterDataSerializer
+from meter_app.models import ErcData, ReadingsSU , EnergoDevice ,EnergoDeviceData ,IotMeter ,IotMeterData, ImportRun
+from meter_app.api.cache import CachedResponseMixin
+from meter_app.api.fast import FastListMixin
+from meter_app.api.pagination import (
+    EnergoDataCursorPagination, ImportRunCursorPagination, IotDataCursorPagination,
+)
+from meter_app.api.serializers import ErcDataSerializer, ReadingsSuSerializer ,EnergoDeviceSerializer ,EnergoDeviceDataSerializer ,IotMeterSerializer ,IotMeterDataSerializer, ImportRunSerializer
 
-class ErcDataViewSet(viewsets.ReadOnlyModelViewSet):
+class ErcDataViewSet(CachedResponseMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = ErcData.objects.using('meter').all()
     serializer_class = ErcDataSerializer
+    filter_fields = ("entity", "meter_id", "abonent")
+    filter_range_fields = ("readings_date",)
 
-class ReadingsSuViewSet(viewsets.ReadOnlyModelViewSet):
+class ReadingsSuViewSet(CachedResponseMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = ReadingsSU.objects.using('meter').all()
     serializer_class = ReadingsSuSerializer
+    filter_fields = ("account_id", "meter_id", "abonent_id")
+    filter_range_fields = ("rdate",)
     
     
-class EnergoDeviceViewSet(viewsets.ReadOnlyModelViewSet):
+class EnergoDeviceViewSet(CachedResponseMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = EnergoDevice.objects.using("meter").all()
     serializer_class = EnergoDeviceSerializer
+    filter_fields = ("device_id", "account", "folder_id")
 
-class EnergoDeviceDataViewSet(viewsets.ReadOnlyModelViewSet):
+class EnergoDeviceDataViewSet(CachedResponseMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = EnergoDeviceData.objects.using("meter").all()
     serializer_class = EnergoDeviceDataSerializer
+    filter_fields = ("device_id",)
+    filter_range_fields = ("datetime",)
+    pagination_class = EnergoDataCursorPagination
 
-class IotMeterViewSet(viewsets.ReadOnlyModelViewSet):
+class IotMeterViewSet(CachedResponseMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = IotMeter.objects.using("meter").all()
     serializer_class = IotMeterSerializer
+    filter_fields = ("modem_id", "account_id")
 
-class IotMeterDataViewSet(viewsets.ReadOnlyModelViewSet):
+class IotMeterDataViewSet(CachedResponseMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = IotMeterData.objects.using("meter").all()
-    serializer_class = IotMeterDataSerializer
\ No newline at end of file
+    serializer_class = IotMeterDataSerializer
+    filter_fields = ("meter_id",)
+    filter_range_fields = ("dt",)
+    pagination_class = IotDataCursorPagination
+
+
+class ImportRunViewSet(CachedResponseMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Прогоны импорта: время по этапам и счётчики строк, новые — первыми.
+    Фильтры: ?provider=, ?kind=, ?status=, ?started_at_from= / ?started_at_to=.
+    """
+    queryset = ImportRun.objects.using("meter").all()
+    serializer_class = ImportRunSerializer
+    pagination_class = ImportRunCursorPagination
+    filter_fields = ("provider", "kind", "status")
+    filter_range_fields = ("started_at",)
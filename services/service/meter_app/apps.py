@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
 
 
 class MeterAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'meter_app'
+
+    def ready(self):
+        from .api.cache import touch_app_tables, touch_on_m2m, touch_on_write
+
+        # версии таблиц для ETag и кэша ответов API (meter_app.api.cache)
+        for model in self.get_models():
+            post_save.connect(touch_on_write, sender=model, dispatch_uid=f"meter_api_save:{model.__name__}")
+            post_delete.connect(touch_on_write, sender=model, dispatch_uid=f"meter_api_delete:{model.__name__}")
+            for field in model._meta.local_many_to_many:
+                through = field.remote_field.through
+                m2m_changed.connect(touch_on_m2m, sender=through, dispatch_uid=f"meter_api_m2m:{through.__name__}")
+        post_migrate.connect(touch_app_tables, sender=self, dispatch_uid="meter_api_migrate")
@@ -0,0 +1,199 @@
+import json
+import threading
+import time
+
+from django.conf import settings
+
+from meter_app.models import Meter, MeterUser
+
+# Канал Redis, по которому процессы узнают об изменении списков ЛС
+ACCOUNTS_CHANNEL = "meter:accounts"
+
+# Не дольше этого (секунды) индекс живёт без перечитывания — на случай
+# пропущенных сообщений или недоступного Redis
+DEFAULT_MAX_AGE = 10 * 60
+
+# Пауза перед переподключением подписчика к Redis (секунды)
+RECONNECT_DELAY = 5
+
+
+class AccountIndex:
+    """
+    Множество номеров ЛС (значения field модели model) в памяти процесса.
+    Проверка ЛС в ботах — поиск в множестве, без запроса к PostgreSQL;
+    и опечатки, и спам до базы не доходят. Множество читается при первом
+    обращении и после сообщения в ACCOUNTS_CHANNEL.
+    """
+
+    def __init__(self, model, field: str, using: str = "meter"):
+        self.model = model
+        self.field = field
+        self.using = using
+        self._values = None
+        self._loaded_at = 0.0
+        # растёт с каждым invalidate/add: чтение, начатое до них, не сохраняется
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+
+    def max_age(self) -> float:
+        return getattr(settings, "ACCOUNT_INDEX_MAX_AGE", DEFAULT_MAX_AGE)
+
+    def _fresh(self):
+        values = self._values
+        if values is None or time.monotonic() - self._loaded_at > self.max_age():
+            return None
+        return values
+
+    def load(self) -> set:
+        with self._lock:
+            # пока ждали блокировку, индекс мог перечитать другой поток
+            values = self._fresh()
+            if values is not None:
+                return values
+            generation = self._generation
+            values = set(
+                self.model.objects.using(self.using)
+                .values_list(self.field, flat=True)
+                .iterator(chunk_size=10_000)
+            )
+            with self._state_lock:
+                # сообщение пришло во время чтения — снимок мог его не увидеть
+                if self._generation == generation:
+                    self._values, self._loaded_at = values, time.monotonic()
+        return values
+
+    def invalidate(self):
+        with self._state_lock:
+            self._generation += 1
+            self._values = None
+
+    def add(self, value: str):
+        # не загруженный индекс прочитает значение из БД сам
+        with self._state_lock:
+            self._generation += 1
+            if self._values is not None:
+                self._values.add(value)
+
+    def __contains__(self, value) -> bool:
+        ensure_listener()
+        values = self._fresh()
+        if values is None:
+            values = self.load()
+        return value in values
+
+    def __len__(self) -> int:
+        return len(self._values or ())
+
+
+ACCOUNT_INDEXES = {
+    # ЛС, по которым принимаются заявки и показания (meters.punumber)
+    "meters": AccountIndex(Meter, "punumber"),
+    # ЛС абонентов, уже писавших в ботов (users.number)
+    "users":  AccountIndex(MeterUser, "number"),
+}
+
+
+def account_exists(ls: str) -> bool:
+    return ls in ACCOUNT_INDEXES["meters"]
+
+
+def user_exists(number: str) -> bool:
+    return number in ACCOUNT_INDEXES["users"]
+
+
+def _redis():
+    """
+    Соединение с Redis кэша по умолчанию (django-redis) или None,
+    если кэш — не Redis: тогда индекс обновляется только по max_age.
+    """
+    from django_redis import get_redis_connection
+
+    try:
+        return get_redis_connection("default")
+    except NotImplementedError:
+        return None
+
+
+def _apply(message: dict):
+    names = message.get("indexes") or list(ACCOUNT_INDEXES)
+    for name in names:
+        index = ACCOUNT_INDEXES.get(name)
+        if index is None:
+            continue
+        if "add" in message:
+            for value in message["add"]:
+                index.add(value)
+        else:
+            index.invalidate()
+
+
+def _publish(message: dict):
+    # текущий процесс применяет сообщение сразу, не дожидаясь Redis
+    _apply(message)
+    from redis.exceptions import RedisError
+
+    connection = _redis()
+    if connection is None:
+        return
+    try:
+        connection.publish(ACCOUNTS_CHANNEL, json.dumps(message))
+    except RedisError:
+        # остальные процессы перечитают индекс по max_age
+        pass
+
+
+def publish_refresh(*names):
+    """
+    Все процессы перечитают индексы names (по умолчанию все) при следующей проверке.
+    """
+    _publish({"indexes": list(names)} if names else {})
+
+
+def publish_added(name: str, *values):
+    """
+    Новые ЛС попадают в индекс name всех процессов без перечитывания.
+    """
+    _publish({"indexes": [name], "add": list(values)})
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def _listen():
+    from redis.exceptions import RedisError
+
+    reconnect = False
+    while True:
+        try:
+            pubsub = _redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(ACCOUNTS_CHANNEL)
+            if reconnect:
+                # пока подписки не было, сообщения могли пропасть
+                _apply({})
+            reconnect = True
+            for item in pubsub.listen():
+                try:
+                    _apply(json.loads(item["data"]))
+                except (TypeError, ValueError):
+                    continue
+        except RedisError:
+            time.sleep(RECONNECT_DELAY)
+
+
+def ensure_listener():
+    """
+    Запускает (один раз на процесс) фоновый поток-подписчик ACCOUNTS_CHANNEL.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    with _listener_lock:
+        if _listener is not None:
+            return
+        if _redis() is None:
+            _listener = False
+            return
+        _listener = threading.Thread(target=_listen, name="account-index-listener", daemon=True)
+        _listener.start()
@@ -1,4 +1,7 @@
+import asyncio
 from abc import ABC, abstractmethod
+from io import StringIO
+from typing import Iterator
 
 class BaseProvider(ABC):
     """
@@ -30,3 +33,12 @@ class BaseProvider(ABC):
         Асинхронно забирает и возвращает содержимое файла Readings_SU.csv (текст с точкой‑запятой).
         """
         ...
+
+    def stream_meters_info(self) -> Iterator[str]:
+        """
+        Построчно отдаёт MetersInfo.txt для потокового импорта.
+        По умолчанию забирает файл целиком через fetch_meters_info;
+        провайдеры, которые умеют читать источник по частям, переопределяют метод.
+        """
+        raw = asyncio.run(self.fetch_meters_info())
+        return iter(StringIO(raw))
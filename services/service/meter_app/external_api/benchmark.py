@@ -0,0 +1,135 @@
+import os
+import resource
+import time
+from io import StringIO
+
+from django.db import NotSupportedError, connections, transaction
+from django.db.backends.signals import connection_created
+
+from meter_app.models import (
+    ErcData, ReadingsSU, Incorrect, EnergoDevice, EnergoDeviceData, IotMeter, IotMeterData,
+)
+from .loaders import get_loader
+from .parser import (
+    iter_meters_info_rows, split_readings_su,
+    iter_energo_devices_rows, iter_energo_device_data_rows,
+    iter_iot_meters_rows, iter_iot_meter_data_rows,
+    parse_meters_info, parse_readings_su,
+    parse_energo_devices, parse_energo_device_data,
+    parse_iot_meters, parse_iot_meter_data,
+)
+from .synthetic import DATASETS, write_dataset
+
+# Набор данных → (разбор строк без записи, разбор с записью через загрузчик)
+STAGES = {
+    "meters_info":        (iter_meters_info_rows,        parse_meters_info),
+    "readings_su":        (split_readings_su,            parse_readings_su),
+    "energo_devices":     (iter_energo_devices_rows,     parse_energo_devices),
+    "energo_device_data": (iter_energo_device_data_rows, parse_energo_device_data),
+    "iot_meters":         (iter_iot_meters_rows,         parse_iot_meters),
+    "iot_meter_data":     (iter_iot_meter_data_rows,     parse_iot_meter_data),
+}
+
+# Таблицы, которые пишет импорт: их создаём в SQLite-базе бенчмарка
+BENCHMARK_MODELS = (ErcData, ReadingsSU, Incorrect, EnergoDevice, EnergoDeviceData, IotMeter, IotMeterData)
+
+SQLITE_ALIAS = "benchmark"
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss в Linux — в килобайтах; это пик всего процесса с момента запуска
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _attach_public(sender, connection, **kwargs):
+    if connection.alias != SQLITE_ALIAS:
+        return
+    # таблицы моделей называются "public"."..." — в SQLite это схема
+    # подключённой базы; RETURNING со схемой SQLite не понимает
+    connection.features.can_return_columns_from_insert = False
+    name = connection.settings_dict["NAME"]
+    public = ":memory:" if name == ":memory:" else f"{name}.public"
+    with connection.cursor() as cursor:
+        cursor.execute("ATTACH DATABASE %s AS public", [public])
+
+
+def sqlite_database(path: str = ":memory:", models=BENCHMARK_MODELS) -> str:
+    """
+    Регистрирует SQLite-базу для быстрых прогонов без PostgreSQL и создаёт
+    в ней таблицы models (по умолчанию — таблицы импорта). Возвращает её псевдоним для using.
+    """
+    connections.settings[SQLITE_ALIAS] = connections.configure_settings({
+        "default": {},
+        SQLITE_ALIAS: {"ENGINE": "django.db.backends.sqlite3", "NAME": path},
+    })[SQLITE_ALIAS]
+    connection_created.connect(_attach_public, dispatch_uid="benchmark-attach-public")
+    with connections[SQLITE_ALIAS].schema_editor() as editor:
+        for model in models:
+            editor.create_model(model)
+    return SQLITE_ALIAS
+
+
+def close_sqlite_database():
+    connections[SQLITE_ALIAS].close()
+    del connections[SQLITE_ALIAS]
+    del connections.settings[SQLITE_ALIAS]
+    connection_created.disconnect(dispatch_uid="benchmark-attach-public")
+
+
+def _count(result) -> int:
+    if isinstance(result, tuple):
+        # split_readings_su → (good, bad)
+        return sum(len(part) for part in result)
+    return sum(1 for _ in result)
+
+
+def _measure(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def _record(dataset, rows, stage, seconds, **extra):
+    return {
+        "dataset": dataset,
+        "rows": rows,
+        "stage": stage,
+        "seconds": round(seconds, 3),
+        "rows_per_s": round(rows / seconds) if seconds else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        **extra,
+    }
+
+
+def run_benchmark(datasets=tuple(DATASETS), scales=(10_000,), loaders=("orm",),
+                  using: str = "meter", parse_workers: int = 1):
+    """
+    Для каждого набора и масштаба генерирует синтетический файл и замеряет:
+      parse         — разбор в кортежи без записи в БД;
+      load:<loader> — разбор и запись parse-функцией через загрузчик.
+    Запись идёт в транзакции, которая откатывается: БД после прогона не меняется.
+    Отдаёт словари dataset/rows/stage/seconds/rows_per_s/peak_rss_mb.
+    """
+    for dataset in datasets:
+        row_fn, parse = STAGES[dataset]
+        for rows in scales:
+            path = write_dataset(dataset, rows)
+            try:
+                with open(path, encoding="utf-8", newline="") as f:
+                    raw = f.read()
+
+                seconds, result = _measure(lambda: _count(row_fn(StringIO(raw))))
+                yield _record(dataset, rows, "parse", seconds)
+
+                for name in loaders:
+                    loader = get_loader(name, using=using)
+                    try:
+                        with transaction.atomic(using=using):
+                            seconds, _ = _measure(lambda: parse(raw, loader=loader, workers=parse_workers))
+                            transaction.set_rollback(True, using=using)
+                    except NotSupportedError as e:
+                        yield {"dataset": dataset, "rows": rows, "stage": f"load:{name}", "skipped": str(e)}
+                        continue
+                    yield _record(dataset, rows, f"load:{name}", seconds)
+            finally:
+                os.remove(path)
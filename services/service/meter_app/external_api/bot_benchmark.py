@@ -0,0 +1,230 @@
+import random
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import connections, transaction
+
+from meter_app.models import Area, Meter, MeterUser, Reading, Seal, UserArea
+
+# Таблицы, которые читают боты: их создаём в SQLite-базе бенчмарка
+BOT_MODELS = (MeterUser, Meter, Reading, Seal, Area, UserArea)
+
+# Индексы миграции 0010 — их бенчмарк снимает, чтобы замерить «до»
+BOT_INDEXES = (
+    (MeterUser, "users_number_idx"),
+    (Meter,     "meters_punumber_idx"),
+    (Reading,   "readings_user_pu_date_idx"),
+    (Reading,   "readings_user_pu_month_idx"),
+    (Seal,      "seals_user_date_idx"),
+    (Seal,      "seals_new_slot_idx"),
+    (UserArea,  "user_areas_area_user_idx"),
+)
+
+SLOTS = ("09-11", "11-13", "14-16", "16-18")
+
+# Метка синтетических абонентов: по ней находим их id после bulk_create
+SYNTHETIC_USERNAME = "benchmark"
+
+
+def _last_reading(using, s):
+    # bot_utils.get_last_record
+    return Reading.objects.using(using).filter(
+        user_id=s["user_id"], punumber=s["number"]
+    ).order_by("-createdate").first()
+
+
+def _reading_month(using, s):
+    # bot_utils.save_or_update_reading
+    return Reading.objects.using(using).filter(
+        user_id=s["user_id"], punumber=s["number"], yearmonth=s["yearmonth"]
+    ).first()
+
+
+def _seal_exists(using, s):
+    # telegram_client_bot: у абонента уже есть заявка на дату
+    return Seal.objects.using(using).filter(user_id=s["user_id"], scheduledate=s["date"]).exists()
+
+
+def _slot_taken(using, s):
+    # telegram_client_bot / telegram_controller_bot: слот занят новой заявкой
+    return Seal.objects.using(using).filter(scheduledate=s["date"], type=s["slot"], status="new").exists()
+
+
+def _meter_exists(using, s):
+    return Meter.objects.using(using).filter(punumber=s["number"]).exists()
+
+
+def _user_by_number(using, s):
+    return MeterUser.objects.using(using).filter(number=s["number"]).first()
+
+
+def _area_users(using, s):
+    return list(UserArea.objects.using(using).filter(area_id=s["area_id"]).values_list("user_id", flat=True))
+
+
+LOOKUPS = {
+    "last_reading":   _last_reading,
+    "reading_month":  _reading_month,
+    "seal_exists":    _seal_exists,
+    "slot_taken":     _slot_taken,
+    "meter_exists":   _meter_exists,
+    "user_by_number": _user_by_number,
+    "area_users":     _area_users,
+}
+
+
+def _yearmonth(day: date) -> str:
+    return f"{day.year}{day.month:02d}"
+
+
+def seed_bot_tables(users: int, using: str, months: int = 12, seals: int = 3, areas: int = 50, rng=None) -> list:
+    """
+    Заполняет таблицы ботов синтетическими абонентами: у каждого счётчик,
+    months показаний, seals заявок (новых — около 10%) и район.
+    Возвращает выборки для поиска: по одной на абонента.
+    """
+    rng = rng or random.Random(0)
+    now = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+    today = now.date()
+    batch = 5_000
+
+    Area.objects.using(using).bulk_create(
+        [Area(code=f"BENCH-{i}", name=f"Район {i}") for i in range(areas)], batch_size=batch,
+    )
+    area_ids = list(Area.objects.using(using).filter(code__startswith="BENCH-").values_list("id", flat=True))
+
+    MeterUser.objects.using(using).bulk_create([
+        MeterUser(
+            isactual=True, joined=now, last_logged_in=now, number=f"{10_000_000 + i}", type="client",
+            intent="", intententity="", intentmeter="", intentmetercode="", intentseal="",
+            name=f"Абонент {i}", isadmin=False, username=SYNTHETIC_USERNAME, phone="", lang="ru",
+            return_menu="",
+        )
+        for i in range(users)
+    ], batch_size=batch)
+    members = list(
+        MeterUser.objects.using(using).filter(username=SYNTHETIC_USERNAME).values_list("id", "number")
+    )
+
+    Meter.objects.using(using).bulk_create([
+        Meter(
+            entity="ХВС", punumber=number, readings=0, yearmonth=_yearmonth(today), code="",
+            address="", location="", verification_date="", seal_number="", bitness=5,
+            initial_readings=0, installation_date=today, final_readings=0, deinstallation_date=today,
+            outter_id="", erc_meter_id=0, bit_depth=5, last_send_date="", meter_serial="", meter_model="",
+        )
+        for _, number in members
+    ], batch_size=batch)
+
+    def readings():
+        for user_id, number in members:
+            for month in range(months):
+                created = now - timedelta(days=30 * month + rng.randrange(30))
+                yield Reading(
+                    user_id=user_id, entity="ХВС", punumber=number, readings=Decimal(1000 - month),
+                    createdate=created, code="", disabled=False, meterid=0, disconnected=False,
+                    corrected=False, isactual=True, sourcecode="bot", yearmonth=_yearmonth(created),
+                    restricted=False, consumption=0, operator_id=0, erc_meter_id=0, reading2=Decimal(0),
+                )
+
+    def seal_rows():
+        for user_id, _ in members:
+            for _ in range(seals):
+                yield Seal(
+                    user_id=user_id, txt="", createdate=now, type=rng.choice(SLOTS), entity="ХВС",
+                    phone="", status="new" if rng.random() < 0.1 else "done", ishot=False, iscold=True,
+                    iselect=False, operatorid=0, verificationcode="", verificationphone="", aktnumber="",
+                    scheduledate=today + timedelta(days=rng.randrange(-365, 60)),
+                )
+
+    for rows, model in ((readings(), Reading), (seal_rows(), Seal)):
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= batch:
+                model.objects.using(using).bulk_create(chunk)
+                chunk = []
+        model.objects.using(using).bulk_create(chunk)
+
+    UserArea.objects.using(using).bulk_create(
+        [UserArea(user_id=user_id, area_id=rng.choice(area_ids)) for user_id, _ in members],
+        batch_size=batch,
+    )
+
+    return [
+        {
+            "user_id":   user_id,
+            "number":    number,
+            "yearmonth": _yearmonth(now - timedelta(days=30 * rng.randrange(max(months, 1)))),
+            "date":      today + timedelta(days=rng.randrange(-365, 60)),
+            "slot":      rng.choice(SLOTS),
+            "area_id":   rng.choice(area_ids),
+        }
+        for user_id, number in members
+    ]
+
+
+def _analyze(using: str):
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            for model in BOT_MODELS:
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+        else:
+            cursor.execute("ANALYZE")
+
+
+def drop_indexes(using: str):
+    """
+    Снимает индексы BOT_INDEXES внутри текущей транзакции (DROP INDEX
+    транзакционен и откатывается вместе с ней).
+    """
+    connection = connections[using]
+    editor = connection.schema_editor()
+    with connection.cursor() as cursor:
+        for model, name in BOT_INDEXES:
+            index = next(index for index in model._meta.indexes if index.name == name)
+            cursor.execute(str(index.remove_sql(model, editor)))
+
+
+def time_lookups(samples: list, repeat: int, using: str, seed: int = 0) -> dict:
+    """
+    Среднее время каждого поиска (мс) на repeat случайных выборках.
+    """
+    result = {}
+    for name, lookup in LOOKUPS.items():
+        picked = random.Random(seed).choices(samples, k=repeat)
+        lookup(using, picked[0])  # прогрев: подготовка запроса и кэш страниц
+        started = time.perf_counter()
+        for sample in picked:
+            lookup(using, sample)
+        result[name] = (time.perf_counter() - started) * 1000 / repeat
+    return result
+
+
+def run_lookup_benchmark(users: int = 10_000, repeat: int = 200, using: str = "meter", seed: int = 0):
+    """
+    Время поисков ботов с индексами миграции 0010 и без них. Данные
+    и снятие индексов откатываются; на PostgreSQL DROP INDEX держит
+    эксклюзивную блокировку таблиц до конца прогона.
+    Возвращает записи {lookup, before_ms, after_ms, speedup}.
+    """
+    with transaction.atomic(using=using):
+        samples = seed_bot_tables(users, using, rng=random.Random(seed))
+        _analyze(using)
+        after = time_lookups(samples, repeat, using, seed)
+        drop_indexes(using)
+        _analyze(using)
+        before = time_lookups(samples, repeat, using, seed)
+        transaction.set_rollback(True, using=using)
+
+    return [
+        {
+            "lookup":    name,
+            "before_ms": round(before[name], 3),
+            "after_ms":  round(after[name], 3),
+            "speedup":   round(before[name] / after[name], 1) if after[name] else None,
+        }
+        for name in LOOKUPS
+    ]
@@ -1,8 +1,15 @@
 import os
+from meter_app.models import EnergoDevice, EnergoDeviceData
 from .base import BaseProvider
+from .parser import parse_energo_devices, parse_energo_device_data
+from .registry import ImportSpec, register
 
 FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "energo")
 
+@register(
+    ImportSpec("devices",     "fetch_meters_info", parse_energo_devices,     EnergoDevice),
+    ImportSpec("device_data", "fetch_readings_su", parse_energo_device_data, EnergoDeviceData),
+)
 class EnergoProvider(BaseProvider):
     @property
     def name(self) -> str:
@@ -1,8 +1,15 @@
 import os
+from meter_app.models import IotMeter, IotMeterData
 from .base import BaseProvider
+from .parser import parse_iot_meters, parse_iot_meter_data
+from .registry import ImportSpec, register
 
 FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "iot")
 
+@register(
+    ImportSpec("meters",     "fetch_meters_info", parse_iot_meters,     IotMeter),
+    ImportSpec("meter_data", "fetch_readings_su", parse_iot_meter_data, IotMeterData),
+)
 class IotProvider(BaseProvider):
     @property
     def name(self) -> str:
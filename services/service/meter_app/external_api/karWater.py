@@ -1,8 +1,16 @@
 import os
+from typing import Iterator
+from meter_app.models import ErcData, ReadingsSU
 from .base import BaseProvider
+from .parser import parse_meters_info, parse_readings_su
+from .registry import ImportSpec, register
 
 FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "karwater")
 
+@register(
+    ImportSpec("meters_info", "fetch_meters_info", parse_meters_info, ErcData,    "\t"),
+    ImportSpec("readings_su", "fetch_readings_su", parse_readings_su, ReadingsSU, ";"),
+)
 class KaragandaWater(BaseProvider):
     @property
     def name(self) -> str:
@@ -12,4 +20,8 @@ class KaragandaWater(BaseProvider):
         return open(os.path.join(FIXTURES, "MetersInfo.txt"), encoding="utf-8").read()
 
     async def fetch_readings_su(self) -> str:
-        return open(os.path.join(FIXTURES, "Readings_SU.csv"), encoding="utf-8").read()
\ No newline at end of file
+        return open(os.path.join(FIXTURES, "Readings_SU.csv"), encoding="utf-8").read()
+
+    def stream_meters_info(self) -> Iterator[str]:
+        with open(os.path.join(FIXTURES, "MetersInfo.txt"), encoding="utf-8", newline="") as f:
+            yield from f
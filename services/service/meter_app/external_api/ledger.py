@@ -0,0 +1,230 @@
+import csv
+import hashlib
+from datetime import date
+from functools import reduce
+from io import StringIO
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+
+from meter_app.api.cache import touch_tables
+from meter_app.models import (
+    ImportLedger, ImportLedgerRow, Incorrect,
+    ErcData, ReadingsSU, EnergoDevice, EnergoDeviceData, IotMeter, IotMeterData,
+)
+from meter_app.external_api.loaders import OrmLoader, batched
+
+# Естественный ключ строки файла: (поле модели, колонка файла)
+ROW_KEYS = {
+    ErcData:          (("entity", "ЛС"), ("meter_id", "Код ИПУ")),
+    ReadingsSU:       (("account_id", "AccountId"), ("meter_id", "MeterId"), ("rdate", "RDate")),
+    EnergoDevice:     (("device_id", "device_id"),),
+    EnergoDeviceData: (("device_id", "device_id"), ("datetime", "datetime"), ("rvalue_id", "rvalue_id")),
+    IotMeter:         (("modem_id", "modem_id"), ("port", "port")),
+    IotMeterData:     (("meter_id", "meter_id"), ("dt", "dt")),
+}
+
+# Разделитель частей составного ключа в ImportLedgerRow.row_key
+KEY_SEP = "\x1f"
+
+# Сколько ключей удаляется одним запросом
+DELETE_CHUNK = 500
+
+
+def fingerprint(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def row_fingerprint(row) -> str:
+    """
+    Отпечаток строки csv (списка значений): по нему журнал сравнивает строки,
+    а отказ в Incorrect находит свою строку файла.
+    """
+    return fingerprint("\x1e".join(row))
+
+
+def _key_value(field, raw: str):
+    """
+    Значение ключа из файла → значение поля модели.
+    Даты в Readings_SU приходят как YYYYMMDD — такой формат to_python не понимает.
+    """
+    raw = (raw or "").strip()
+    if isinstance(field, models.DateField) and not isinstance(field, models.DateTimeField) \
+            and len(raw) == 8 and raw.isdigit():
+        return date(int(raw[:4]), int(raw[4:6]), int(raw[6:]))
+    return field.to_python(raw)
+
+
+def _delete_keys(model, key_fields, keys, using):
+    """
+    Удаляет из таблицы model строки с указанными ключами (кортежи значений key_fields).
+    """
+    deleted = 0
+    manager = model.objects.using(using)
+    for chunk in batched(keys, DELETE_CHUNK):
+        if len(key_fields) == 1:
+            qs = manager.filter(**{f"{key_fields[0]}__in": [k[0] for k in chunk]})
+        else:
+            qs = manager.filter(reduce(or_, (models.Q(**dict(zip(key_fields, k))) for k in chunk)))
+        deleted += qs.delete()[0]
+    return deleted
+
+
+def _claim_rejections(provider, kind, row_keys, changed, using):
+    """
+    Отказы, которые парсер только что записал по строкам changed, получают
+    ключ журнала (provider, kind, row_key) — при следующем изменении или
+    удалении строки они удаляются вместе с ней.
+    """
+    changed = set(changed)
+    hashes = [h for h, k in row_keys.items() if k in changed]
+    claimed = []
+    untagged = Incorrect.objects.using(using).filter(provider="", row_key="")
+    for chunk in batched(hashes, DELETE_CHUNK):
+        for rejected in untagged.filter(row_hash__in=chunk).only("id", "row_hash"):
+            rejected.provider, rejected.kind = provider, kind
+            rejected.row_key = row_keys[rejected.row_hash]
+            claimed.append(rejected)
+    Incorrect.objects.using(using).bulk_update(
+        claimed, ["provider", "kind", "row_key"], batch_size=DELETE_CHUNK,
+    )
+
+
+def import_delta(provider: str, kind: str, raw: str, parse, model,
+                 delimiter: str = ",", loader=None, parse_workers: int = 1) -> dict:
+    """
+    Дельта-импорт одного файла провайдера.
+
+    Файл с тем же хэшем, что и в прошлый раз, пропускается сразу. Иначе
+    строки сравниваются с журналом по естественному ключу (ROW_KEYS):
+    в parse уходят только новые и изменившиеся строки, а прежние версии
+    изменившихся и исчезнувшие из файла строки удаляются из таблицы model
+    вместе с их отказами в Incorrect. Строки файла с одним ключом (например, несколько записей одного
+    device_id) сравниваются и перезаписываются вместе, как одна группа.
+    parse_workers передаётся парсеру как workers.
+    """
+    loader = loader or OrmLoader()
+    using = loader.using
+    metrics = loader.metrics
+    with metrics.stage("diff"):
+        payload_hash = fingerprint(raw)
+
+        ledger = ImportLedger.objects.using(using).filter(provider=provider, kind=kind).first()
+        if ledger and ledger.payload_hash == payload_hash:
+            metrics.rows_in = ledger.rows
+            return {"status": "skipped", "rows": ledger.rows}
+
+        key_spec = ROW_KEYS[model]
+        key_fields = [f for f, _ in key_spec]
+        fields = [model._meta.get_field(f) for f in key_fields]
+
+        reader = csv.reader(StringIO(raw), delimiter=delimiter)
+        header = next(reader, [])
+        key_idx = [header.index(col) for _, col in key_spec]
+
+        # ключ строки → (хэши строк, строки файла, типизированный ключ или None)
+        current = {}
+        for row in reader:
+            if not row:
+                continue
+            row_hash = row_fingerprint(row)
+            try:
+                typed = tuple(_key_value(f, row[i]) for f, i in zip(fields, key_idx))
+                row_key = KEY_SEP.join(str(v) for v in typed)
+            except (ValidationError, ValueError, IndexError):
+                # строку без валидного ключа нельзя сопоставить с таблицей —
+                # отслеживаем её только по хэшу, парсер отправит её в Incorrect
+                typed, row_key = None, "#" + row_hash
+            group = current.setdefault(row_key, ([], [], typed))
+            group[0].append(row_hash)
+            group[1].append(row)
+        rows_in = sum(len(rows) for _, rows, _ in current.values())
+        # хэш строки → ключ её группы: так отказы парсера привязываются к журналу
+        row_keys = {h: k for k, (hashes, _, _) in current.items() for h in hashes}
+        # хэш группы: у единственной строки — её хэш, как в журнале до группировки
+        current = {
+            k: (hashes[0] if len(hashes) == 1 else fingerprint("\x1d".join(hashes)), rows, typed)
+            for k, (hashes, rows, typed) in current.items()
+        }
+
+        previous = dict(
+            ImportLedgerRow.objects.using(using)
+            .filter(provider=provider, kind=kind)
+            .values_list("row_key", "row_hash")
+            .iterator(chunk_size=DELETE_CHUNK * 10)
+        )
+        changed = [k for k, (h, _, _) in current.items() if previous.get(k) != h]
+        removed = [k for k in previous if k not in current]
+
+        def typed_key(row_key):
+            if row_key in current:
+                return current[row_key][2]
+            return tuple(f.to_python(v) for f, v in zip(fields, row_key.split(KEY_SEP)))
+
+    metrics.rows_in = rows_in
+    with transaction.atomic(using=using):
+        # прежние версии изменившихся строк и строки, пропавшие из файла;
+        # новые ключи тоже чистим — таблица могла быть заполнена до появления журнала
+        stale = [typed_key(k) for k in changed + removed if not k.startswith("#")]
+        with metrics.stage("write"):
+            deleted = _delete_keys(model, key_fields, stale, using)
+            # отказы прежних версий — и строк без валидного ключа («#хэш»)
+            rejected = Incorrect.objects.using(using).filter(provider=provider, kind=kind)
+            dropped = 0
+            for chunk in batched(changed + removed, DELETE_CHUNK):
+                dropped += rejected.filter(row_key__in=chunk).delete()[0]
+        if deleted:
+            touch_tables(using, model)
+        if dropped:
+            touch_tables(using, Incorrect)
+
+        if changed:
+            buf = StringIO()
+            writer = csv.writer(buf, delimiter=delimiter, lineterminator="\n")
+            writer.writerow(header)
+            writer.writerows(row for k in changed for row in current[k][1])
+            parse(buf.getvalue(), loader=loader, workers=parse_workers)
+            with metrics.stage("write"):
+                _claim_rejections(provider, kind, row_keys, changed, using)
+
+        with metrics.stage("write"):
+            rows = ImportLedgerRow.objects.using(using)
+            for chunk in batched(removed, DELETE_CHUNK):
+                rows.filter(provider=provider, kind=kind, row_key__in=chunk).delete()
+            rows.bulk_create(
+                [
+                    ImportLedgerRow(provider=provider, kind=kind, row_key=k, row_hash=current[k][0])
+                    for k in changed
+                ],
+                batch_size=DELETE_CHUNK * 10,
+                update_conflicts=True,
+                unique_fields=["provider", "kind", "row_key"],
+                update_fields=["row_hash"],
+            )
+            ImportLedger.objects.using(using).update_or_create(
+                provider=provider, kind=kind,
+                defaults={"payload_hash": payload_hash, "rows": rows_in},
+            )
+
+    return {
+        "status":    "applied",
+        "rows":      rows_in,
+        "inserted":  sum(1 for k in changed if k not in previous),
+        "updated":   sum(1 for k in changed if k in previous),
+        "removed":   len(removed),
+        "unchanged": len(current) - len(changed),
+        "deleted":   deleted,
+    }
+
+
+def describe(result: dict) -> str:
+    """
+    Короткое описание результата import_delta для логов и вывода команд.
+    """
+    if result["status"] == "skipped":
+        return f"файл не изменился, пропущен ({result['rows']} строк)"
+    return (
+        f"новых {result['inserted']}, изменено {result['updated']}, "
+        f"удалено {result['removed']}, без изменений {result['unchanged']}"
+    )
@@ -0,0 +1,309 @@
+import datetime
+import json
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from io import StringIO
+from itertools import islice
+
+from django.db import connections, models, IntegrityError, NotSupportedError
+from django.utils import timezone
+
+from meter_app.api.cache import touch_tables
+from meter_app.external_api.metrics import ImportMetrics
+
+# Размер пакета по умолчанию для всех загрузчиков
+DEFAULT_BATCH_SIZE = 5000
+
+
+def batched(iterable, size: int):
+    """
+    Режет итерируемый объект на списки длиной не больше size.
+    """
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+class LoadStats:
+    """
+    Счётчики загрузки по одной таблице.
+    """
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        # строки, схлопнутые с более поздней строкой того же ключа в пакете
+        self.duplicates = 0
+
+    def __str__(self):
+        text = f"вставлено {self.inserted}, обновлено {self.updated}, без изменений {self.unchanged}"
+        if self.duplicates:
+            text += f", дублей ключа {self.duplicates}"
+        return text
+
+
+class BaseLoader(ABC):
+    """
+    Базовый интерфейс загрузчика: получает от парсера строки-кортежи
+    (значения в порядке fields) и записывает их в таблицу модели.
+    Транзакцией управляет вызывающий код.
+    """
+    name = ""
+
+    def __init__(self, using: str = "meter"):
+        self.using = using
+        # имя модели → LoadStats за всё время жизни загрузчика
+        self.stats = {}
+        # имя модели → естественные ключи строк, обновлённых на месте (id тот же);
+        # по ним свёртки пересчитывают изменившиеся счётчики
+        self.updated_keys = {}
+        self.metrics = ImportMetrics()
+
+    def _stats(self, model) -> LoadStats:
+        return self.stats.setdefault(model._meta.object_name, LoadStats())
+
+    def _batches(self, rows, batch_size: int):
+        """
+        batched(rows) с учётом в metrics: ожидание следующего пакета — это
+        разбор (парсер-генератор работает лениво), обработка пакета — запись.
+        """
+        it = batched(rows, batch_size)
+        while True:
+            with self.metrics.stage("parse"):
+                batch = next(it, None)
+            if batch is None:
+                return
+            self.metrics.batches += 1
+            with self.metrics.stage("write"):
+                yield batch
+
+    def _columns(self, model, fields):
+        """
+        Возвращает (поля модели в порядке колонок, функция дополнения строки):
+        поля модели, которых нет в fields, заполняются значениями по умолчанию
+        (auto_now/auto_now_add — текущим временем), как это сделал бы ORM.
+        """
+        given = [model._meta.get_field(f) for f in fields]
+        extra = [
+            f for f in model._meta.concrete_fields
+            if not f.primary_key and f.name not in fields
+        ]
+
+        def complete(row):
+            now = timezone.now()
+            return tuple(row) + tuple(
+                now if getattr(f, "auto_now", False) or getattr(f, "auto_now_add", False)
+                else f.get_default()
+                for f in extra
+            )
+        return given + extra, complete
+
+    @abstractmethod
+    def load(self, model, fields, rows, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Записывает rows в таблицу model и возвращает число записанных строк.
+        После коммита версия таблицы для кэша API поднимается (touch_tables).
+        """
+        ...
+
+
+@contextmanager
+def _key_conflicts(model):
+    """
+    Повторная вставка в таблицу с естественным ключом (NATURAL_KEYS) упирается
+    в уникальное ограничение — вместо голого IntegrityError подсказываем upsert.
+    """
+    try:
+        yield
+    except IntegrityError as e:
+        if model.__name__ not in NATURAL_KEYS:
+            raise
+        raise IntegrityError(
+            f"{model.__name__}: строки с таким ключом ({', '.join(NATURAL_KEYS[model.__name__])}) "
+            f"уже есть — повторный импорт в эту таблицу только загрузчиком upsert"
+        ) from e
+
+
+class OrmLoader(BaseLoader):
+    """
+    Загрузка через ORM: объекты модели создаются лениво, по пакету за раз,
+    и сохраняются bulk_create.
+    """
+    name = "orm"
+
+    def load(self, model, fields, rows, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        total = 0
+        manager = model.objects.using(self.using)
+        with _key_conflicts(model):
+            for batch in self._batches(rows, batch_size):
+                manager.bulk_create([model(**dict(zip(fields, row))) for row in batch])
+                total += len(batch)
+        self._stats(model).inserted += total
+        touch_tables(self.using, model)
+        return total
+
+
+def _copy_text(value) -> str:
+    """
+    Значение → поле текстового формата COPY (NULL = \\N, экранирование спецсимволов).
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (datetime.date, datetime.time)):
+        value = value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class CopyLoader(BaseLoader):
+    """
+    Загрузка через PostgreSQL COPY ... FROM STDIN (psycopg2 copy_expert):
+    строки пишутся в таблицу напрямую, без создания объектов модели.
+    """
+    name = "copy"
+
+    def load(self, model, fields, rows, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        connection = connections[self.using]
+        if connection.vendor != "postgresql":
+            raise NotSupportedError("COPY-загрузчик работает только с PostgreSQL")
+
+        columns, complete = self._columns(model, fields)
+        sql = "COPY {} ({}) FROM STDIN".format(
+            model._meta.db_table,
+            ", ".join(connection.ops.quote_name(f.column) for f in columns),
+        )
+        json_idx = [i for i, f in enumerate(columns) if isinstance(f, models.JSONField)]
+
+        total = 0
+        with _key_conflicts(model), connection.cursor() as cursor:
+            for batch in self._batches(rows, batch_size):
+                buf = StringIO()
+                for row in batch:
+                    values = list(complete(row))
+                    for i in json_idx:
+                        if values[i] is not None:
+                            values[i] = json.dumps(values[i], cls=columns[i].encoder)
+                    buf.write("\t".join(_copy_text(v) for v in values))
+                    buf.write("\n")
+                buf.seek(0)
+                # copy_expert идёт мимо обёртки курсора Django — ошибки переводим сами
+                with connection.wrap_database_errors:
+                    cursor.copy_expert(sql, buf)
+                total += len(batch)
+        self._stats(model).inserted += total
+        touch_tables(self.using, model)
+        return total
+
+
+# Естественные ключи таблиц, по которым работает upsert-импорт
+NATURAL_KEYS = {
+    "ErcData":    ("entity", "meter_id"),
+    "ReadingsSU": ("account_id", "meter_id", "rdate"),
+}
+
+
+class UpsertLoader(OrmLoader):
+    """
+    Идемпотентная загрузка INSERT ... ON CONFLICT по естественному ключу
+    (NATURAL_KEYS): новые строки вставляются, изменившиеся — обновляются,
+    совпадающие не трогаются. Повторный импорт того же файла ничего не пишет.
+    Таблицы без естественного ключа загружаются обычной вставкой (OrmLoader).
+    """
+    name = "upsert"
+
+    def load(self, model, fields, rows, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        keys = NATURAL_KEYS.get(model.__name__)
+        if keys is None:
+            return super().load(model, fields, rows, batch_size)
+
+        connection = connections[self.using]
+        if connection.vendor != "postgresql":
+            raise NotSupportedError("upsert-загрузчик работает только с PostgreSQL")
+        from psycopg2.extras import Json, execute_values
+
+        columns, complete = self._columns(model, fields)
+        qn = connection.ops.quote_name
+        cols = [qn(f.column) for f in columns]
+        key_idx = [fields.index(k) for k in keys]
+        # ключ сравнивается в типах поля: "02002" и "2002" в целочисленном
+        # поле или разные записи одной даты — один ключ в БД
+        key_fields = [model._meta.get_field(k) for k in keys]
+        update = [
+            qn(f.column) for f in columns
+            if f.name not in keys and not getattr(f, "auto_now_add", False)
+        ]
+        sql = (
+            "INSERT INTO {table} AS t ({cols}) VALUES %s "
+            "ON CONFLICT ({keys}) DO UPDATE SET {set} "
+            "WHERE ({old}) IS DISTINCT FROM ({new}) "
+            "RETURNING (xmax = 0), {keys}"
+        ).format(
+            table=model._meta.db_table,
+            cols=", ".join(cols),
+            keys=", ".join(qn(model._meta.get_field(k).column) for k in keys),
+            set=", ".join(f"{c} = EXCLUDED.{c}" for c in update),
+            old=", ".join(f"t.{c}" for c in update),
+            new=", ".join(f"EXCLUDED.{c}" for c in update),
+        )
+        json_idx = [i for i, f in enumerate(columns) if isinstance(f, models.JSONField)]
+
+        stats = self._stats(model)
+        updated_keys = self.updated_keys.setdefault(model.__name__, [])
+        total = 0
+        with connection.cursor() as cursor:
+            for batch in self._batches(rows, batch_size):
+                # ON CONFLICT не может дважды тронуть одну строку за запрос —
+                # дубли ключа внутри пакета схлопываем, побеждает последняя
+                unique = {
+                    tuple(f.to_python(row[i]) for f, i in zip(key_fields, key_idx)): row
+                    for row in batch
+                }
+                values = []
+                for row in unique.values():
+                    row = list(complete(row))
+                    for i in json_idx:
+                        if row[i] is not None:
+                            row[i] = Json(row[i])
+                    values.append(row)
+                result = execute_values(cursor.cursor, sql, values, page_size=batch_size, fetch=True)
+                inserted = 0
+                for is_new, *key in result:
+                    if is_new:
+                        inserted += 1
+                    else:
+                        updated_keys.append(dict(zip(keys, key)))
+                stats.inserted += inserted
+                stats.updated += len(result) - inserted
+                stats.duplicates += len(batch) - len(unique)
+                stats.unchanged += len(unique) - len(result)
+                total += len(batch)
+        touch_tables(self.using, model)
+        return total
+
+
+LOADERS = {
+    OrmLoader.name:    OrmLoader,
+    CopyLoader.name:   CopyLoader,
+    UpsertLoader.name: UpsertLoader,
+}
+
+
+def get_loader(name: str = UpsertLoader.name, using: str = "meter") -> BaseLoader:
+    """
+    Возвращает загрузчик по имени ("orm", "copy", "upsert"). По умолчанию —
+    upsert: повторный импорт в таблицы с естественным ключом orm и copy не пишут.
+    """
+    try:
+        return LOADERS[name](using=using)
+    except KeyError:
+        raise ValueError(f"Неизвестный загрузчик: {name}")
@@ -0,0 +1,82 @@
+import time
+from contextlib import contextmanager
+
+from django.utils import timezone
+
+from meter_app.api.cache import touch_tables
+from meter_app.models import ImportRun
+
+# Этапы импорта; время каждого пишется в ImportRun.<этап>_seconds
+STAGES = ("fetch", "decode", "diff", "parse", "validate", "write")
+
+# Таблица, куда парсеры отправляют отклонённые строки
+REJECTED_MODEL = "Incorrect"
+
+
+class ImportMetrics:
+    """
+    Время по этапам и счётчики одного импорта. Живёт на загрузчике
+    (loader.metrics), поэтому доступен всем стадиям без новых аргументов.
+    """
+    def __init__(self):
+        self.started_at = timezone.now()
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.bytes = 0
+        self.batches = 0
+        self.rows_in = None
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - started
+
+
+def decode(raw, metrics: ImportMetrics) -> str:
+    """
+    Содержимое файла → текст; заодно учитывает размер в байтах.
+    Провайдеры отдают str или bytes (UTF-8).
+    """
+    with metrics.stage("decode"):
+        if isinstance(raw, bytes):
+            metrics.bytes += len(raw)
+            return raw.decode("utf-8")
+        metrics.bytes += len(raw.encode("utf-8"))
+        return raw
+
+
+def record_run(provider: str, kind: str, loader, delta: bool = False,
+               status: str = ImportRun.STATUS_OK, error: str = "") -> ImportRun:
+    """
+    Сохраняет прогон импорта из loader.metrics и loader.stats.
+    rows_out — строки, записанные в целевые таблицы, rows_rejected — в Incorrect.
+    """
+    metrics = loader.metrics
+    written = {
+        name: stats.inserted + stats.updated + stats.unchanged
+        for name, stats in loader.stats.items()
+    }
+    rejected = written.pop(REJECTED_MODEL, 0)
+    rows_out = sum(written.values())
+    duplicates = sum(stats.duplicates for stats in loader.stats.values())
+    rows_in = metrics.rows_in if metrics.rows_in is not None else rows_out + rejected + duplicates
+    run = ImportRun.objects.using(loader.using).create(
+        provider=provider,
+        kind=kind,
+        loader=loader.name,
+        delta=delta,
+        status=status,
+        error=error,
+        started_at=metrics.started_at,
+        finished_at=timezone.now(),
+        bytes=metrics.bytes,
+        rows_in=rows_in,
+        rows_out=rows_out,
+        rows_rejected=rejected,
+        batches=metrics.batches,
+        **{f"{name}_seconds": round(value, 6) for name, value in metrics.seconds.items()},
+    )
+    touch_tables(loader.using, ImportRun)
+    return run
@@ -0,0 +1,181 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+
+from meter_app.models import ImportRun
+from .ledger import describe, import_delta
+from .loaders import DEFAULT_BATCH_SIZE, get_loader
+from .metrics import decode, record_run
+from .parser import parse_meters_info, parse_meters_info_stream
+from .registry import autodiscover, get_provider
+from .rollup import refresh_for_model
+
+# Размер пула для разбора и записи по умолчанию
+DEFAULT_WORKERS = 4
+
+
+def build_plan(names=None):
+    """
+    План импорта из реестра: [(класс провайдера, (ImportSpec, ...))].
+    names=None — все зарегистрированные провайдеры.
+    """
+    if names is None:
+        names = sorted(autodiscover())
+    return [get_provider(name) for name in names]
+
+
+async def _timed(coro):
+    started = time.perf_counter()
+    try:
+        raw = await coro
+    except Exception as e:
+        raw = e
+    return raw, time.perf_counter() - started
+
+
+async def fetch_all(plan):
+    """
+    Забирает файлы всех провайдеров плана одновременно.
+    Возвращает [(провайдер, ImportSpec, содержимое или исключение, секунды)].
+    """
+    jobs = []
+    for provider_cls, files in plan:
+        provider = provider_cls()
+        for spec in files:
+            jobs.append((provider, spec))
+    fetched = await asyncio.gather(
+        *(_timed(getattr(provider, spec.fetch)()) for provider, spec in jobs)
+    )
+    return [(provider, spec, raw, seconds) for (provider, spec), (raw, seconds) in zip(jobs, fetched)]
+
+
+def _result(run, detail):
+    return {
+        "ok": run.status != ImportRun.STATUS_ERROR,
+        "detail": detail,
+        "seconds": round((run.finished_at - run.started_at).total_seconds(), 3),
+        "run": run.pk,
+    }
+
+
+def _import_file(provider_name, spec, raw, loader_name, delta, parse_workers=1, fetch_seconds=0.0):
+    """
+    Разбор и запись одного файла; выполняется в потоке пула.
+    Каждый файл оставляет запись ImportRun — и при успехе, и при ошибке.
+    После записи обновляются свёртки показаний, построенные по этой таблице.
+    """
+    loader = get_loader(loader_name)
+    loader.metrics.seconds["fetch"] = fetch_seconds
+    status = ImportRun.STATUS_OK
+    try:
+        raw = decode(raw, loader.metrics)
+        if delta:
+            result = import_delta(
+                provider_name, spec.kind, raw, spec.parse, spec.model, spec.delimiter,
+                loader=loader, parse_workers=parse_workers,
+            )
+            if result["status"] == "skipped":
+                status = ImportRun.STATUS_SKIPPED
+            detail = describe(result)
+        else:
+            spec.parse(raw, loader=loader, workers=parse_workers)
+            detail = "; ".join(f"{table}: {stats}" for table, stats in loader.stats.items())
+        if status == ImportRun.STATUS_OK:
+            with loader.metrics.stage("write"):
+                rolled = refresh_for_model(
+                    spec.model, using=loader.using,
+                    updated=loader.updated_keys.get(spec.model.__name__, ()),
+                )
+            if rolled:
+                detail += f"; свёртка: {rolled} строк"
+    except Exception as e:
+        record_run(provider_name, spec.kind, loader, delta, ImportRun.STATUS_ERROR, str(e))
+        raise
+    return _result(record_run(provider_name, spec.kind, loader, delta, status), detail)
+
+
+def _run_in_worker(*args):
+    try:
+        return _import_file(*args)
+    finally:
+        # у каждого потока своё соединение с БД — не оставляем его висеть
+        connections.close_all()
+
+
+def run_import(names=None, loader: str = "upsert", delta: bool = False,
+               workers: int = DEFAULT_WORKERS, parse_workers: int = 1):
+    """
+    Импорт провайдеров из реестра (names=None — всех): файлы забираются параллельно (asyncio.gather),
+    разбор и запись идут в пуле из workers потоков. workers <= 1 — всё
+    выполняется в текущем потоке (удобно для тестов и отладки).
+    parse_workers > 1 — каждый файл ещё и разбирается в пуле процессов.
+
+    Возвращает список словарей provider/kind/ok/detail(/seconds/run).
+    Ошибка одного файла не останавливает импорт остальных.
+    """
+    fetched = asyncio.run(fetch_all(build_plan(names)))
+
+    results, pending = [], []
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for provider, spec, raw, seconds in fetched:
+            entry = {"provider": provider.name, "kind": spec.kind}
+            results.append(entry)
+            if isinstance(raw, BaseException):
+                failed = get_loader(loader)
+                failed.metrics.seconds["fetch"] = seconds
+                run = record_run(provider.name, spec.kind, failed, delta, ImportRun.STATUS_ERROR, str(raw))
+                entry.update(ok=False, detail=f"ошибка загрузки: {raw}", run=run.pk)
+                continue
+            args = (provider.name, spec, raw, loader, delta, parse_workers, seconds)
+            if pool:
+                pending.append((entry, pool.submit(_run_in_worker, *args)))
+            else:
+                pending.append((entry, args))
+
+        for entry, job in pending:
+            try:
+                entry.update(job.result() if pool else _import_file(*job))
+            except Exception as e:
+                entry.update(ok=False, detail=str(e))
+    finally:
+        if pool:
+            pool.shutdown(wait=True)
+    return results
+
+
+def run_stream_import(name: str, loader: str = "upsert", batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Импорт провайдера, в котором MetersInfo читается построчно
+    (provider.stream_meters_info) и пишется пакетами по batch_size —
+    для выгрузок ЕРЦ, которые не помещаются в память. Остальные файлы
+    провайдера импортируются как в run_import. Результат — в том же формате.
+    """
+    provider_cls, files = get_provider(name)
+    provider = provider_cls()
+    results = []
+    for spec in files:
+        entry = {"provider": name, "kind": spec.kind}
+        results.append(entry)
+        try:
+            if spec.parse is parse_meters_info:
+                stream_loader = get_loader(loader)
+                try:
+                    count = parse_meters_info_stream(
+                        provider.stream_meters_info(), batch_size=batch_size, loader=stream_loader
+                    )
+                except Exception as e:
+                    record_run(name, spec.kind, stream_loader, status=ImportRun.STATUS_ERROR, error=str(e))
+                    raise
+                run = record_run(name, spec.kind, stream_loader)
+                entry.update(_result(run, f"потоково, {count} строк, пакетов {run.batches}"))
+            else:
+                raw, seconds = asyncio.run(_timed(getattr(provider, spec.fetch)()))
+                if isinstance(raw, BaseException):
+                    raise raw
+                entry.update(_import_file(name, spec, raw, loader, False, fetch_seconds=seconds))
+        except Exception as e:
+            entry.update(ok=False, detail=str(e))
+    return results
@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+from itertools import repeat
+
+from django.conf import settings
+
+# Меньше этого размера чанка пул процессов только замедляет разбор
+MIN_CHUNK_SIZE = 1 << 20  # 1 МБ
+
+
+def _record_end(raw: str, start: int, pos: int) -> int:
+    """
+    Позиция после первого перевода строки не раньше pos, который стоит вне
+    кавычек, считая от начала записи start (там кавычки закрыты). Экранированная
+    кавычка "" не меняет чётность, поэтому достаточно считать кавычки.
+    Если такого перевода строки нет — len(raw).
+    """
+    quotes = 0
+    while True:
+        nxt = raw.find("\n", pos)
+        if nxt == -1:
+            return len(raw)
+        quotes += raw.count('"', start, nxt)
+        if quotes % 2 == 0:
+            return nxt + 1
+        start, pos = nxt, nxt + 1
+
+
+def split_chunks(raw: str, chunk_size: int):
+    """
+    Режет текст CSV на куски примерно по chunk_size символов по границам
+    записей: перевод строки внутри поля в кавычках границей не считается.
+    Заголовок (первая запись) повторяется в каждом куске, чтобы каждый
+    разбирался независимо тем же DictReader'ом.
+    """
+    end = _record_end(raw, 0, 0)
+    if end == len(raw) and not raw.endswith("\n"):
+        return [raw]
+    header = raw[:end]
+    chunks = []
+    pos = end
+    while pos < len(raw):
+        nxt = _record_end(raw, pos, pos + max(chunk_size, 1) - 1)
+        chunks.append(header + raw[pos:nxt])
+        pos = nxt
+    return chunks or [header]
+
+
+def _mp_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _init_worker(settings_module: str):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+    django.setup()
+
+
+def _parse_chunk(row_fn, chunk: str):
+    # выполняется в дочернем процессе: наружу уходят только простые кортежи
+    result = row_fn(StringIO(chunk))
+    return result if isinstance(result, tuple) else list(result)
+
+
+def parallel_map(row_fn, raw: str, workers: int, chunk_size: int = None):
+    """
+    Разбирает raw функцией row_fn (принимает итерируемый объект строк) по кускам
+    в пуле из workers процессов. Результаты отдаются по кускам в исходном порядке.
+    При workers <= 1 или одном куске разбор идёт в текущем процессе.
+    """
+    if chunk_size is None:
+        chunk_size = max(MIN_CHUNK_SIZE, len(raw) // (max(workers, 1) * 4) + 1)
+    chunks = split_chunks(raw, chunk_size)
+    if workers <= 1 or len(chunks) == 1:
+        yield from (_parse_chunk(row_fn, chunk) for chunk in chunks)
+        return
+    # не fork: разбор может идти из потока оркестратора, а форк многопоточного
+    # процесса с открытыми соединениями и захваченными блокировками может
+    # зависнуть. Дочерние процессы стартуют с чистого интерпретатора и
+    # поднимают Django сами (_init_worker).
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=_mp_context(),
+        initializer=_init_worker, initargs=(settings.SETTINGS_MODULE,),
+    ) as pool:
+        yield from pool.map(_parse_chunk, repeat(row_fn), chunks)
+
+
+def parallel_rows(row_fn, raw: str, workers: int, chunk_size: int = None):
+    """
+    Кортежи строк из генератора row_fn, разобранные параллельно (см. parallel_map).
+    """
+    for rows in parallel_map(row_fn, raw, workers, chunk_size):
+        yield from rows
@@ -1,8 +1,11 @@
 import csv
 from io import StringIO
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 from django.db import transaction
 from meter_app.models import ErcData, ReadingsSU, Incorrect, IotMeter, IotMeterData, EnergoDevice , EnergoDeviceData
+from meter_app.external_api.loaders import DEFAULT_BATCH_SIZE, batched, get_loader
+from meter_app.external_api.parallel import parallel_map, parallel_rows
+from meter_app.external_api.validation import split_batch
 from datetime import datetime
 
 import json 
@@ -13,6 +16,38 @@ def _parse_int(value: str, default: int = 0) -> int:
     except Exception:
         return default
 
+def _parse_optional_int(value: str):
+    """
+    Целое из поля ЕРЦ; пусто, мусор или вне диапазона integer → None.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        return None
+    return number if -2**31 <= number < 2**31 else None
+
+def _parse_decimal(value: str):
+    """
+    «12.5» / «12,5» → Decimal для DecimalField(max_digits=14, decimal_places=3);
+    пусто, мусор или больше 11 знаков до запятой → None.
+    """
+    try:
+        number = Decimal(value.replace(",", ".").replace(" ", ""))
+    except InvalidOperation:
+        return None
+    return number if number.is_finite() and abs(number) < 10**11 else None
+
+def _parse_date(value: str):
+    """
+    Дата ЕРЦ «ДД.ММ.ГГГГ» (или ISO) → date; пусто или мусор → None.
+    """
+    for fmt in ("%d.%m.%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            pass
+    return None
+
 def _parse_bool(value: str) -> bool:
     """
     True/False, 1/0, yes/no — любые «истинные» значения возвращают True.
@@ -20,214 +55,308 @@ def _parse_bool(value: str) -> bool:
     v = (value or "").strip().lower()
     return v in ("1", "true", "yes", "y")
 
-def parse_meters_info(raw: str):
+def _rows(row_fn, raw: str, workers: int = 1):
+    """
+    Строки-кортежи из raw: при workers > 1 файл режется на куски
+    и разбирается в пуле процессов (parallel_rows), иначе — здесь же.
+    """
+    if workers > 1:
+        return parallel_rows(row_fn, raw, workers)
+    return row_fn(StringIO(raw))
+
+# Соответствие полей ErcData колонкам MetersInfo.txt (по регламенту ЕРЦ)
+ERC_DATA_COLUMNS = (
+    ("abonent",           "Абонент"),
+    ("entity",            "ЛС"),
+    ("surname",           "Фамилия"),
+    ("given_name",        "Имя"),
+    ("fathers_name",      "Отчество"),
+    ("entity_gar_su",     "Л.с."),
+    ("entity_type",       "Тип ЛС"),
+    ("sector",            "Бригада"),
+    ("team",              "Участок"),
+    ("city",              "Город"),
+    ("street_group",      "Группа улиц"),
+    ("street_prefix",     "Тип улицы"),
+    ("street",            "Улица"),
+    ("house_prefix",      "Префикс"),
+    ("house_type",        "Тип строения"),
+    ("house_number",      "Номер"),
+    ("litera",            "Литера"),
+    ("flat",              "Кв"),
+    ("flat_test",         "Литера помещения"),
+    ("flat_type",         "Тип помещения"),
+    ("object",            "Объект"),
+    ("registered_amount", "Жильцы"),
+    ("floor",             "Этаж"),
+    ("phone_number1",     "Телефон 1"),
+    ("phone_number2",     "Телефон 2"),
+    ("iin",               "ИИН"),
+    ("whaelthy_code",     "Код благ."),
+    ("tarif_type",        "Тип тарифа"),
+    ("tarif_water",       "Тариф,вода"),
+    ("tarif_saverage",    "Тариф,кан."),
+    ("tu",                "т/у"),
+    ("meter_type",        "Тип водомера"),
+    ("meter_subtype",     "Подтип водомера"),
+    ("meter_number",      "Номер водомера"),
+    ("verification_date", "Дата поверки"),
+    ("readings_date",     "Дата показания"),
+    ("readings",          "Показание"),
+    ("norma",             "Тип тарифа"),   # нормативный тариф
+    ("test1",             "Тариф,вода"),   # норматив вода
+    ("test2",             "Тариф,кан."),   # норматив кан.
+    ("area",              "Площадь полива"),
+    ("area_type",         "Жильцы/площадь полива"),
+    ("seal_date",         "Дата пломбы"),
+    ("seal_number",       "Пломба"),
+    ("source",            "Источник"),
+    ("poliv",             "Полив"),
+    ("tu_saverage",       "т/у кан."),
+    ("saverage_type",     "Тип кан."),
+    ("start_date",        "Дата нач."),
+    ("meter_id",          "Код ИПУ"),
+    ("blank_number",      "Номер бланка"),
+    ("tur",               "Тур"),
+    ("bit_depth",         "Разрядность"),
+    ("reagings_date",     "Дата показания"),
+)
+
+ERC_DATA_FIELDS = tuple(field for field, _ in ERC_DATA_COLUMNS)
+
+# Типизированные поля ErcData: строка файла приводится к типу один раз при импорте
+ERC_DATA_TYPES = {
+    "registered_amount": _parse_optional_int,
+    "floor":             _parse_optional_int,
+    "bit_depth":         _parse_optional_int,
+    "tarif_water":       _parse_decimal,
+    "readings":          _parse_decimal,
+    "verification_date": _parse_date,
+    "readings_date":     _parse_date,
+    "seal_date":         _parse_date,
+}
+_ERC_CONVERTERS = tuple(ERC_DATA_TYPES.get(field) for field in ERC_DATA_FIELDS)
+
+READINGS_SU_FIELDS = ("abonent_id", "account_id", "point_num", "rdate", "rvalue", "meter_id")
+INCORRECT_FIELDS   = READINGS_SU_FIELDS + ("row_hash", "error_reason")
+
+ENERGO_DEVICE_FIELDS = (
+    "ctime", "dmodel_id", "dmodel_sensor", "serial_num", "device_id", "folder_id",
+    "location", "physical_person", "owner_name", "beg_value", "phones", "sector_id",
+    "mount_id", "mount", "archives", "alias", "enable", "resource_id", "resource_inx",
+    "scheme_id", "dscan", "calc", "account", "date_next", "date_verification", "created_at",
+)
+ENERGO_DEVICE_DATA_FIELDS = (
+    "value", "value_error", "rvalue_id", "c", "ctime", "datetime", "type_arch_orig",
+    "type_arch", "success", "error_arch", "created_at", "device_id",
+)
+IOT_METER_FIELDS = (
+    "modem_id", "port", "serial_number", "consumer", "account_id", "last_reading", "created_at",
+)
+IOT_METER_DATA_FIELDS = (
+    "dt", "type_of_data", "rssi", "snr", "num_of_pulse", "reading", "data",
+    "battery_level", "start_reading", "diff_reading", "created_at", "meter_id",
+)
+
+
+def iter_meters_info_rows(lines):
+    """
+    Лениво разбирает строки MetersInfo.txt (любой итерируемый объект строк,
+    например открытый файл) в кортежи значений в порядке ERC_DATA_FIELDS.
+    Поля ERC_DATA_TYPES приводятся к типу, остальные остаются строками.
+    """
+    for row in csv.DictReader(lines, delimiter="\t"):
+        values = ((row.get(header) or "").strip() for _, header in ERC_DATA_COLUMNS)
+        yield tuple(
+            value if convert is None else convert(value)
+            for value, convert in zip(values, _ERC_CONVERTERS)
+        )
+
+
+def parse_meters_info(raw: str, loader=None, workers: int = 1):
     """
     Парсит таб-делимитед файл MetersInfo.txt по регламенту
-    и сохраняет в модель ErcData.
-    """
-    reader = csv.DictReader(StringIO(raw), delimiter="\t")
-    objs = []
-    for row in reader:
-        objs.append(ErcData(
-            abonent           = row.get("Абонент", "").strip(),
-            entity            = row.get("ЛС", "").strip(),
-            surname           = row.get("Фамилия", "").strip(),
-            given_name        = row.get("Имя", "").strip(),
-            fathers_name      = row.get("Отчество", "").strip(),
-            entity_gar_su     = row.get("Л.с.", "").strip(),
-            entity_type       = row.get("Тип ЛС", "").strip(),
-            sector            = row.get("Бригада", "").strip(),
-            team              = row.get("Участок", "").strip(),
-            city              = row.get("Город", "").strip(),
-            street_group      = row.get("Группа улиц", "").strip(),
-            street_prefix     = row.get("Тип улицы", "").strip(),
-            street            = row.get("Улица", "").strip(),
-            house_prefix      = row.get("Префикс", "").strip(),
-            house_type        = row.get("Тип строения", "").strip(),
-            house_number      = row.get("Номер", "").strip(),
-            litera            = row.get("Литера", "").strip(),
-            flat              = row.get("Кв", "").strip(),
-            flat_test         = row.get("Литера помещения", "").strip(),
-            flat_type         = row.get("Тип помещения", "").strip(),
-            object            = row.get("Объект", "").strip(),
-            registered_amount = row.get("Жильцы", "").strip(),
-            floor             = row.get("Этаж", "").strip(),
-            phone_number1     = row.get("Телефон 1", "").strip(),
-            phone_number2     = row.get("Телефон 2", "").strip(),
-            iin               = row.get("ИИН", "").strip(),
-            whaelthy_code     = row.get("Код благ.", "").strip(),
-            tarif_type        = row.get("Тип тарифа", "").strip(),
-            tarif_water       = row.get("Тариф,вода", "").strip(),
-            tarif_saverage    = row.get("Тариф,кан.", "").strip(),
-            tu                = row.get("т/у", "").strip(),
-            meter_type        = row.get("Тип водомера", "").strip(),
-            meter_subtype     = row.get("Подтип водомера", "").strip(),
-            meter_number      = row.get("Номер водомера", "").strip(),
-            verification_date = row.get("Дата поверки", "").strip(),
-            readings_date     = row.get("Дата показания", "").strip(),
-            readings          = row.get("Показание", "").strip(),
-            norma             = row.get("Тип тарифа", "").strip(),  # нормативный тариф
-            test1             = row.get("Тариф,вода", "").strip(), # норматив вода
-            test2             = row.get("Тариф,кан.", "").strip(), # норматив кан.
-            area              = row.get("Площадь полива", "").strip(),
-            area_type         = row.get("Жильцы/площадь полива", "").strip(),
-            seal_date         = row.get("Дата пломбы", "").strip(),
-            seal_number       = row.get("Пломба", "").strip(),
-            source            = row.get("Источник", "").strip() if row.get("Источник") else "",
-            poliv             = row.get("Полив", "").strip(),
-            tu_saverage       = row.get("т/у кан.", "").strip(),
-            saverage_type     = row.get("Тип кан.", "").strip(),
-            start_date        = row.get("Дата нач.", "").strip(),
-            meter_id          = row.get("Код ИПУ", "").strip(),
-            blank_number      = row.get("Номер бланка", "").strip(),
-            tur               = row.get("Тур", "").strip(),
-            bit_depth         = row.get("Разрядность", "").strip(),
-            reagings_date     = row.get("Дата показания", "").strip(),
-        ))
-    # Сохраняем всё пакетом
-    with transaction.atomic(using='meter'):
-        ErcData.objects.using('meter').bulk_create(objs)
-
-
-def parse_readings_su(raw: str):
+    и сохраняет в модель ErcData. workers > 1 — разбор в пуле процессов.
+    """
+    if workers > 1:
+        loader = loader or get_loader()
+        with transaction.atomic(using=loader.using):
+            return loader.load(ErcData, ERC_DATA_FIELDS, _rows(iter_meters_info_rows, raw, workers))
+    return parse_meters_info_stream(StringIO(raw), loader=loader)
+
+
+def parse_meters_info_stream(lines, batch_size: int = DEFAULT_BATCH_SIZE, loader=None) -> int:
+    """
+    Потоковый вариант parse_meters_info: читает строки по мере поступления
+    и сохраняет ErcData пакетами по batch_size, поэтому расход памяти
+    не зависит от размера файла. Возвращает число сохранённых строк.
+    """
+    loader = loader or get_loader()
+    with transaction.atomic(using=loader.using):
+        return loader.load(ErcData, ERC_DATA_FIELDS, iter_meters_info_rows(lines), batch_size)
+
+
+def split_readings_su(lines, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Разбирает Readings_SU.csv и делит строки на удачные (кортежи READINGS_SU_FIELDS)
+    и невалидные (кортежи INCORRECT_FIELDS с причиной ошибки).
+    Правила регламента проверяются пакетами по batch_size строк (validation.RULES).
+    """
+    reader = csv.reader(lines, delimiter=";")
+    header = [h.strip() for h in next(reader, [])]
+    good, bad = [], []
+    for batch in batched((row for row in reader if row), batch_size):
+        batch_good, batch_bad = split_batch(batch, header)
+        good.extend(batch_good)
+        bad.extend(batch_bad)
+    return good, bad
+
+
+def parse_readings_su(raw: str, loader=None, workers: int = 1):
     """
     Парсим Readings_SU.csv: удачные — в ReadingsSU,
     невалидные — в Incorrect.
     """
-    reader = csv.DictReader(StringIO(raw), delimiter=";")
+    loader = loader or get_loader()
     good, bad = [], []
-    for row in reader:
-        try:
-            val = row.get("RValue", "").strip()
-            acct = row.get("AccountId", "").strip()
-            # проверяем регламент: RValue должно быть > 0 и <= 30
-            if not val or float(val) <= 0 or float(val) > 30:
-                raise ValueError("Не по регламенту")
-            good.append(ReadingsSU(
-                abonent_id = row.get("AbonentId", "").strip(),
-                account_id = acct,
-                point_num  = row.get("PointNum", "").strip(),
-                rdate      = row.get("RDate", "").strip(),
-                rvalue     = val,
-                meter_id   = row.get("MeterId", "").strip(),
-            ))
-        except Exception as e:
-            bad.append(Incorrect(
-                abonent_id   = row.get("AbonentId", "").strip(),
-                account_id   = row.get("AccountId", "").strip(),
-                point_num    = row.get("PointNum", "").strip(),
-                rdate        = row.get("RDate", "").strip(),
-                rvalue       = row.get("RValue", "").strip(),
-                meter_id     = row.get("MeterId", "").strip(),
-                error_reason = str(e),
-            ))
-
-    with transaction.atomic(using='meter'):
+    # чтение CSV и проверка правил идут одним колоночным проходом — это этап validate
+    with loader.metrics.stage("validate"):
+        for chunk_good, chunk_bad in parallel_map(split_readings_su, raw, workers):
+            good.extend(chunk_good)
+            bad.extend(chunk_bad)
+
+    with transaction.atomic(using=loader.using):
         if good:
-            ReadingsSU.objects.using('meter').bulk_create(good)
+            loader.load(ReadingsSU, READINGS_SU_FIELDS, good)
         if bad:
-            Incorrect.objects.using('meter').bulk_create(bad)
+            loader.load(Incorrect, INCORRECT_FIELDS, bad)
 
 
-def parse_energo_devices(raw: str):
+def iter_energo_devices_rows(lines):
+    """
+    Разбирает строки energo_devices.csv в кортежи ENERGO_DEVICE_FIELDS.
+    """
+    for d in csv.DictReader(lines):
+        yield (
+            datetime.fromisoformat(d.get("ctime")),
+            _parse_int(d.get("dmodel_id")),
+            d.get("dmodel_sensor", "").strip(),
+            d.get("serial_num", "").strip(),
+            _parse_int(d.get("device_id")),
+            _parse_int(d.get("folder_id")),
+            d.get("location", "").strip(),
+            _parse_bool(d.get("physical_person")),
+            d.get("owner_name", "").strip(),
+            Decimal(d.get("beg_value") or 0),
+            d.get("phones", "").strip(),
+            _parse_int(d.get("sector_id")),
+            _parse_int(d.get("mount_id")),
+            d.get("mount", "").strip(),
+            _parse_int(d.get("archives")),
+            d.get("alias", "").strip(),
+            _parse_bool(d.get("enable")),
+            _parse_int(d.get("resource_id")),
+            _parse_int(d.get("resource_inx")),
+            _parse_int(d.get("scheme_id")),
+            d.get("dscan", "").strip(),
+            d.get("calc", "").strip(),
+            d.get("account", "").strip(),
+            None,            # date_next: если нет даты в CSV, иначе парсить через datetime.strptime
+            None,            # date_verification: то же самое
+            datetime.now(),  # created_at: или из CSV, если есть
+        )
+
+
+def parse_energo_devices(raw: str, loader=None, workers: int = 1):
     """
     Разбирает CSV energo_devices.csv и сохраняет в модель EnergoDevice.
     Ожидается заголовок, соответствующий полям из БД.
     """
-    reader = csv.DictReader(StringIO(raw))
-    objs = []
-    for d in reader:
-        objs.append(EnergoDevice(
-            ctime            = datetime.fromisoformat(d.get("ctime")),
-            dmodel_id        = _parse_int(d.get("dmodel_id")),
-            dmodel_sensor    = d.get("dmodel_sensor", "").strip(),
-            serial_num       = d.get("serial_num", "").strip(),
-            device_id        = _parse_int(d.get("device_id")),
-            folder_id        = _parse_int(d.get("folder_id")),
-            location         = d.get("location", "").strip(),
-            physical_person  = _parse_bool(d.get("physical_person")),
-            owner_name       = d.get("owner_name", "").strip(),
-            beg_value        = Decimal(d.get("beg_value") or 0),
-            phones           = d.get("phones", "").strip(),
-            sector_id        = _parse_int(d.get("sector_id")),
-            mount_id         = _parse_int(d.get("mount_id")),
-            mount            = d.get("mount", "").strip(),
-            archives         = _parse_int(d.get("archives")),
-            alias            = d.get("alias", "").strip(),
-            enable           = _parse_bool(d.get("enable")),
-            resource_id      = _parse_int(d.get("resource_id")),
-            resource_inx     = _parse_int(d.get("resource_inx")),
-            scheme_id        = _parse_int(d.get("scheme_id")),
-            dscan            = d.get("dscan", "").strip(),
-            calc             = d.get("calc", "").strip(),
-            account          = d.get("account", "").strip(),
-            date_next        = None,  # если нет даты в CSV, иначе парсить через datetime.strptime
-            date_verification= None,  # то же самое
-            created_at       = datetime.now(),  # или из CSV, если есть
-        ))
-    EnergoDevice.objects.using('meter').bulk_create(objs)
-
-def parse_energo_device_data(raw: str):
+    loader = loader or get_loader()
+    with transaction.atomic(using=loader.using):
+        return loader.load(EnergoDevice, ENERGO_DEVICE_FIELDS, _rows(iter_energo_devices_rows, raw, workers))
+
+
+def iter_energo_device_data_rows(lines):
+    """
+    Разбирает строки energo_device_data.csv в кортежи ENERGO_DEVICE_DATA_FIELDS.
+    """
+    for d in csv.DictReader(lines):
+        yield (
+            Decimal(d.get("value") or 0),
+            Decimal(d.get("value_error") or 0),
+            _parse_int(d.get("rvalue_id")),
+            _parse_int(d.get("c")),
+            datetime.fromisoformat(d.get("ctime")),
+            datetime.fromisoformat(d.get("datetime")),
+            _parse_int(d.get("type_arch_orig")),
+            _parse_int(d.get("type_arch")),
+            _parse_bool(d.get("success")),
+            d.get("error_arch", "").strip(),
+            datetime.now(),
+            _parse_int(d.get("device_id")),
+        )
+
+
+def parse_energo_device_data(raw: str, loader=None, workers: int = 1):
     """
     Разбирает CSV energo_device_data.csv и сохраняет в модель EnergoDeviceData.
     """
-    reader = csv.DictReader(StringIO(raw))
-    objs = []
-    for d in reader:
-        objs.append(EnergoDeviceData(
-            value        = Decimal(d.get("value") or 0),
-            value_error  = Decimal(d.get("value_error") or 0),
-            rvalue_id    = _parse_int(d.get("rvalue_id")),
-            c            = _parse_int(d.get("c")),
-            ctime        = datetime.fromisoformat(d.get("ctime")),
-            datetime     = datetime.fromisoformat(d.get("datetime")),
-            type_arch_orig = _parse_int(d.get("type_arch_orig")),
-            type_arch    = _parse_int(d.get("type_arch")),
-            success      = _parse_bool(d.get("success")),
-            error_arch   = d.get("error_arch", "").strip(),
-            created_at   = datetime.now(),
-            device_id    = _parse_int(d.get("device_id")),
-        ))
-    EnergoDeviceData.objects.using('meter').bulk_create(objs)
-    
-    
-def parse_iot_meters(raw: str):
+    loader = loader or get_loader()
+    with transaction.atomic(using=loader.using):
+        return loader.load(EnergoDeviceData, ENERGO_DEVICE_DATA_FIELDS, _rows(iter_energo_device_data_rows, raw, workers))
+
+
+def iter_iot_meters_rows(lines):
+    """
+    Разбирает строки iot_meters.csv в кортежи IOT_METER_FIELDS.
+    """
+    for d in csv.DictReader(lines):
+        yield (
+            _parse_int(d.get("modem_id")),
+            _parse_int(d.get("port")),
+            d.get("serial_number", "").strip(),
+            d.get("consumer", "").strip(),
+            d.get("account_id", "").strip(),
+            Decimal(d.get("last_reading") or 0),
+            datetime.fromisoformat(d.get("created_at")),
+        )
+
+
+def parse_iot_meters(raw: str, loader=None, workers: int = 1):
     """
     Разбираем CSV iot_meters.csv → создаём IotMeter
     """
-    reader = csv.DictReader(StringIO(raw))
-    objs = []
-    for d in reader:
-        objs.append(IotMeter(
-            modem_id      = _parse_int(d.get("modem_id")),
-            port          = _parse_int(d.get("port")),
-            serial_number = d.get("serial_number", "").strip(),
-            consumer      = d.get("consumer", "").strip(),
-            account_id    = d.get("account_id", "").strip(),
-            last_reading  = Decimal(d.get("last_reading") or 0),
-            created_at    = datetime.fromisoformat(d.get("created_at")),
-        ))
-    IotMeter.objects.using('meter').bulk_create(objs)
-
-def parse_iot_meter_data(raw: str):
+    loader = loader or get_loader()
+    with transaction.atomic(using=loader.using):
+        return loader.load(IotMeter, IOT_METER_FIELDS, _rows(iter_iot_meters_rows, raw, workers))
+
+
+def iter_iot_meter_data_rows(lines):
+    """
+    Разбирает строки iot_meter_data.csv в кортежи IOT_METER_DATA_FIELDS.
+    """
+    for d in csv.DictReader(lines):
+        yield (
+            datetime.fromisoformat(d.get("dt")),
+            d.get("type_of_data", "").strip(),
+            _parse_int(d.get("rssi")),
+            Decimal(d.get("snr") or 0),
+            _parse_int(d.get("num_of_pulse")),
+            Decimal(d.get("reading") or 0),
+            d.get("data") and json.loads(d.get("data")),
+            Decimal(d.get("battery_level") or 0),
+            Decimal(d.get("start_reading") or 0),
+            Decimal(d.get("diff_reading") or 0),
+            datetime.fromisoformat(d.get("created_at")),
+            _parse_int(d.get("meter_id")),
+        )
+
+
+def parse_iot_meter_data(raw: str, loader=None, workers: int = 1):
     """
     Разбираем CSV iot_meter_data.csv → создаём IotMeterData
     """
-    reader = csv.DictReader(StringIO(raw))
-    objs = []
-    for d in reader:
-        objs.append(IotMeterData(
-            dt            = datetime.fromisoformat(d.get("dt")),
-            type_of_data  = d.get("type_of_data", "").strip(),
-            rssi          = _parse_int(d.get("rssi")),
-            snr           = Decimal(d.get("snr") or 0),
-            num_of_pulse  = _parse_int(d.get("num_of_pulse")),
-            reading       = Decimal(d.get("reading") or 0),
-            data          = d.get("data") and json.loads(d.get("data")),
-            battery_level = Decimal(d.get("battery_level") or 0),
-            start_reading = Decimal(d.get("start_reading") or 0),
-            diff_reading  = Decimal(d.get("diff_reading") or 0),
-            created_at    = datetime.fromisoformat(d.get("created_at")),
-            meter_id      = _parse_int(d.get("meter_id")),
-        ))
-    IotMeterData.objects.using('meter').bulk_create(objs)
\ No newline at end of file
+    loader = loader or get_loader()
+    with transaction.atomic(using=loader.using):
+        return loader.load(IotMeterData, IOT_METER_DATA_FIELDS, _rows(iter_iot_meter_data_rows, raw, workers))
@@ -0,0 +1,242 @@
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import NotSupportedError, connections, transaction
+from django.utils import timezone
+
+from meter_app.api.cache import touch_tables
+from meter_app.models import EnergoDeviceData, IotMeterData
+
+# Секционированные таблицы: имя → (модель, столбец, по которому режем помесячно)
+PARTITIONED = {
+    "iot_meter_data":     (IotMeterData,     "dt"),
+    "energo_device_data": (EnergoDeviceData, "datetime"),
+}
+
+# На сколько месяцев вперёд от текущего держать готовые секции
+PARTITIONS_AHEAD = 3
+
+# Схема, куда уезжают отсоединённые секции (если их не удаляют)
+ARCHIVE_SCHEMA = "archive"
+
+
+def table_name(model) -> str:
+    return model._meta.db_table.split(".")[-1].strip('"')
+
+
+def _qualified(name: str, schema: str = "public") -> str:
+    return f'"{schema}"."{name}"'
+
+
+def month_start(day) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def _bounds(month: date) -> tuple:
+    # границы секции — начало месяца и начало следующего, в UTC
+    start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    end = add_months(month, 1)
+    return start, datetime(end.year, end.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _check_vendor(connection):
+    if connection.vendor != "postgresql":
+        raise NotSupportedError("секционирование таблиц работает только с PostgreSQL")
+
+
+def is_partitioned(cursor, table: str) -> bool:
+    cursor.execute(
+        "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE n.nspname = 'public' AND c.relname = %s",
+        [table],
+    )
+    row = cursor.fetchone()
+    return row is not None and row[0] == "p"
+
+
+def list_partitions(cursor, table: str) -> list:
+    """
+    Помесячные секции таблицы: [(начало месяца, имя)] по возрастанию.
+    Секция по умолчанию в список не входит.
+    """
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "JOIN pg_namespace n ON n.oid = p.relnamespace "
+        "WHERE n.nspname = 'public' AND p.relname = %s",
+        [table],
+    )
+    pattern = re.compile(rf"^{re.escape(table)}_p(\d{{4}})(\d{{2}})$")
+    result = []
+    for (name,) in cursor.fetchall():
+        match = pattern.match(name)
+        if match:
+            result.append((date(int(match[1]), int(match[2]), 1), name))
+    return sorted(result)
+
+
+def _carry_sequence(cursor, old_sequence, table: str):
+    """
+    Новая таблица продолжает нумерацию id старой. Для serial умолчание
+    ссылается на прежнюю последовательность — она переходит к новой таблице;
+    у identity-столбца последовательность своя, её подводим к max(id).
+    """
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [f"public.{table}"])
+    (sequence,) = cursor.fetchone()
+    if sequence is None:
+        if old_sequence is not None:
+            cursor.execute(f'ALTER SEQUENCE {old_sequence} OWNED BY {_qualified(table)}."id"')
+        return
+    cursor.execute(
+        f"SELECT setval(%s, COALESCE((SELECT max(id) FROM {_qualified(table)}), 0) + 1, false)",
+        [sequence],
+    )
+
+
+def _rebuild_table(schema_editor, model, column: str, partitioned: bool, ahead: int):
+    """
+    Пересоздаёт таблицу model секционированной по column (или обычной —
+    для отката) и переносит в неё строки. Таблица заблокирована до конца
+    транзакции миграции.
+    """
+    table = table_name(model)
+    old = f"{table}_old"
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [f"public.{table}"])
+        (old_sequence,) = cursor.fetchone()
+        cursor.execute(f'ALTER TABLE {_qualified(table)} RENAME TO "{old}"')
+        cursor.execute(
+            f"CREATE TABLE {_qualified(table)} (LIKE {_qualified(old)} "
+            f"INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING STORAGE)"
+            + (f' PARTITION BY RANGE ("{column}")' if partitioned else "")
+        )
+        if partitioned:
+            cursor.execute(f'SELECT min("{column}"), max("{column}") FROM {_qualified(old)}')
+            first, last = cursor.fetchone()
+            current = month_start(timezone.now())
+            month = month_start(first) if first else current
+            last = max(month_start(last) if last else current, add_months(current, ahead))
+            while month <= last:
+                cursor.execute(
+                    f"CREATE TABLE {_qualified(partition_name(table, month))} "
+                    f"PARTITION OF {_qualified(table)} FOR VALUES FROM (%s) TO (%s)",
+                    _bounds(month),
+                )
+                month = add_months(month, 1)
+            # строки вне готовых секций (например, из далёкого будущего)
+            cursor.execute(
+                f'CREATE TABLE {_qualified(table + "_default")} PARTITION OF {_qualified(table)} DEFAULT'
+            )
+        cursor.execute(f"INSERT INTO {_qualified(table)} SELECT * FROM {_qualified(old)}")
+        _carry_sequence(cursor, old_sequence, table)
+        # вместе со старой таблицей уходят её индексы — их имена освобождаются
+        cursor.execute(f"DROP TABLE {_qualified(old)}")
+        # первичный ключ секционированной таблицы обязан включать ключ секционирования
+        key = f'"id", "{column}"' if partitioned else '"id"'
+        cursor.execute(f'ALTER TABLE {_qualified(table)} ADD CONSTRAINT "{table}_pkey" PRIMARY KEY ({key})')
+    for index in model._meta.indexes:
+        schema_editor.execute(index.create_sql(model, schema_editor))
+
+
+def partition_table(schema_editor, model, column: str, ahead: int = PARTITIONS_AHEAD):
+    """
+    Переводит таблицу model на помесячные секции по column: секции на весь
+    диапазон данных и ahead месяцев вперёд, плюс секция по умолчанию.
+    На других СУБД и на уже секционированной таблице ничего не делает.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if is_partitioned(cursor, table_name(model)):
+            return
+    _rebuild_table(schema_editor, model, column, partitioned=True, ahead=ahead)
+
+
+def unpartition_table(schema_editor, model, column: str):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if not is_partitioned(cursor, table_name(model)):
+            return
+    _rebuild_table(schema_editor, model, column, partitioned=False, ahead=0)
+
+
+def create_partition(cursor, table: str, column: str, month: date) -> bool:
+    """
+    Создаёт секцию за month, если её нет. Строки этого месяца, успевшие
+    попасть в секцию по умолчанию, переносятся в новую секцию.
+    """
+    name = partition_name(table, month)
+    if any(existing == name for _, existing in list_partitions(cursor, table)):
+        return False
+    start, end = _bounds(month)
+    cursor.execute(f"CREATE TABLE {_qualified(name)} (LIKE {_qualified(table)})")
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {_qualified(table + '_default')} "
+        f'WHERE "{column}" >= %s AND "{column}" < %s RETURNING *) '
+        f"INSERT INTO {_qualified(name)} SELECT * FROM moved",
+        [start, end],
+    )
+    # индексы секционированной таблицы достраиваются на секции при ATTACH
+    cursor.execute(
+        f"ALTER TABLE {_qualified(table)} ATTACH PARTITION {_qualified(name)} FOR VALUES FROM (%s) TO (%s)",
+        [start, end],
+    )
+    return True
+
+
+def ensure_partitions(table: str, ahead: int = PARTITIONS_AHEAD, using: str = "meter") -> list:
+    """
+    Секции с текущего месяца на ahead месяцев вперёд. Возвращает имена созданных.
+    """
+    model, column = PARTITIONED[table]
+    connection = connections[using]
+    _check_vendor(connection)
+    current = month_start(timezone.now())
+    created = []
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if not is_partitioned(cursor, table):
+            raise NotSupportedError(f"таблица {table} не секционирована — примените миграции meter_app")
+        for n in range(ahead + 1):
+            month = add_months(current, n)
+            if create_partition(cursor, table, column, month):
+                created.append(partition_name(table, month))
+    return created
+
+
+def detach_partitions(table: str, retain_months: int, drop: bool = False, using: str = "meter") -> list:
+    """
+    Отсоединяет секции старше retain_months полных месяцев до текущего:
+    DETACH вместо DELETE — без перебора строк и раздувания таблицы.
+    Секции уезжают в схему ARCHIVE_SCHEMA или, при drop, удаляются.
+    Свёртки ConsumptionRollup за эти месяцы остаются. Возвращает имена секций.
+    """
+    model, _ = PARTITIONED[table]
+    connection = connections[using]
+    _check_vendor(connection)
+    cutoff = add_months(month_start(timezone.now()), -retain_months)
+    detached = []
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        for month, name in list_partitions(cursor, table):
+            if month >= cutoff:
+                break
+            cursor.execute(f"ALTER TABLE {_qualified(table)} DETACH PARTITION {_qualified(name)}")
+            if drop:
+                cursor.execute(f"DROP TABLE {_qualified(name)}")
+            else:
+                cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{ARCHIVE_SCHEMA}"')
+                cursor.execute(f'ALTER TABLE {_qualified(name)} SET SCHEMA "{ARCHIVE_SCHEMA}"')
+            detached.append(name)
+        if detached:
+            touch_tables(using, model)
+    return detached
@@ -0,0 +1,66 @@
+from importlib import import_module
+from typing import Callable, NamedTuple
+
+from django.conf import settings
+
+# Модули со встроенными провайдерами; дополнительные подключаются
+# через settings.METER_PROVIDER_MODULES (список путей для import_module)
+DEFAULT_PROVIDER_MODULES = (
+    "meter_app.external_api.karWater",
+    "meter_app.external_api.energo",
+    "meter_app.external_api.iot",
+)
+
+
+class ImportSpec(NamedTuple):
+    """
+    Один файл провайдера: как его получить, чем разобрать и куда он пишется.
+    """
+    kind:      str       # имя файла в журнале импорта (ImportLedger.kind)
+    fetch:     str       # имя async-метода провайдера, отдающего содержимое
+    parse:     Callable  # парсер (raw, loader=None)
+    model:     type      # целевая модель (ключ ROW_KEYS для дельта-импорта)
+    delimiter: str = ","
+
+
+# имя провайдера → (класс провайдера, (ImportSpec, ...))
+REGISTRY = {}
+
+
+def register(*files: ImportSpec):
+    """
+    Декоратор класса провайдера: регистрирует его под BaseProvider.name
+    вместе с описанием импортируемых файлов.
+    """
+    def decorator(provider_cls):
+        name = provider_cls().name
+        if name in REGISTRY and REGISTRY[name][0] is not provider_cls:
+            raise ValueError(f"Провайдер {name} уже зарегистрирован")
+        REGISTRY[name] = (provider_cls, files)
+        return provider_cls
+    return decorator
+
+
+def autodiscover():
+    """
+    Импортирует модули провайдеров — при импорте они регистрируют себя сами.
+    """
+    extra = getattr(settings, "METER_PROVIDER_MODULES", ())
+    for module in (*DEFAULT_PROVIDER_MODULES, *extra):
+        import_module(module)
+    return REGISTRY
+
+
+def get_provider(name: str):
+    """
+    Возвращает (класс провайдера, файлы) по имени.
+    """
+    autodiscover()
+    try:
+        return REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Неизвестный провайдер: {name}")
+
+
+def provider_names():
+    return sorted(autodiscover())
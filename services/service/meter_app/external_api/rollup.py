@@ -0,0 +1,332 @@
+import datetime
+from decimal import Decimal
+from typing import NamedTuple
+
+from django.db import connections, models, transaction
+from django.db.models import F, Max, Min, OuterRef, Subquery, Value, Window
+from django.db.models.functions import Cast, Coalesce, Lag, RowNumber, Trunc
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from meter_app.api.cache import touch_tables
+from meter_app.models import (
+    ConsumptionRollup, Entity, ErcData, IotMeter, IotMeterData, Reading, ReadingsSU,
+)
+from .loaders import DEFAULT_BATCH_SIZE, batched
+
+# Группировки и периоды агрегатов
+GROUPS = ("meter", "account", "sector")
+PERIODS = ("month", "day")
+
+# Свёртка ConsumptionRollup хранит только месяцы
+ROLLUP_PERIOD = "month"
+
+# Сколько счётчиков пересчитывается одним запросом при обновлении свёртки
+METER_CHUNK = 500
+
+
+class Source(NamedTuple):
+    """
+    Таблица показаний, по которой считаются агрегаты.
+    """
+    model:   type
+    meter:   str                 # поле счётчика
+    time:    str                 # поле времени показания
+    value:   str                 # поле значения
+    account: models.Expression   # лицевой счёт строкой
+    sector:  models.Expression   # участок строкой
+    depends: tuple = ()          # справочники, от которых зависят account/sector
+    filter:  models.Q = models.Q()
+
+    def queryset(self, using: str = "meter"):
+        return self.model.objects.using(using).filter(self.filter)
+
+    @property
+    def places(self) -> int:
+        return self.model._meta.get_field(self.value).decimal_places
+
+
+SOURCES = {
+    "readings-su": Source(
+        ReadingsSU, "meter_id", "rdate", "rvalue",
+        account=Cast("account_id", models.CharField()),
+        sector=Subquery(
+            ErcData.objects.filter(entity=Cast(OuterRef("account_id"), models.CharField()))
+            .values("sector")[:1]
+        ),
+        depends=(ErcData,),
+    ),
+    # показания из бота: импорт их не пишет; счётчик пересчитывает задача
+    # refresh_rollup_meters после каждой подачи (bot_utils), остальное — refresh_rollups
+    "readings": Source(
+        Reading, "meterid", "createdate", "readings",
+        account=F("entity"),
+        sector=Subquery(Entity.objects.filter(entity=OuterRef("entity")).values("sector")[:1]),
+        depends=(Entity,),
+        filter=models.Q(disabled=False),
+    ),
+    "iot-data": Source(
+        IotMeterData, "meter_id", "dt", "reading",
+        account=Subquery(IotMeter.objects.filter(pk=OuterRef("meter_id")).values("account_id")[:1]),
+        sector=Value(""),
+        depends=(IotMeter,),
+    ),
+}
+
+# Колонка внутреннего запроса, по которой группируется каждая группировка
+_GROUP_COLUMNS = {
+    "meter":   "agg_meter",
+    "account": "agg_account",
+    "sector":  "agg_sector",
+}
+
+
+def _period(value) -> datetime.date:
+    """
+    Начало периода из сырого результата запроса: в SQLite это строка,
+    в PostgreSQL — date или timestamp.
+    """
+    if isinstance(value, str):
+        value = parse_datetime(value) or parse_date(value)
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.date()
+    return value
+
+
+def _month(value) -> datetime.date:
+    if isinstance(value, datetime.datetime) and timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return datetime.date(value.year, value.month, 1)
+
+
+def _number(value, places: int):
+    if value is None:
+        return None
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return value.quantize(Decimal(1).scaleb(-places))
+
+
+def _readings(source: Source, period: str, using: str, meters=None, account=None, sector=None):
+    """
+    Показания источника с номером периода, предыдущим значением того же
+    счётчика (LAG) и порядком внутри периода с конца (ROW_NUMBER = 1 — последнее).
+    Фильтры отбирают счётчики целиком, поэтому окна по счётчику не рвутся.
+    """
+    qs = source.queryset(using).annotate(
+        agg_meter=F(source.meter),
+        agg_account=Coalesce(source.account, Value(""), output_field=models.CharField()),
+        agg_sector=Coalesce(source.sector, Value(""), output_field=models.CharField()),
+    )
+    if meters is not None:
+        qs = qs.filter(**{f"{source.meter}__in": meters})
+    if account is not None:
+        qs = qs.filter(agg_account=account)
+    if sector is not None:
+        qs = qs.filter(agg_sector=sector)
+    return qs.annotate(
+        agg_period=Trunc(source.time, period),
+        agg_value=F(source.value),
+        agg_prev=Window(
+            Lag(source.value),
+            partition_by=[F(source.meter)],
+            order_by=[F(source.time).asc(), F("pk").asc()],
+        ),
+        agg_rn=Window(
+            RowNumber(),
+            partition_by=[F(source.meter), Trunc(source.time, period)],
+            order_by=[F(source.time).desc(), F("pk").desc()],
+        ),
+    ).values(
+        "pk", "agg_meter", "agg_account", "agg_sector",
+        "agg_period", "agg_value", "agg_prev", "agg_rn",
+    )
+
+
+def aggregate(name: str, group: str = "meter", period: str = ROLLUP_PERIOD, using: str = "meter",
+              meters=None, account=None, sector=None, since=None, until=None) -> list:
+    """
+    Агрегаты по сырым показаниям источника name, посчитанные в БД:
+    на каждую группу (group) и период — число показаний, сумма, минимум,
+    максимум, последнее значение (сумма последних по счётчикам группы)
+    и расход — сумма разностей соседних показаний одного счётчика.
+    since/until — границы начала периода (включительно).
+    """
+    source = SOURCES[name]
+    connection = connections[using]
+    inner = _readings(source, period, using, meters=meters, account=account, sector=sector)
+    sql, params = inner.query.get_compiler(using).as_sql()
+
+    key = _GROUP_COLUMNS[group]
+    where, where_params = [], []
+    if since is not None:
+        where.append("agg_period >= %s")
+        where_params.append(connection.ops.adapt_datefield_value(since))
+    if until is not None:
+        where.append("agg_period <= %s")
+        where_params.append(connection.ops.adapt_datefield_value(until))
+    query = (
+        "SELECT {key}, agg_period, COUNT(*), SUM(agg_value), MIN(agg_value), MAX(agg_value), "
+        "SUM(CASE WHEN agg_rn = 1 THEN agg_value END), SUM(agg_value - agg_prev), "
+        "MAX(agg_account), MAX(agg_sector), MAX({pk}) "
+        "FROM ({sql}) sub {where} GROUP BY {key}, agg_period ORDER BY {key}, agg_period"
+    ).format(
+        key=key,
+        pk=connection.ops.quote_name(source.model._meta.pk.column),
+        sql=sql,
+        where=("WHERE " + " AND ".join(where)) if where else "",
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(query, params + tuple(where_params))
+        rows = cursor.fetchall()
+
+    places = source.places
+    return [
+        {
+            "key":      str(row[0]),
+            "period":   _period(row[1]),
+            "readings": row[2],
+            "sum":      _number(row[3], places),
+            "min":      _number(row[4], places),
+            "max":      _number(row[5], places),
+            "last":     _number(row[6], places),
+            "delta":    _number(row[7], places),
+            "account":  row[8],
+            "sector":   row[9],
+            "last_id":  row[10],
+        }
+        for row in rows
+    ]
+
+
+def rollup(name: str, group: str = "meter", using: str = "meter",
+           meters=None, account=None, sector=None, since=None, until=None) -> list:
+    """
+    Те же помесячные агрегаты, что aggregate(), но из свёртки ConsumptionRollup.
+    """
+    field = {"meter": "meter_id", "account": "account", "sector": "sector"}[group]
+    qs = ConsumptionRollup.objects.using(using).filter(source=name)
+    if meters is not None:
+        qs = qs.filter(meter_id__in=meters)
+    if account is not None:
+        qs = qs.filter(account=account)
+    if sector is not None:
+        qs = qs.filter(sector=sector)
+    if since is not None:
+        qs = qs.filter(period__gte=since)
+    if until is not None:
+        qs = qs.filter(period__lte=until)
+    rows = qs.values(field, "period").annotate(
+        n=models.Sum("readings"),
+        total_sum=models.Sum("total"),
+        low=models.Min("min_value"),
+        high=models.Max("max_value"),
+        last_sum=models.Sum("last_value"),
+        delta_sum=models.Sum("delta"),
+    ).order_by(field, "period")
+
+    places = SOURCES[name].places
+    return [
+        {
+            "key":      str(row[field]),
+            "period":   row["period"],
+            "readings": row["n"],
+            "sum":      _number(row["total_sum"], places),
+            "min":      _number(row["low"], places),
+            "max":      _number(row["high"], places),
+            "last":     _number(row["last_sum"], places),
+            "delta":    _number(row["delta_sum"], places),
+        }
+        for row in rows
+    ]
+
+
+def has_rollup(name: str, using: str = "meter") -> bool:
+    return ConsumptionRollup.objects.using(using).filter(source=name).exists()
+
+
+def refresh_rollup(name: str, full: bool = False, using: str = "meter", meters=None) -> int:
+    """
+    Обновляет свёртку источника name и возвращает число пересчитанных строк.
+
+    Инкрементально: показания с id больше последнего учтённого (last_id)
+    определяют затронутые счётчики и самый ранний затронутый месяц — только
+    эти строки свёртки пересчитываются (с ним и всеми последующими месяцами,
+    так как расход зависит от предыдущего показания). Строки, изменённые
+    на месте (upsert-импорт, исправление показания в боте), id не меняют —
+    их счётчики передаются в meters и пересчитываются за все месяцы.
+    Строки, удалённые без замены, подхватывает только full=True — полная пересборка.
+    """
+    source = SOURCES[name]
+    rollups = ConsumptionRollup.objects.using(using).filter(source=name)
+    meters = set(meters or ())
+    with transaction.atomic(using=using):
+        if full:
+            rollups.delete()
+            new = source.queryset(using)
+        else:
+            watermark = rollups.aggregate(last_id=Max("last_id"))["last_id"] or 0
+            new = source.queryset(using).filter(pk__gt=watermark)
+
+        # (счётчики, с какого месяца пересчитывать); None — все счётчики / все месяцы
+        plan = []
+        first = new.aggregate(first=Min(source.time))["first"]
+        if full:
+            if first is not None:
+                plan.append((None, None))
+        else:
+            if first is not None:
+                fresh = set(new.values_list(source.meter, flat=True)) - meters
+                plan += [(chunk, _month(first)) for chunk in batched(sorted(fresh), METER_CHUNK)]
+            plan += [(chunk, None) for chunk in batched(sorted(meters), METER_CHUNK)]
+        if not plan:
+            return 0
+
+        written = 0
+        for chunk, since in plan:
+            rows = aggregate(name, "meter", ROLLUP_PERIOD, using, meters=chunk, since=since)
+            if chunk is not None:
+                stale = rollups.filter(meter_id__in=chunk)
+                if since is not None:
+                    stale = stale.filter(period__gte=since)
+                stale.delete()
+            ConsumptionRollup.objects.using(using).bulk_create(
+                [
+                    ConsumptionRollup(
+                        source=name,
+                        meter_id=int(row["key"]),
+                        account=row["account"],
+                        sector=row["sector"],
+                        period=row["period"],
+                        readings=row["readings"],
+                        total=row["sum"],
+                        min_value=row["min"],
+                        max_value=row["max"],
+                        last_value=row["last"],
+                        delta=row["delta"],
+                        last_id=row["last_id"],
+                    )
+                    for row in rows
+                ],
+                batch_size=DEFAULT_BATCH_SIZE,
+            )
+            written += len(rows)
+        touch_tables(using, ConsumptionRollup)
+    return written
+
+
+def refresh_for_model(model, using: str = "meter", updated=()) -> int:
+    """
+    Инкрементально обновляет свёртки всех источников, которые читают таблицу model.
+    updated — ключи строк, изменённых на месте (словари поле → значение,
+    BaseLoader.updated_keys): их счётчики пересчитываются целиком.
+    """
+    return sum(
+        refresh_rollup(
+            name, using=using,
+            meters={row[source.meter] for row in updated if source.meter in row},
+        )
+        for name, source in SOURCES.items() if source.model is model
+    )
@@ -0,0 +1,104 @@
+import csv
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+# Доля строк Readings_SU, нарушающих регламент (уходят в Incorrect)
+INVALID_SHARE = 0.1
+
+
+def _meters_info(i, rnd):
+    return {
+        "Абонент": str(100000 + i),
+        "ЛС": str(200000 + i),
+        "Л.с.": str(200000 + i),
+        "Номер": str(1 + i % 300),
+        "Кв": str(1 + i % 120),
+        "Номер водомера": f"{i:08d}",
+        "Показание": str(rnd.randint(0, 9999)),
+        "Код ИПУ": str(600000 + i),
+    }
+
+
+def _readings_su(i, rnd):
+    invalid = rnd.random() < INVALID_SHARE
+    value = rnd.choice(("0", "-1.000", "45.000")) if invalid else f"{rnd.uniform(0.001, 30):.3f}"
+    rdate = date(2025, 1, 1) + timedelta(days=i % 365)
+    return {
+        "AbonentId": str(100000 + i),
+        "AccountId": str(200000 + i),
+        "PointNum": str(1 + i % 4),
+        "RDate": rdate.strftime("%Y%m%d"),
+        "RValue": value,
+        "MeterId": str(700000 + i),
+    }
+
+
+def _energo_devices(i, rnd):
+    return {"id": str(i + 1), "device_id": str(5000 + i), "serial_num": f"SN{i:08d}"}
+
+
+def _energo_device_data(i, rnd):
+    return {
+        "id": str(i + 1),
+        "value": f"{rnd.uniform(0, 1000):.3f}",
+        "rvalue_id": str(i),
+        "device_id": str(5000 + i % 1000),
+    }
+
+
+def _iot_meters(i, rnd):
+    return {
+        "id": str(i + 1),
+        "modem_id": str(300 + i // 8),
+        "port": str(i % 8),
+        "serial_number": f"IOTSN{i:08d}",
+        "last_reading": f"{rnd.uniform(0, 1000):.2f}",
+    }
+
+
+def _iot_meter_data(i, rnd):
+    return {
+        "id": str(i + 1),
+        "reading": f"{rnd.uniform(0, 1000):.3f}",
+        "meter_id": str(1 + i % 1000),
+    }
+
+
+# Набор данных → (образец из fixtures, разделитель, изменяемые колонки строки i)
+DATASETS = {
+    "meters_info":        ("karwater/MetersInfo.txt",        "\t", _meters_info),
+    "readings_su":        ("karwater/Readings_SU.csv",       ";",  _readings_su),
+    "energo_devices":     ("energo/energo_devices.csv",      ",",  _energo_devices),
+    "energo_device_data": ("energo/energo_device_data.csv",  ",",  _energo_device_data),
+    "iot_meters":         ("iot/iot_meters.csv",             ",",  _iot_meters),
+    "iot_meter_data":     ("iot/iot_meter_data.csv",         ",",  _iot_meter_data),
+}
+
+
+def write_dataset(name: str, rows: int, path: str = None, seed: int = 0) -> str:
+    """
+    Пишет синтетический файл набора name на rows строк и возвращает путь к нему.
+    Первая строка образца из fixtures берётся шаблоном, у каждой строки
+    меняются ключевые колонки, так что естественные ключи не повторяются.
+    """
+    sample, delimiter, vary = DATASETS[name]
+    with open(os.path.join(FIXTURES, sample), encoding="utf-8", newline="") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader)
+        template = next(reader)
+
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix=f"{name}-", suffix=os.path.splitext(sample)[1])
+        os.close(fd)
+    rnd = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter=delimiter, lineterminator="\n")
+        writer.writerow(header)
+        for i in range(rows):
+            values = vary(i, rnd)
+            writer.writerow([values.get(col, default) for col, default in zip(header, template)])
+    return path
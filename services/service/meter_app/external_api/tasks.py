@@ -1,26 +1,39 @@
 # meter_app/external_api/tasks.py
 from celery import shared_task
-import asyncio
-from .karWater import KaragandaWater
-from .parser import parse_meters_info, parse_readings_su
+from .orchestrator import DEFAULT_WORKERS, run_import, run_stream_import
+from .parser import DEFAULT_BATCH_SIZE
+from .rollup import has_rollup, refresh_rollup
 
-# @shared_task
-# def import_from_karagandawater():
-#     prov = KaragandaWater()
-#     loop = asyncio.get_event_loop()
 
-#     raw_info = loop.run_until_complete(prov.fetch_meters_info())
-#     parse_meters_info(raw_info)
+@shared_task
+def import_from_karagandawater(batch_size: int = DEFAULT_BATCH_SIZE, loader: str = "upsert", delta: bool = True):
+    if delta:
+        # расписание срабатывает 1–5 числа: неизменённые файлы пропускаем по журналу
+        results = run_import(["karagandawater"], loader=loader, delta=True, workers=1)
+        report = "; ".join(f"{r['kind']}: {r['detail']}" for r in results)
+        return f"Imported from karagandawater ({report})"
+
+    # MetersInfo читаем потоково: ежемесячная выгрузка ЕРЦ не помещается в память целиком
+    results = run_stream_import("karagandawater", loader=loader, batch_size=batch_size)
+    report = "; ".join(f"{r['kind']}: {r['detail']}" for r in results)
+    return f"Imported from karagandawater ({report})"
+
+
+@shared_task
+def import_all_providers(loader: str = "upsert", delta: bool = True, workers: int = DEFAULT_WORKERS):
+    # файлы всех провайдеров забираются одновременно, запись — в пуле потоков
+    results = run_import(loader=loader, delta=delta, workers=workers)
+    report = "; ".join(
+        f"{r['provider']}/{r['kind']}: {r['detail'] if r['ok'] else 'ОШИБКА ' + r['detail']}"
+        for r in results
+    )
+    return f"Imported from all providers ({report})"
 
-#     raw_su   = loop.run_until_complete(prov.fetch_readings_su())
-#     parse_readings_su(raw_su)
 
 @shared_task
-def import_from_karagandawater():
-    loop = asyncio.new_event_loop()
-    prov = KaragandaWater()
-    raw_info = loop.run_until_complete(prov.fetch_meters_info())
-    parse_meters_info(raw_info)
-    raw_su = loop.run_until_complete(prov.fetch_readings_su())
-    parse_readings_su(raw_su)
-    return f"Imported from {prov.name}"
\ No newline at end of file
+def refresh_rollup_meters(name: str, meters: list):
+    # строки, исправленные на месте (бот), инкрементальное обновление не видит;
+    # свёртку, которой ещё нет, соберёт refresh_rollups целиком
+    if not has_rollup(name):
+        return 0
+    return refresh_rollup(name, meters=meters)
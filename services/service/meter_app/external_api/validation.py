@@ -0,0 +1,183 @@
+import numpy as np
+
+from meter_app.external_api.ledger import row_fingerprint
+
+# Колонки Readings_SU.csv в порядке READINGS_SU_FIELDS
+READINGS_SU_COLUMNS = ("AbonentId", "AccountId", "PointNum", "RDate", "RValue", "MeterId")
+ID_COLUMNS = ("AbonentId", "AccountId", "PointNum", "MeterId")
+
+# Границы показания по регламенту: 0 < RValue <= 30
+RVALUE_MIN = 0
+RVALUE_MAX = 30
+
+# Пределы колонок Incorrect: IntegerField и DecimalField(12, 3)
+INT_MAX = 2 ** 31 - 1
+DECIMAL_MAX = 10 ** 9
+
+
+def _codes(values):
+    """
+    Коды символов строк (UCS-4) матрицей «строки × ширина», хвост добит нулями.
+    """
+    values = np.asarray(values, dtype=str)
+    width = max(values.dtype.itemsize // 4, 1)
+    return values.view(np.uint32).reshape(len(values), width)
+
+
+def _ascii_digit(codes):
+    return (codes >= ord("0")) & (codes <= ord("9"))
+
+
+def _int_mask(values):
+    """
+    Маска «целое число в пределах IntegerField» по строковой колонке:
+    ^[+-]?[0-9]{1,10}$ — не больше одного знака и только цифры ASCII
+    (isdigit пропустил бы «²», которую потом не примут int() и БД).
+    """
+    codes = _codes(values)
+    digit = _ascii_digit(codes)
+    sign = (codes[:, 0] == ord("+")) | (codes[:, 0] == ord("-"))
+    length = np.char.str_len(values) - sign
+    ok = (
+        (sign | digit[:, 0])
+        & (digit | (codes == 0))[:, 1:].all(axis=1)
+        & (length > 0) & (length <= 10)
+    )
+    # в int приводим только 10-значные — остальные заведомо в пределах
+    long = ok & (length == 10)
+    if long.any():
+        ok[long] = np.abs(values[long].astype(np.int64)) <= INT_MAX
+    return ok
+
+
+def _date_mask(values):
+    """
+    Маска «корректная дата YYYYMMDD». Цифры разбираются матрицей байтов,
+    без преобразования каждой строки.
+    """
+    codes = _codes(values)
+    ok = (np.char.str_len(values) == 8) & (_ascii_digit(codes) | (codes == 0)).all(axis=1)
+    if not ok.any():
+        return ok
+    d = np.frombuffer(values[ok].astype("S8").tobytes(), dtype=np.uint8).reshape(-1, 8).astype(np.int64) - 48
+    year = d[:, 0] * 1000 + d[:, 1] * 100 + d[:, 2] * 10 + d[:, 3]
+    month = d[:, 4] * 10 + d[:, 5]
+    day = d[:, 6] * 10 + d[:, 7]
+    valid = (year >= 1) & (month >= 1) & (month <= 12)
+    months = np.where(valid, (year - 1970) * 12 + month - 1, 0).astype("datetime64[M]")
+    days_in_month = ((months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")).astype(np.int64)
+    ok[ok] = valid & (day >= 1) & (day <= days_in_month)
+    return ok
+
+
+def _float_column(values):
+    """
+    Строки → float64; нечисловые значения (и пустые) → NaN.
+    """
+    try:
+        return values.astype(np.float64)
+    except ValueError:
+        def to_float(v):
+            try:
+                return float(v)
+            except ValueError:
+                return np.nan
+        return np.fromiter((to_float(v) for v in values), dtype=np.float64, count=len(values))
+
+
+def read_columns(rows, header):
+    """
+    Раскладывает строки csv (списки значений) в словарь «колонка → массив»:
+    исходные строки ("RValue"), показание числом ("RValue:float")
+    и маски разбора ("AccountId:ok", "RDate:ok").
+    """
+    width = len(header)
+    table = np.array(
+        [r if len(r) == width else (r + [""] * width)[:width] for r in rows], dtype=str,
+    ).reshape(len(rows), width)
+    cols = {}
+    for name in READINGS_SU_COLUMNS:
+        if name in header:
+            cols[name] = np.char.strip(table[:, header.index(name)])
+        else:
+            cols[name] = np.full(len(rows), "", dtype=str)
+    for name in ID_COLUMNS:
+        cols[f"{name}:ok"] = _int_mask(cols[name])
+    cols["RDate:ok"] = _date_mask(cols["RDate"])
+    cols["RValue:float"] = _float_column(cols["RValue"])
+    return cols
+
+
+def _ids_valid(cols):
+    return np.logical_and.reduce([cols[f"{name}:ok"] for name in ID_COLUMNS])
+
+
+def _rdate_valid(cols):
+    return cols["RDate:ok"]
+
+
+def _rvalue_valid(cols):
+    value = cols["RValue:float"]
+    # NaN не проходит ни одно сравнение — нечисловое значение тоже нарушение
+    return (value > RVALUE_MIN) & (value <= RVALUE_MAX)
+
+
+# Правила регламента: (код причины, описание, функция маски допустимых строк).
+# Новое правило — ещё одна строка здесь.
+RULES = (
+    ("bad_id",       "Идентификатор не целое число", _ids_valid),
+    ("bad_rdate",    "Некорректная дата RDate",      _rdate_valid),
+    ("rvalue_range", "Не по регламенту",             _rvalue_valid),
+)
+
+
+def validate(cols):
+    """
+    Применяет RULES к пакету. Возвращает (маска годных строк,
+    [(код, описание, маска нарушений), ...]).
+    """
+    n = len(cols["RValue"])
+    good = np.ones(n, dtype=bool)
+    failures = []
+    for code, message, rule in RULES:
+        failed = ~rule(cols)
+        if failed.any():
+            failures.append((code, message, failed))
+            good &= ~failed
+    return good, failures
+
+
+def _nullable(values, ok):
+    # значения, которые не разобрались, уходят в Incorrect как NULL
+    return [v if o else None for v, o in zip(values.tolist(), ok.tolist())]
+
+
+def split_batch(rows, header):
+    """
+    Проверяет пакет строк Readings_SU.csv. Возвращает (good, bad):
+    кортежи READINGS_SU_FIELDS и кортежи INCORRECT_FIELDS с отпечатком
+    строки файла и причиной вида «код: описание» (несколько нарушений — через «; »).
+    """
+    cols = read_columns(rows, header)
+    good, failures = validate(cols)
+
+    # значения уходят в таблицы строками, как в файле: приведение типов делает БД
+    good_rows = list(zip(*(cols[name][good].tolist() for name in READINGS_SU_COLUMNS)))
+
+    bad = ~good
+    if not bad.any():
+        return good_rows, []
+    reasons = [[] for _ in range(int(bad.sum()))]
+    for code, message, failed in failures:
+        for j in np.flatnonzero(failed[bad]).tolist():
+            reasons[j].append(f"{code}: {message}")
+
+    value = cols["RValue:float"]
+    parsed = dict(cols)
+    parsed["RValue:ok"] = np.isfinite(value) & (np.abs(value) < DECIMAL_MAX)
+    bad_rows = list(zip(
+        *(_nullable(cols[name][bad], parsed[f"{name}:ok"][bad]) for name in READINGS_SU_COLUMNS),
+        (row_fingerprint(rows[i]) for i in np.flatnonzero(bad).tolist()),
+        ("; ".join(reason) for reason in reasons),
+    ))
+    return good_rows, bad_rows
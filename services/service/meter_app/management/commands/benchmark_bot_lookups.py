@@ -0,0 +1,61 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from meter_app.external_api.benchmark import close_sqlite_database, sqlite_database
+from meter_app.external_api.bot_benchmark import BOT_MODELS, run_lookup_benchmark
+from meter_app.management.commands.benchmark_import import scale
+
+
+class Command(BaseCommand):
+    help = "Бенчмарк поисков ботов по таблицам users/readings/seals/meters/user_areas: с индексами и без"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=scale, default=10_000,
+            help="Сколько синтетических абонентов (10k, 100k); по умолчанию 10k",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=200,
+            help="Сколько раз выполнить каждый поиск (по умолчанию 200)",
+        )
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument(
+            "--database",
+            help="Псевдоним БД из settings; данные и снятие индексов откатываются, "
+                 "но таблицы заблокированы до конца прогона — не запускайте на рабочей базе",
+        )
+        target.add_argument(
+            "--sqlite", metavar="PATH", default=":memory:",
+            help="Прогон на SQLite (файл или :memory:, по умолчанию)",
+        )
+        parser.add_argument("--json", metavar="PATH", help="Сохранить результаты в JSON")
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING(
+                "DEBUG=True: Django запоминает каждый запрос — время будет завышено"
+            ))
+        using = options["database"] or sqlite_database(options["sqlite"], models=BOT_MODELS)
+        vendor = connections[using].vendor
+        try:
+            results = run_lookup_benchmark(users=options["users"], repeat=options["repeat"], using=using)
+        finally:
+            if not options["database"]:
+                close_sqlite_database()
+
+        self.stdout.write(f"{'поиск':<18}{'без индексов, мс':>18}{'с индексами, мс':>18}{'ускорение':>11}")
+        for r in results:
+            self.stdout.write(
+                f"{r['lookup']:<18}{r['before_ms']:>18.3f}{r['after_ms']:>18.3f}"
+                f"{r['speedup'] or 0:>10.1f}×"
+            )
+
+        if options["json"]:
+            with open(options["json"], "w", encoding="utf-8") as f:
+                json.dump(
+                    {"database": vendor, "users": options["users"], "results": results},
+                    f, ensure_ascii=False, indent=2,
+                )
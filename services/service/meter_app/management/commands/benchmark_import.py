@@ -0,0 +1,95 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from meter_app.external_api.benchmark import (
+    STAGES, close_sqlite_database, run_benchmark, sqlite_database,
+)
+from meter_app.external_api.loaders import LOADERS
+
+
+def scale(value: str) -> int:
+    """
+    10000, 10k, 1m → число строк.
+    """
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    try:
+        return int(value.rstrip("km")) * multiplier
+    except ValueError:
+        raise CommandError(f"Некорректный масштаб: {value}")
+
+
+class Command(BaseCommand):
+    help = "Бенчмарк импорта на синтетических данных: строк/с и пиковый RSS по этапам"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", action="append", type=scale,
+            help="Масштаб набора (10k, 100k, 1m); можно указать несколько раз. По умолчанию 10k",
+        )
+        parser.add_argument(
+            "--dataset", action="append", choices=sorted(STAGES),
+            help="Какие наборы прогонять; по умолчанию все",
+        )
+        parser.add_argument(
+            "--loader", action="append", choices=sorted(LOADERS),
+            help="Загрузчики для этапа записи; по умолчанию все, что поддерживает БД",
+        )
+        target = parser.add_mutually_exclusive_group()
+        target.add_argument(
+            "--database", default="meter",
+            help="Псевдоним БД из settings (по умолчанию meter); запись откатывается",
+        )
+        target.add_argument(
+            "--sqlite", metavar="PATH",
+            help="Прогон на SQLite (файл или :memory:) — быстрая проверка без PostgreSQL",
+        )
+        parser.add_argument(
+            "--parse-workers", type=int, default=1,
+            help="Сколько процессов разбирают файл на этапе записи (по умолчанию 1)",
+        )
+        parser.add_argument("--json", metavar="PATH", help="Сохранить результаты в JSON")
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING(
+                "DEBUG=True: Django запоминает каждый запрос — время и RSS будут завышены"
+            ))
+        using = sqlite_database(options["sqlite"]) if options["sqlite"] else options["database"]
+        vendor = connections[using].vendor
+        try:
+            loaders = options["loader"]
+            if not loaders:
+                loaders = ["orm"]
+                if vendor == "postgresql":
+                    loaders += ["copy", "upsert"]
+
+            self.stdout.write(
+                f"{'набор':<20}{'строк':>9}  {'этап':<12}{'сек':>9}{'строк/с':>11}{'RSS, МБ':>10}"
+            )
+            results = []
+            for r in run_benchmark(
+                datasets=options["dataset"] or sorted(STAGES),
+                scales=options["rows"] or [10_000],
+                loaders=loaders,
+                using=using,
+                parse_workers=options["parse_workers"],
+            ):
+                results.append(r)
+                if "skipped" in r:
+                    self.stdout.write(f"{r['dataset']:<20}{r['rows']:>9}  {r['stage']:<12}  пропущен: {r['skipped']}")
+                    continue
+                self.stdout.write(
+                    f"{r['dataset']:<20}{r['rows']:>9}  {r['stage']:<12}"
+                    f"{r['seconds']:>9.2f}{r['rows_per_s'] or 0:>11}{r['peak_rss_mb']:>10.1f}"
+                )
+        finally:
+            if options["sqlite"]:
+                close_sqlite_database()
+
+        if options["json"]:
+            with open(options["json"], "w", encoding="utf-8") as f:
+                json.dump({"database": vendor, "results": results}, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,8 @@
+from meter_app.management.commands.import_provider import Command as ImportProviderCommand
+
+class Command(ImportProviderCommand):
+    help = "Параллельный импорт из всех провайдеров (то же, что import_provider --all)"
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(all=True)
@@ -1,27 +1,29 @@
-import asyncio
-from django.core.management.base import BaseCommand, CommandError
+from django.core.management.base import CommandError
 
-from meter_app.external_api.karWater import KaragandaWater
-from meter_app.external_api.parser import parse_meters_info, parse_readings_su
+from meter_app.external_api.orchestrator import run_stream_import
+from meter_app.external_api.parser import DEFAULT_BATCH_SIZE
+from meter_app.management.commands.import_provider import Command as ImportProviderCommand
 
-class Command(BaseCommand):
+class Command(ImportProviderCommand):
     help = "Импорт данных MetersInfo и Readings_SU из провайдера KaragandaWater"
+    provider = "karagandawater"
 
-    def handle(self, *args, **options):
-        self.stdout.write("Запуск импорта из KaragandaWater…")
-        prov = KaragandaWater()
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            raw_info = loop.run_until_complete(prov.fetch_meters_info())
-            parse_meters_info(raw_info)
-            self.stdout.write(self.style.SUCCESS("  • MetersInfo импортированы."))
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--stream", action="store_true",
+            help="Читать MetersInfo построчно и сохранять пакетами (для больших выгрузок ЕРЦ)",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+            help=f"Размер пакета в потоковом режиме (по умолчанию {DEFAULT_BATCH_SIZE})",
+        )
 
-            raw_su = loop.run_until_complete(prov.fetch_readings_su())
-            parse_readings_su(raw_su)
-            self.stdout.write(self.style.SUCCESS("  • Readings_SU импортированы."))
-
-        except Exception as e:
-            raise CommandError(f"Ошибка импорта: {e}")
-        finally:
-            loop.close()
+    def run_import(self, names, workers, options):
+        if not options["stream"]:
+            return super().run_import(names, workers, options)
+        if options["delta"]:
+            raise CommandError("--stream и --delta нельзя указывать вместе")
+        return run_stream_import(
+            self.provider, loader=options["loader"], batch_size=options["batch_size"],
+        )
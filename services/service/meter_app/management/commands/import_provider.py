@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from meter_app.external_api.loaders import LOADERS
+from meter_app.external_api.orchestrator import DEFAULT_WORKERS, run_import
+from meter_app.external_api.registry import provider_names
+
+class Command(BaseCommand):
+    help = "Импорт из зарегистрированного провайдера (или из всех — --all)"
+
+    # подклассы для конкретного провайдера задают его имя здесь
+    provider = None
+
+    def add_arguments(self, parser):
+        if self.provider is None:
+            parser.add_argument(
+                "name", nargs="?",
+                help=f"Имя провайдера: {', '.join(provider_names())}",
+            )
+            parser.add_argument(
+                "--all", action="store_true",
+                help="Импортировать все зарегистрированные провайдеры параллельно",
+            )
+        parser.add_argument(
+            "--loader", choices=sorted(LOADERS), default="upsert",
+            help="Способ записи в БД: upsert (по естественному ключу, по умолчанию), "
+                 "orm (bulk_create) или copy (PostgreSQL COPY)",
+        )
+        parser.add_argument(
+            "--delta", action="store_true",
+            help="Дельта-импорт по журналу: неизменённый файл пропускается, "
+                 "пишутся только новые, изменённые и удалённые строки",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help=f"Сколько файлов разбирать и записывать одновременно "
+                 f"(по умолчанию {DEFAULT_WORKERS} для --all, иначе 1)",
+        )
+        parser.add_argument(
+            "--parse-workers", type=int, default=1,
+            help="Сколько процессов разбирают один файл (по умолчанию 1 — без пула)",
+        )
+
+    def get_names(self, options):
+        if self.provider is not None:
+            return [self.provider]
+        if options["all"]:
+            if options["name"]:
+                raise CommandError("Укажите имя провайдера или --all, но не оба сразу")
+            return None
+        if not options["name"]:
+            raise CommandError("Укажите имя провайдера или --all")
+        if options["name"] not in provider_names():
+            raise CommandError(
+                f"Неизвестный провайдер: {options['name']} (доступны: {', '.join(provider_names())})"
+            )
+        return [options["name"]]
+
+    def run_import(self, names, workers, options):
+        return run_import(
+            names, loader=options["loader"], delta=options["delta"], workers=workers,
+            parse_workers=options["parse_workers"],
+        )
+
+    def handle(self, *args, **options):
+        names = self.get_names(options)
+        workers = options["workers"] or (DEFAULT_WORKERS if names is None else 1)
+        started = time.monotonic()
+        results = self.run_import(names, workers, options)
+        for r in results:
+            line = f"  • {r['provider']}/{r['kind']}: {r['detail']}"
+            if "seconds" in r:
+                line += f" ({r['seconds']} с)"
+            self.stdout.write(self.style.SUCCESS(line) if r["ok"] else self.style.ERROR(line))
+
+        failed = [r for r in results if not r["ok"]]
+        if failed:
+            raise CommandError(f"Импорт завершён с ошибками: {len(failed)} из {len(results)} файлов")
+        self.stdout.write(self.style.SUCCESS(f"Импорт завершён за {time.monotonic() - started:.2f} с."))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import NotSupportedError
+
+from meter_app.external_api.partitions import (
+    ARCHIVE_SCHEMA, PARTITIONED, PARTITIONS_AHEAD, detach_partitions, ensure_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Помесячные секции iot_meter_data и energo_device_data: создаёт секции "
+        "наперёд и отсоединяет старые (PostgreSQL)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "tables", nargs="*", metavar="table",
+            help=f"Таблицы: {', '.join(sorted(PARTITIONED))}; по умолчанию все",
+        )
+        parser.add_argument(
+            "--ahead", type=int, default=PARTITIONS_AHEAD,
+            help=f"На сколько месяцев вперёд создать секции (по умолчанию {PARTITIONS_AHEAD})",
+        )
+        parser.add_argument(
+            "--retain-months", type=int,
+            help="Сколько полных месяцев до текущего хранить; более старые секции отсоединяются",
+        )
+        parser.add_argument(
+            "--drop", action="store_true",
+            help=f"Удалять отсоединённые секции, а не переносить в схему {ARCHIVE_SCHEMA}",
+        )
+        parser.add_argument("--database", default="meter", help="Псевдоним БД (по умолчанию meter)")
+
+    def handle(self, *args, **options):
+        unknown = [name for name in options["tables"] if name not in PARTITIONED]
+        if unknown:
+            raise CommandError(f"Неизвестные таблицы: {', '.join(unknown)}")
+        if options["retain_months"] is not None and options["retain_months"] < 1:
+            raise CommandError("--retain-months должно быть не меньше 1")
+
+        for table in options["tables"] or sorted(PARTITIONED):
+            try:
+                created = ensure_partitions(table, ahead=options["ahead"], using=options["database"])
+                detached = []
+                if options["retain_months"] is not None:
+                    detached = detach_partitions(
+                        table, options["retain_months"], drop=options["drop"], using=options["database"],
+                    )
+            except NotSupportedError as e:
+                raise CommandError(str(e))
+            self.stdout.write(
+                f"  • {table}: создано {', '.join(created) or '—'}; "
+                f"{'удалено' if options['drop'] else 'в архиве'} {', '.join(detached) or '—'}"
+            )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from meter_app.external_api.accounts import ACCOUNT_INDEXES, publish_refresh
+
+
+class Command(BaseCommand):
+    help = "Просит все процессы ботов перечитать индексы ЛС (после правки meters/users: импорт их не пишет)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "indexes", nargs="*", metavar="index",
+            help=f"Индексы: {', '.join(sorted(ACCOUNT_INDEXES))}; по умолчанию все",
+        )
+
+    def handle(self, *args, **options):
+        unknown = [name for name in options["indexes"] if name not in ACCOUNT_INDEXES]
+        if unknown:
+            raise CommandError(f"Неизвестные индексы: {', '.join(unknown)}")
+        publish_refresh(*options["indexes"])
+        self.stdout.write(f"  • перечитать: {', '.join(options['indexes'] or sorted(ACCOUNT_INDEXES))}")
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from meter_app.external_api.rollup import SOURCES, refresh_rollup
+
+
+class Command(BaseCommand):
+    help = "Обновляет помесячные свёртки показаний (ConsumptionRollup)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "sources", nargs="*", metavar="source",
+            help=f"Источники: {', '.join(sorted(SOURCES))}; по умолчанию все",
+        )
+        parser.add_argument(
+            "--full", action="store_true",
+            help="Пересобрать свёртку целиком (учитывает и удалённые показания)",
+        )
+        parser.add_argument("--database", default="meter", help="Псевдоним БД (по умолчанию meter)")
+
+    def handle(self, *args, **options):
+        unknown = [name for name in options["sources"] if name not in SOURCES]
+        if unknown:
+            raise CommandError(f"Неизвестные источники: {', '.join(unknown)}")
+        for name in options["sources"] or sorted(SOURCES):
+            started = time.perf_counter()
+            rows = refresh_rollup(name, full=options["full"], using=options["database"])
+            self.stdout.write(f"  • {name}: {rows} строк свёртки ({time.perf_counter() - started:.3f} с)")
@@ -0,0 +1,49 @@
+import logging
+
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+# Модель → естественный ключ, на который 0004 ставит уникальное ограничение
+KEYS = (
+    ("ErcData",    ("entity", "meter_id")),
+    ("ReadingsSU", ("account_id", "meter_id", "rdate")),
+)
+
+
+def dedupe(apps, schema_editor):
+    """
+    До появления upsert каждый запуск импорта дописывал полную копию файлов:
+    на каждый естественный ключ остаётся одна (последняя по id) строка.
+    Строки с NULL в ключе не трогаются — ограничение считает их разными.
+    Сколько строк удалено, пишется в лог.
+    """
+    quote = schema_editor.quote_name
+    for name, keys in KEYS:
+        model = apps.get_model("meter_app", name)
+        table = model._meta.db_table
+        columns = [quote(model._meta.get_field(key).column) for key in keys]
+        keyed = " AND ".join(f"{column} IS NOT NULL" for column in columns)
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE {keyed} AND id NOT IN ("
+                f"SELECT MAX(id) FROM {table} WHERE {keyed} GROUP BY {', '.join(columns)})"
+            )
+            removed = cursor.rowcount
+        if removed:
+            logger.warning("%s: удалено дублей естественного ключа: %d", table, removed)
+
+
+class Migration(migrations.Migration):
+    """
+    Данные: удаление дублей перед уникальными ключами миграции 0004.
+    Необратима — удалённые копии не восстанавливаются, откат ничего не делает.
+    """
+
+    dependencies = [
+        ('meter_app', '0003_area_controller_address_userarea'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.5 on 2026-10-18 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meter_app', '0003_dedupe_natural_keys'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='ercdata',
+            constraint=models.UniqueConstraint(fields=('entity', 'meter_id'), name='erc_data_entity_meter_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='readingssu',
+            constraint=models.UniqueConstraint(fields=('account_id', 'meter_id', 'rdate'), name='readings_su_account_meter_rdate_uniq'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.5 on 2026-10-18 13:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meter_app', '0004_erc_readings_natural_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportLedgerRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=50, verbose_name='Провайдер')),
+                ('kind', models.CharField(max_length=50, verbose_name='Файл')),
+                ('row_key', models.CharField(max_length=255, verbose_name='Ключ строки')),
+                ('row_hash', models.CharField(max_length=64, verbose_name='Хэш строки')),
+            ],
+            options={
+                'verbose_name': 'Строка журнала импорта',
+                'verbose_name_plural': 'Строки журнала импорта',
+                'db_table': '"public"."import_ledger_rows"',
+                'unique_together': {('provider', 'kind', 'row_key')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=50, verbose_name='Провайдер')),
+                ('kind', models.CharField(max_length=50, verbose_name='Файл')),
+                ('payload_hash', models.CharField(max_length=64, verbose_name='Хэш файла')),
+                ('rows', models.IntegerField(default=0, verbose_name='Строк в файле')),
+                ('imported_at', models.DateTimeField(auto_now=True, verbose_name='Импортирован')),
+            ],
+            options={
+                'verbose_name': 'Журнал импорта',
+                'verbose_name_plural': 'Журнал импорта',
+                'db_table': '"public"."import_ledger"',
+                'unique_together': {('provider', 'kind')},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.5 on 2026-10-18 13:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meter_app', '0005_import_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=50, verbose_name='Провайдер')),
+                ('kind', models.CharField(max_length=50, verbose_name='Файл')),
+                ('loader', models.CharField(max_length=20, verbose_name='Загрузчик')),
+                ('delta', models.BooleanField(default=False, verbose_name='Дельта-импорт')),
+                ('status', models.CharField(choices=[('ok', 'Успешно'), ('skipped', 'Файл не изменился'), ('error', 'Ошибка')], max_length=10, verbose_name='Статус')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Ошибка')),
+                ('started_at', models.DateTimeField(verbose_name='Начало')),
+                ('finished_at', models.DateTimeField(verbose_name='Окончание')),
+                ('fetch_seconds', models.FloatField(default=0, verbose_name='Получение, с')),
+                ('decode_seconds', models.FloatField(default=0, verbose_name='Декодирование, с')),
+                ('diff_seconds', models.FloatField(default=0, verbose_name='Сравнение с журналом, с')),
+                ('parse_seconds', models.FloatField(default=0, verbose_name='Разбор, с')),
+                ('validate_seconds', models.FloatField(default=0, verbose_name='Проверка, с')),
+                ('write_seconds', models.FloatField(default=0, verbose_name='Запись, с')),
+                ('bytes', models.BigIntegerField(default=0, verbose_name='Размер файла, байт')),
+                ('rows_in', models.IntegerField(default=0, verbose_name='Строк в файле')),
+                ('rows_out', models.IntegerField(default=0, verbose_name='Записано строк')),
+                ('rows_rejected', models.IntegerField(default=0, verbose_name='Отклонено строк')),
+                ('batches', models.IntegerField(default=0, verbose_name='Пакетов')),
+            ],
+            options={
+                'verbose_name': 'Прогон импорта',
+                'verbose_name_plural': 'Прогоны импорта',
+                'db_table': '"public"."import_runs"',
+                'ordering': ('-started_at',),
+                'indexes': [models.Index(fields=['provider', 'kind', '-started_at'], name='import_runs_provider_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.5 on 2026-10-18 13:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meter_app', '0006_import_run'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='energodevicedata',
+            index=models.Index(fields=['datetime', 'id'], name='energo_data_datetime_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='iotmeterdata',
+            index=models.Index(fields=['dt', 'id'], name='iot_meter_data_dt_id_idx'),
+        ),
+    ]
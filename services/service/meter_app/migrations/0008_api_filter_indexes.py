@@ -0,0 +1,61 @@
+# Generated by Django 4.2.5 on 2026-10-18 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meter_app', '0007_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='energodevice',
+            index=models.Index(fields=['device_id'], name='energo_devices_device_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energodevice',
+            index=models.Index(fields=['account'], name='energo_devices_account_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energodevice',
+            index=models.Index(fields=['folder_id'], name='energo_devices_folder_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energodevicedata',
+            index=models.Index(fields=['device_id', 'datetime', 'id'], name='energo_data_device_dt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ercdata',
+            index=models.Index(fields=['meter_id'], name='erc_data_meter_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ercdata',
+            index=models.Index(fields=['abonent'], name='erc_data_abonent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='iotmeter',
+            index=models.Index(fields=['modem_id', 'port'], name='iot_meters_modem_port_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='iotmeter',
+            index=models.Index(fields=['account_id'], name='iot_meters_account_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='iotmeterdata',
+            index=models.Index(fields=['meter_id', 'dt', 'id'], name='iot_meter_data_meter_dt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='readingssu',
+            index=models.Index(fields=['meter_id', 'rdate'], name='readings_su_meter_rdate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='readingssu',
+            index=models.Index(fields=['abonent_id'], name='readings_su_abonent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='readingssu',
+            index=models.Index(fields=['rdate'], name='readings_su_rdate_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.5 on 2026-10-18 13:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meter_app', '0008_api_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumptionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=20, verbose_name='Источник')),
+                ('meter_id', models.BigIntegerField(verbose_name='Счётчик')),
+                ('account', models.CharField(blank=True, default='', max_length=64, verbose_name='Лицевой счёт')),
+                ('sector', models.CharField(blank=True, default='', max_length=64, verbose_name='Участок')),
+                ('period', models.DateField(verbose_name='Месяц')),
+                ('readings', models.IntegerField(verbose_name='Показаний')),
+                ('total', models.DecimalField(decimal_places=6, max_digits=20, verbose_name='Сумма')),
+                ('min_value', models.DecimalField(decimal_places=6, max_digits=20, verbose_name='Минимум')),
+                ('max_value', models.DecimalField(decimal_places=6, max_digits=20, verbose_name='Максимум')),
+                ('last_value', models.DecimalField(decimal_places=6, max_digits=20, verbose_name='Последнее')),
+                ('delta', models.DecimalField(blank=True, decimal_places=6, max_digits=20, null=True, verbose_name='Расход')),
+                ('last_id', models.BigIntegerField(verbose_name='Последний id исходной строки')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Свёртка показаний',
+                'verbose_name_plural': 'Свёртки показаний',
+                'db_table': '"public"."consumption_rollups"',
+                'indexes': [models.Index(fields=['source', 'account', 'period'], name='consumption_rollup_account_idx'), models.Index(fields=['source', 'sector', 'period'], name='consumption_rollup_sector_idx'), models.Index(fields=['source', 'last_id'], name='consumption_rollup_last_id_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='consumptionrollup',
+            constraint=models.UniqueConstraint(fields=('source', 'meter_id', 'period'), name='consumption_rollup_uniq'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.5 on 2026-10-18 13:41
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class AddIndexConcurrentlyOnPostgres(AddIndexConcurrently):
+    """
+    На PostgreSQL — CREATE INDEX CONCURRENTLY: таблицы, в которые пишут боты,
+    не блокируются на запись, пока строится индекс. На других СУБД — обычный AddIndex.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        return migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        return migrations.AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+    # CONCURRENTLY нельзя выполнять внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('meter_app', '0009_consumption_rollup'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name='meter',
+            index=models.Index(fields=['punumber'], name='meters_punumber_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='meteruser',
+            index=models.Index(fields=['number'], name='users_number_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='reading',
+            index=models.Index(fields=['user', 'punumber', '-createdate'], name='readings_user_pu_date_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='reading',
+            index=models.Index(fields=['user', 'punumber', 'yearmonth'], name='readings_user_pu_month_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='seal',
+            index=models.Index(fields=['user', 'scheduledate'], name='seals_user_date_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='seal',
+            index=models.Index(condition=models.Q(('status', 'new')), fields=['scheduledate', 'type'], name='seals_new_slot_idx'),
+        ),
+        AddIndexConcurrentlyOnPostgres(
+            model_name='userarea',
+            index=models.Index(fields=['area', 'user'], name='user_areas_area_user_idx'),
+        ),
+    ]
@@ -0,0 +1,139 @@
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import migrations
+from django.utils import timezone
+
+# Модель → столбец, по которому таблица режется на помесячные секции
+TABLES = (("IotMeterData", "dt"), ("EnergoDeviceData", "datetime"))
+
+# На сколько месяцев вперёд от текущего создаются секции
+PARTITIONS_AHEAD = 3
+
+# Миграция не импортирует код приложения: ниже — копия помощников
+# external_api/partitions.py на момент её написания.
+
+
+def table_name(model) -> str:
+    return model._meta.db_table.split(".")[-1].strip('"')
+
+
+def _qualified(name: str, schema: str = "public") -> str:
+    return f'"{schema}"."{name}"'
+
+
+def month_start(day) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def _bounds(month: date) -> tuple:
+    start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    end = add_months(month, 1)
+    return start, datetime(end.year, end.month, 1, tzinfo=dt_timezone.utc)
+
+
+def is_partitioned(cursor, table: str) -> bool:
+    cursor.execute(
+        "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE n.nspname = 'public' AND c.relname = %s",
+        [table],
+    )
+    row = cursor.fetchone()
+    return row is not None and row[0] == "p"
+
+
+def _carry_sequence(cursor, old_sequence, table: str):
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [f"public.{table}"])
+    (sequence,) = cursor.fetchone()
+    if sequence is None:
+        if old_sequence is not None:
+            cursor.execute(f'ALTER SEQUENCE {old_sequence} OWNED BY {_qualified(table)}."id"')
+        return
+    cursor.execute(
+        f"SELECT setval(%s, COALESCE((SELECT max(id) FROM {_qualified(table)}), 0) + 1, false)",
+        [sequence],
+    )
+
+
+def _rebuild_table(schema_editor, model, column: str, partitioned: bool, ahead: int):
+    table = table_name(model)
+    old = f"{table}_old"
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [f"public.{table}"])
+        (old_sequence,) = cursor.fetchone()
+        cursor.execute(f'ALTER TABLE {_qualified(table)} RENAME TO "{old}"')
+        cursor.execute(
+            f"CREATE TABLE {_qualified(table)} (LIKE {_qualified(old)} "
+            f"INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING STORAGE)"
+            + (f' PARTITION BY RANGE ("{column}")' if partitioned else "")
+        )
+        if partitioned:
+            cursor.execute(f'SELECT min("{column}"), max("{column}") FROM {_qualified(old)}')
+            first, last = cursor.fetchone()
+            current = month_start(timezone.now())
+            month = month_start(first) if first else current
+            last = max(month_start(last) if last else current, add_months(current, ahead))
+            while month <= last:
+                cursor.execute(
+                    f"CREATE TABLE {_qualified(partition_name(table, month))} "
+                    f"PARTITION OF {_qualified(table)} FOR VALUES FROM (%s) TO (%s)",
+                    _bounds(month),
+                )
+                month = add_months(month, 1)
+            cursor.execute(
+                f'CREATE TABLE {_qualified(table + "_default")} PARTITION OF {_qualified(table)} DEFAULT'
+            )
+        cursor.execute(f"INSERT INTO {_qualified(table)} SELECT * FROM {_qualified(old)}")
+        _carry_sequence(cursor, old_sequence, table)
+        cursor.execute(f"DROP TABLE {_qualified(old)}")
+        key = f'"id", "{column}"' if partitioned else '"id"'
+        cursor.execute(f'ALTER TABLE {_qualified(table)} ADD CONSTRAINT "{table}_pkey" PRIMARY KEY ({key})')
+    for index in model._meta.indexes:
+        schema_editor.execute(index.create_sql(model, schema_editor))
+
+
+def forwards(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, column in TABLES:
+        model = apps.get_model("meter_app", name)
+        with schema_editor.connection.cursor() as cursor:
+            if is_partitioned(cursor, table_name(model)):
+                continue
+        _rebuild_table(schema_editor, model, column, partitioned=True, ahead=PARTITIONS_AHEAD)
+
+
+def backwards(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, column in TABLES:
+        model = apps.get_model("meter_app", name)
+        with schema_editor.connection.cursor() as cursor:
+            if not is_partitioned(cursor, table_name(model)):
+                continue
+        _rebuild_table(schema_editor, model, column, partitioned=False, ahead=0)
+
+
+class Migration(migrations.Migration):
+    """
+    Только PostgreSQL: iot_meter_data и energo_device_data становятся
+    секционированными по месяцам (RANGE по dt / datetime). Строки
+    переносятся в секции, таблицы заблокированы до конца миграции.
+    Дальше секции ведёт команда manage_partitions.
+    """
+
+    dependencies = [
+        ('meter_app', '0010_bot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,129 @@
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+# Поля ErcData, которые из текста становятся типизированными
+TYPED = {
+    "registered_amount": models.IntegerField(blank=True, null=True),
+    "floor":             models.IntegerField(blank=True, null=True),
+    "bit_depth":         models.IntegerField(blank=True, null=True),
+    "tarif_water":       models.DecimalField(max_digits=14, decimal_places=3, blank=True, null=True),
+    "readings":          models.DecimalField(max_digits=14, decimal_places=3, blank=True, null=True),
+    "verification_date": models.DateField(blank=True, null=True),
+    "readings_date":     models.DateField(blank=True, null=True),
+    "seal_date":         models.DateField(blank=True, null=True),
+}
+
+BATCH_SIZE = 2000
+
+# Миграция не импортирует код приложения: ниже — копия преобразователей
+# ERC_DATA_TYPES из external_api/parser.py на момент её написания.
+
+
+def _parse_optional_int(value: str):
+    try:
+        number = int(value)
+    except ValueError:
+        return None
+    return number if -2**31 <= number < 2**31 else None
+
+
+def _parse_decimal(value: str):
+    try:
+        number = Decimal(value.replace(",", ".").replace(" ", ""))
+    except InvalidOperation:
+        return None
+    return number if number.is_finite() and abs(number) < 10**11 else None
+
+
+def _parse_date(value: str):
+    for fmt in ("%d.%m.%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            pass
+    return None
+
+
+CONVERTERS = {
+    "registered_amount": _parse_optional_int,
+    "floor":             _parse_optional_int,
+    "bit_depth":         _parse_optional_int,
+    "tarif_water":       _parse_decimal,
+    "readings":          _parse_decimal,
+    "verification_date": _parse_date,
+    "readings_date":     _parse_date,
+    "seal_date":         _parse_date,
+}
+
+
+def _canonical(field, raw):
+    """
+    Текст из старой колонки → текст, который СУБД приведёт к новому типу
+    (ISO-дата, число с точкой) или None, если значение не разбирается.
+    """
+    value = CONVERTERS[field]((raw or "").strip())
+    if value is None:
+        return None
+    if isinstance(value, Decimal):
+        return "{:f}".format(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def normalize_values(apps, schema_editor):
+    ErcData = apps.get_model("meter_app", "ErcData")
+    manager = ErcData.objects.using(schema_editor.connection.alias)
+    fields = list(TYPED)
+    changed = []
+    for pk, *raw in manager.values_list("pk", *fields).iterator(chunk_size=BATCH_SIZE):
+        values = {field: _canonical(field, value) for field, value in zip(fields, raw)}
+        if list(values.values()) != raw:
+            changed.append(ErcData(pk=pk, **values))
+        if len(changed) >= BATCH_SIZE:
+            manager.bulk_update(changed, fields)
+            changed = []
+    if changed:
+        manager.bulk_update(changed, fields)
+
+
+def restore_blanks(apps, schema_editor):
+    ErcData = apps.get_model("meter_app", "ErcData")
+    manager = ErcData.objects.using(schema_editor.connection.alias)
+    for field in TYPED:
+        manager.filter(**{f"{field}__isnull": True}).update(**{field: ""})
+
+
+class Migration(migrations.Migration):
+    """
+    Текстовые колонки ErcData с числами и датами становятся Integer/Decimal/Date.
+    Сначала колонки допускают NULL, значения приводятся к виду, который
+    понимает приведение типа в ALTER COLUMN (неразборчивые — NULL),
+    затем меняется тип.
+    """
+
+    dependencies = [
+        ('meter_app', '0011_partition_time_series'),
+    ]
+
+    operations = [
+        *(
+            migrations.AlterField(
+                model_name='ercdata',
+                name=name,
+                field=models.CharField(max_length=64, blank=True, null=True),
+            )
+            for name in TYPED
+        ),
+        migrations.RunPython(normalize_values, restore_blanks),
+        *(
+            migrations.AlterField(model_name='ercdata', name=name, field=field)
+            for name, field in TYPED.items()
+        ),
+        migrations.AddIndex(
+            model_name='ercdata',
+            index=models.Index(fields=['readings_date'], name='erc_data_readings_date_idx'),
+        ),
+    ]
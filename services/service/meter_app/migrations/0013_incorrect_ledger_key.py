@@ -0,0 +1,41 @@
+# Generated by Django 4.2.5 on 2026-10-18 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meter_app', '0012_erc_data_typed_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='incorrect',
+            name='kind',
+            field=models.CharField(blank=True, default='', max_length=50, verbose_name='Файл'),
+        ),
+        migrations.AddField(
+            model_name='incorrect',
+            name='provider',
+            field=models.CharField(blank=True, default='', max_length=50, verbose_name='Провайдер'),
+        ),
+        migrations.AddField(
+            model_name='incorrect',
+            name='row_hash',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Хэш строки'),
+        ),
+        migrations.AddField(
+            model_name='incorrect',
+            name='row_key',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Ключ строки'),
+        ),
+        migrations.AddIndex(
+            model_name='incorrect',
+            index=models.Index(fields=['provider', 'kind', 'row_key'], name='incorrect_ledger_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='incorrect',
+            index=models.Index(fields=['row_hash'], name='incorrect_row_hash_idx'),
+        ),
+    ]
@@ -125,6 +125,12 @@ class EnergoDevice(models.Model):
         db_table = '"public"."energo_devices"'
         verbose_name = 'Energo Device'
         verbose_name_plural = 'Energo Devices'
+        indexes = [
+            # фильтры API
+            models.Index(fields=["device_id"], name="energo_devices_device_id_idx"),
+            models.Index(fields=["account"], name="energo_devices_account_idx"),
+            models.Index(fields=["folder_id"], name="energo_devices_folder_idx"),
+        ]
 
     def __str__(self):
         return f"{self.serial_num} ({self.device_id})"
@@ -146,9 +152,16 @@ class EnergoDeviceData(models.Model):
     device_id    = models.IntegerField(verbose_name='Device ID')
 
     class Meta:
+        # в PostgreSQL секционирована помесячно по datetime (миграция 0011, manage_partitions)
         db_table = '"public"."energo_device_data"'
         verbose_name = 'Energo Device Data'
         verbose_name_plural = 'Energo Device Data'
+        indexes = [
+            # keyset-пагинация API: ORDER BY datetime, id
+            models.Index(fields=["datetime", "id"], name="energo_data_datetime_id_idx"),
+            # ?device_id= вместе с диапазоном и той же сортировкой
+            models.Index(fields=["device_id", "datetime", "id"], name="energo_data_device_dt_idx"),
+        ]
 
     def __str__(self):
         return f"Data {self.id} for device {self.device_id}"
@@ -242,28 +255,28 @@ class ErcData(models.Model):
     flat_test          = models.CharField(max_length=64)
     flat_type          = models.CharField(max_length=64)
     object             = models.CharField(max_length=64, db_column='object')
-    registered_amount  = models.CharField(max_length=64)
-    floor              = models.CharField(max_length=64)
+    registered_amount  = models.IntegerField(blank=True, null=True)
+    floor              = models.IntegerField(blank=True, null=True)
     phone_number1      = models.CharField(max_length=64)
     phone_number2      = models.CharField(max_length=64)
     iin                = models.CharField(max_length=64)
     whaelthy_code      = models.CharField(max_length=64)
     tarif_type         = models.CharField(max_length=64)
-    tarif_water        = models.CharField(max_length=64)
+    tarif_water        = models.DecimalField(max_digits=14, decimal_places=3, blank=True, null=True)
     tarif_saverage     = models.CharField(max_length=64)
     tu                 = models.CharField(max_length=64)
     meter_type         = models.CharField(max_length=64)
     meter_subtype      = models.CharField(max_length=64)
     meter_number       = models.CharField(max_length=64)
-    verification_date  = models.CharField(max_length=64)
-    readings_date      = models.CharField(max_length=64)
-    readings           = models.CharField(max_length=64)
+    verification_date  = models.DateField(blank=True, null=True)
+    readings_date      = models.DateField(blank=True, null=True)
+    readings           = models.DecimalField(max_digits=14, decimal_places=3, blank=True, null=True)
     norma              = models.CharField(max_length=64)
     test1              = models.CharField(max_length=64)
     test2              = models.CharField(max_length=64)
     area               = models.CharField(max_length=64)
     area_type          = models.CharField(max_length=64)
-    seal_date          = models.CharField(max_length=64)
+    seal_date          = models.DateField(blank=True, null=True)
     seal_number        = models.CharField(max_length=64)
     source             = models.CharField(max_length=64)
     poliv              = models.CharField(max_length=64)
@@ -273,13 +286,24 @@ class ErcData(models.Model):
     meter_id           = models.CharField(max_length=64)
     blank_number       = models.CharField(max_length=64)
     tur                = models.CharField(max_length=64)
-    bit_depth          = models.CharField(max_length=64)
+    bit_depth          = models.IntegerField(blank=True, null=True)
     reagings_date      = models.CharField(max_length=50)
 
     class Meta:
         db_table = '"public"."erc_data"'
         verbose_name = 'ERC Data'
         verbose_name_plural = 'ERC Data'
+        constraints = [
+            # естественный ключ для upsert-импорта MetersInfo
+            models.UniqueConstraint(fields=["entity", "meter_id"], name="erc_data_entity_meter_uniq"),
+        ]
+        indexes = [
+            # фильтры API; ?entity= обслуживает erc_data_entity_meter_uniq
+            models.Index(fields=["meter_id"], name="erc_data_meter_id_idx"),
+            models.Index(fields=["abonent"], name="erc_data_abonent_idx"),
+            # ?readings_date_from= / ?readings_date_to=
+            models.Index(fields=["readings_date"], name="erc_data_readings_date_idx"),
+        ]
 
     def __str__(self):
         return f"{self.abonent} / {self.entity}"
@@ -434,6 +458,10 @@ class MeterUser(models.Model):
         db_table = '"public"."users"'
         verbose_name = 'Meter User'
         verbose_name_plural = 'Meter Users'
+        indexes = [
+            # боты ищут абонента по номеру лицевого счёта
+            models.Index(fields=["number"], name="users_number_idx"),
+        ]
 
     def __str__(self):
         return f"{self.username} (ID={self.id})"
@@ -488,6 +516,11 @@ class IotMeter(models.Model):
         db_table = '"public"."iot_meters"'
         verbose_name = 'IOT Meter'
         verbose_name_plural = 'IOT Meters'
+        indexes = [
+            # фильтры API
+            models.Index(fields=["modem_id", "port"], name="iot_meters_modem_port_idx"),
+            models.Index(fields=["account_id"], name="iot_meters_account_idx"),
+        ]
 
     def __str__(self):
         return f"{self.serial_number} (ID={self.id})"
@@ -509,9 +542,16 @@ class IotMeterData(models.Model):
     meter_id       = models.IntegerField(db_column='meter_id', verbose_name='Meter ID')
 
     class Meta:
+        # в PostgreSQL секционирована помесячно по dt (миграция 0011, manage_partitions)
         db_table = '"public"."iot_meter_data"'
         verbose_name = 'IOT Meter Data'
         verbose_name_plural = 'IOT Meter Data'
+        indexes = [
+            # keyset-пагинация API: ORDER BY dt, id
+            models.Index(fields=["dt", "id"], name="iot_meter_data_dt_id_idx"),
+            # ?meter_id= вместе с диапазоном и той же сортировкой
+            models.Index(fields=["meter_id", "dt", "id"], name="iot_meter_data_meter_dt_idx"),
+        ]
 
     def __str__(self):
         return f"Data #{self.id} for meter {self.meter_id}"
@@ -581,6 +621,10 @@ class Meter(models.Model):
         db_table = '"public"."meters"'
         verbose_name = "Meter"
         verbose_name_plural = "Meters"
+        indexes = [
+            # проверка лицевого счёта в ботах
+            models.Index(fields=["punumber"], name="meters_punumber_idx"),
+        ]
 
     def __str__(self):
         return f"{self.entity} – {self.punumber}"
@@ -649,6 +693,12 @@ class Reading(models.Model):
         db_table = '"public"."readings"'
         verbose_name = 'Reading'
         verbose_name_plural = 'Readings'
+        indexes = [
+            # последнее показание абонента (bot_utils.get_last_record)
+            models.Index(fields=["user", "punumber", "-createdate"], name="readings_user_pu_date_idx"),
+            # показание за месяц (bot_utils.save_or_update_reading)
+            models.Index(fields=["user", "punumber", "yearmonth"], name="readings_user_pu_month_idx"),
+        ]
 
     def __str__(self):
         return f"{self.entity} @ {self.punumber} → {self.readings}"
@@ -686,6 +736,16 @@ class Seal(models.Model):
         db_table = '"public"."seals"'
         verbose_name = 'Seal'
         verbose_name_plural = 'Seals'
+        indexes = [
+            # заявка абонента на дату
+            models.Index(fields=["user", "scheduledate"], name="seals_user_date_idx"),
+            # занятость слота: смотрят только новые заявки, их доля в таблице мала
+            models.Index(
+                fields=["scheduledate", "type"],
+                condition=models.Q(status="new"),
+                name="seals_new_slot_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Seal #{self.id} for user {self.user_id}"
@@ -762,11 +822,22 @@ class Incorrect(models.Model):
     meter_id     = models.IntegerField("Код прибора",blank=True, null=True)
     error_reason = models.TextField   ("Причина ошибки")
     created_at   = models.DateTimeField("Время записи", auto_now_add=True)
+    # строка файла, из которой запись получена (ledger.row_fingerprint), и её
+    # ключ в журнале дельта-импорта — по ним отказ удаляется вместе со строкой
+    row_hash     = models.CharField    ("Хэш строки", max_length=64, blank=True, default="")
+    provider     = models.CharField    ("Провайдер", max_length=50, blank=True, default="")
+    kind         = models.CharField    ("Файл", max_length=50, blank=True, default="")
+    row_key      = models.CharField    ("Ключ строки", max_length=255, blank=True, default="")
 
     class Meta:
         db_table = '"public"."incorrect"'
         verbose_name = "Ошибочная запись"
         verbose_name_plural = "Ошибочные записи"
+        indexes = [
+            # дельта-импорт: отказы изменившихся и удалённых строк журнала
+            models.Index(fields=["provider", "kind", "row_key"], name="incorrect_ledger_key_idx"),
+            models.Index(fields=["row_hash"], name="incorrect_row_hash_idx"),
+        ]
 
     def __str__(self):
         return f"{self.abonent_id}/{self.account_id}: {self.error_reason[:30]}"
@@ -787,8 +858,145 @@ class ReadingsSU(models.Model):
         db_table = '"public"."readings_su"'
         verbose_name = 'Readings_SU'
         verbose_name_plural = 'Readings_SU'
-        
-        
+        constraints = [
+            # естественный ключ для upsert-импорта Readings_SU
+            models.UniqueConstraint(
+                fields=["account_id", "meter_id", "rdate"],
+                name="readings_su_account_meter_rdate_uniq",
+            ),
+        ]
+        indexes = [
+            # фильтры API; ?account_id= обслуживает readings_su_account_meter_rdate_uniq
+            models.Index(fields=["meter_id", "rdate"], name="readings_su_meter_rdate_idx"),
+            models.Index(fields=["abonent_id"], name="readings_su_abonent_idx"),
+            models.Index(fields=["rdate"], name="readings_su_rdate_idx"),
+        ]
+
+
+
+class ImportLedger(models.Model):
+    """
+    Отпечаток последнего импортированного файла провайдера:
+    если хэш нового файла совпал — импорт пропускается целиком.
+    """
+    provider     = models.CharField("Провайдер", max_length=50)
+    kind         = models.CharField("Файл", max_length=50)
+    payload_hash = models.CharField("Хэш файла", max_length=64)
+    rows         = models.IntegerField("Строк в файле", default=0)
+    imported_at  = models.DateTimeField("Импортирован", auto_now=True)
+
+    class Meta:
+        db_table = '"public"."import_ledger"'
+        verbose_name = "Журнал импорта"
+        verbose_name_plural = "Журнал импорта"
+        unique_together = (("provider", "kind"),)
+
+    def __str__(self):
+        return f"{self.provider}/{self.kind}: {self.payload_hash[:12]}"
+
+
+class ImportLedgerRow(models.Model):
+    """
+    Отпечаток строки файла провайдера по её естественному ключу:
+    по нему дельта-импорт находит новые, изменённые и удалённые строки.
+    """
+    provider = models.CharField("Провайдер", max_length=50)
+    kind     = models.CharField("Файл", max_length=50)
+    row_key  = models.CharField("Ключ строки", max_length=255)
+    row_hash = models.CharField("Хэш строки", max_length=64)
+
+    class Meta:
+        db_table = '"public"."import_ledger_rows"'
+        verbose_name = "Строка журнала импорта"
+        verbose_name_plural = "Строки журнала импорта"
+        unique_together = (("provider", "kind", "row_key"),)
+
+    def __str__(self):
+        return f"{self.provider}/{self.kind}: {self.row_key}"
+
+
+class ImportRun(models.Model):
+    """
+    Один прогон импорта файла провайдера: время по этапам и счётчики строк.
+    """
+    STATUS_OK      = "ok"
+    STATUS_SKIPPED = "skipped"
+    STATUS_ERROR   = "error"
+    STATUS_CHOICES = (
+        (STATUS_OK,      "Успешно"),
+        (STATUS_SKIPPED, "Файл не изменился"),
+        (STATUS_ERROR,   "Ошибка"),
+    )
+
+    provider         = models.CharField("Провайдер", max_length=50)
+    kind             = models.CharField("Файл", max_length=50)
+    loader           = models.CharField("Загрузчик", max_length=20)
+    delta            = models.BooleanField("Дельта-импорт", default=False)
+    status           = models.CharField("Статус", max_length=10, choices=STATUS_CHOICES)
+    error            = models.TextField("Ошибка", blank=True, default="")
+    started_at       = models.DateTimeField("Начало")
+    finished_at      = models.DateTimeField("Окончание")
+    fetch_seconds    = models.FloatField("Получение, с", default=0)
+    decode_seconds   = models.FloatField("Декодирование, с", default=0)
+    diff_seconds     = models.FloatField("Сравнение с журналом, с", default=0)
+    parse_seconds    = models.FloatField("Разбор, с", default=0)
+    validate_seconds = models.FloatField("Проверка, с", default=0)
+    write_seconds    = models.FloatField("Запись, с", default=0)
+    bytes            = models.BigIntegerField("Размер файла, байт", default=0)
+    rows_in          = models.IntegerField("Строк в файле", default=0)
+    rows_out         = models.IntegerField("Записано строк", default=0)
+    rows_rejected    = models.IntegerField("Отклонено строк", default=0)
+    batches          = models.IntegerField("Пакетов", default=0)
+
+    class Meta:
+        db_table = '"public"."import_runs"'
+        verbose_name = "Прогон импорта"
+        verbose_name_plural = "Прогоны импорта"
+        ordering = ("-started_at",)
+        indexes = [
+            models.Index(fields=["provider", "kind", "-started_at"], name="import_runs_provider_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.provider}/{self.kind} {self.started_at:%Y-%m-%d %H:%M}: {self.status}"
+
+
+class ConsumptionRollup(models.Model):
+    """
+    Помесячная свёртка показаний одного счётчика (external_api/rollup.py):
+    из неё агрегатные эндпоинты API читают вместо сырых показаний.
+    """
+    source     = models.CharField("Источник", max_length=20)
+    meter_id   = models.BigIntegerField("Счётчик")
+    account    = models.CharField("Лицевой счёт", max_length=64, blank=True, default="")
+    sector     = models.CharField("Участок", max_length=64, blank=True, default="")
+    period     = models.DateField("Месяц")
+    readings   = models.IntegerField("Показаний")
+    total      = models.DecimalField("Сумма", max_digits=20, decimal_places=6)
+    min_value  = models.DecimalField("Минимум", max_digits=20, decimal_places=6)
+    max_value  = models.DecimalField("Максимум", max_digits=20, decimal_places=6)
+    last_value = models.DecimalField("Последнее", max_digits=20, decimal_places=6)
+    delta      = models.DecimalField("Расход", max_digits=20, decimal_places=6, blank=True, null=True)
+    last_id    = models.BigIntegerField("Последний id исходной строки")
+    updated_at = models.DateTimeField("Обновлено", auto_now=True)
+
+    class Meta:
+        db_table = '"public"."consumption_rollups"'
+        verbose_name = "Свёртка показаний"
+        verbose_name_plural = "Свёртки показаний"
+        constraints = [
+            models.UniqueConstraint(fields=["source", "meter_id", "period"], name="consumption_rollup_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["source", "account", "period"], name="consumption_rollup_account_idx"),
+            models.Index(fields=["source", "sector", "period"], name="consumption_rollup_sector_idx"),
+            models.Index(fields=["source", "last_id"], name="consumption_rollup_last_id_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.source}/{self.meter_id} {self.period:%Y-%m}"
+
+
 class WhatsAppSession(models.Model):
     phone     = models.CharField(max_length=32, unique=True)
     state     = models.CharField(max_length=32)
@@ -838,6 +1046,10 @@ class UserArea(models.Model):
         verbose_name = "Привязка абонента к району"
         verbose_name_plural = "Привязки абонентов к районам"
         unique_together = (("user", "area"),)
+        indexes = [
+            # абоненты района (бот контролёра); уникальный ключ начинается с user
+            models.Index(fields=["area", "user"], name="user_areas_area_user_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.number} → {self.area.code}"
@@ -1,10 +1,16 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock, skipUnless
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.test import TestCase, override_settings
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from rest_framework.test import APIClient
 from django.urls import reverse
 
 from meter_app.models import (
-    ErcData, ReadingsSU,
+    ErcData, ReadingsSU, Incorrect, ImportRun, ConsumptionRollup,
     EnergoDevice, EnergoDeviceData,
     IotMeter, IotMeterData,
 )
@@ -19,6 +25,36 @@ class ImportMeterAppTest(TestCase):
         self.assertGreater(ErcData.objects.using('meter').count(), 0)
         self.assertGreater(ReadingsSU.objects.using('meter').count(), 0)
 
+    def test_import_karagandawater_stream(self):
+        call_command('import_karagandawater', stream=True, batch_size=1)
+        self.assertEqual(ErcData.objects.using('meter').count(), 2)
+        self.assertTrue(ErcData.objects.using('meter').filter(entity='2002', meter_id='6002').exists())
+
+    def test_erc_data_typed_columns(self):
+        from datetime import date
+        from decimal import Decimal
+
+        call_command('import_karagandawater', loader='orm')
+        row = ErcData.objects.using('meter').get(entity='2002')
+        self.assertEqual(row.readings, Decimal('15'))
+        self.assertEqual(row.readings_date, date(2025, 4, 1))
+        self.assertEqual(row.verification_date, date(2021, 5, 15))
+        self.assertEqual(row.tarif_water, Decimal('200.5'))
+        self.assertEqual((row.registered_amount, row.floor, row.bit_depth), (3, 5, 8))
+
+    def test_erc_data_type_conversion(self):
+        from datetime import date
+        from decimal import Decimal
+        from meter_app.external_api.parser import _parse_date, _parse_decimal, _parse_optional_int
+
+        self.assertEqual(_parse_decimal('12,5'), Decimal('12.5'))
+        self.assertIsNone(_parse_decimal(''))
+        self.assertIsNone(_parse_decimal('NaN'))
+        self.assertIsNone(_parse_decimal('1e20'))
+        self.assertEqual(_parse_date('01.04.2025'), date(2025, 4, 1))
+        self.assertIsNone(_parse_date('31.02.2025'))
+        self.assertIsNone(_parse_optional_int('3 эт.'))
+
     def test_import_energo(self):
         self.assertEqual(EnergoDevice.objects.using('meter').count(), 0)
         self.assertEqual(EnergoDeviceData.objects.using('meter').count(), 0)
@@ -34,14 +70,352 @@ class ImportMeterAppTest(TestCase):
         self.assertGreater(IotMeterData.objects.using('meter').count(), 0)
 
 
+@skipUnless(connections['meter'].vendor == 'postgresql', "COPY есть только в PostgreSQL")
+class CopyLoaderTest(TestCase):
+    databases = ['meter',]
+
+    def test_import_with_copy_matches_orm(self):
+        call_command('import_karagandawater', loader='copy')
+        call_command('import_energo', loader='copy')
+        call_command('import_iot', loader='copy')
+        self.assertEqual(ErcData.objects.using('meter').count(), 2)
+        self.assertEqual(ReadingsSU.objects.using('meter').count(), 2)
+        self.assertEqual(Incorrect.objects.using('meter').count(), 1)
+        self.assertEqual(EnergoDevice.objects.using('meter').count(), 1)
+        self.assertEqual(EnergoDeviceData.objects.using('meter').count(), 1)
+        self.assertEqual(IotMeter.objects.using('meter').count(), 1)
+        self.assertEqual(
+            IotMeterData.objects.using('meter').get().data, {"raw": "0x1A2B"}
+        )
+
+
+@skipUnless(connections['meter'].vendor == 'postgresql', "ON CONFLICT ... RETURNING xmax есть только в PostgreSQL")
+class UpsertLoaderTest(TestCase):
+    databases = ['meter',]
+
+    def test_reimport_is_idempotent(self):
+        from meter_app.external_api.karWater import KaragandaWater
+        from meter_app.external_api.loaders import UpsertLoader
+        from meter_app.external_api.parser import parse_meters_info_stream
+
+        first, second = UpsertLoader(), UpsertLoader()
+        parse_meters_info_stream(KaragandaWater().stream_meters_info(), loader=first)
+        parse_meters_info_stream(KaragandaWater().stream_meters_info(), loader=second)
+
+        self.assertEqual(ErcData.objects.using('meter').count(), 2)
+        self.assertEqual(first.stats['ErcData'].inserted, 2)
+        self.assertEqual(second.stats['ErcData'].inserted, 0)
+        self.assertEqual(second.stats['ErcData'].unchanged, 2)
+
+    def test_key_duplicates_compared_in_field_types(self):
+        from decimal import Decimal
+        from meter_app.external_api.loaders import UpsertLoader
+        from meter_app.external_api.parser import READINGS_SU_FIELDS
+
+        loader = UpsertLoader()
+        loader.load(ReadingsSU, READINGS_SU_FIELDS, [
+            ("1", "02002", "1", "2025-01-05", "10.5", "7"),
+            ("1", "2002",  "1", "2025-01-05", "11.0", "7"),
+        ])
+        self.assertEqual(ReadingsSU.objects.using('meter').get().rvalue, Decimal('11.0'))
+        stats = loader.stats['ReadingsSU']
+        self.assertEqual((stats.inserted, stats.unchanged, stats.duplicates), (1, 0, 1))
+
+
+    def test_orm_reimport_points_to_upsert(self):
+        from django.db import IntegrityError, transaction
+        from meter_app.external_api.karWater import KaragandaWater
+        from meter_app.external_api.loaders import OrmLoader, UpsertLoader, get_loader
+        from meter_app.external_api.parser import parse_meters_info_stream
+
+        self.assertIsInstance(get_loader(), UpsertLoader)
+        parse_meters_info_stream(KaragandaWater().stream_meters_info(), loader=OrmLoader())
+        with self.assertRaisesMessage(IntegrityError, 'upsert'), transaction.atomic(using='meter'):
+            parse_meters_info_stream(KaragandaWater().stream_meters_info(), loader=OrmLoader())
+
+
+class DeltaImportTest(TestCase):
+    databases = ['meter',]
+
+    def test_unchanged_file_is_skipped(self):
+        call_command('import_energo', delta=True)
+        call_command('import_energo', delta=True)
+        self.assertEqual(EnergoDevice.objects.using('meter').count(), 1)
+        self.assertEqual(EnergoDeviceData.objects.using('meter').count(), 1)
+
+    def test_karagandawater_delta_rerun(self):
+        call_command('import_karagandawater', delta=True, loader='orm')
+        call_command('import_karagandawater', delta=True, loader='orm')
+        self.assertEqual(ErcData.objects.using('meter').count(), 2)
+        self.assertEqual(ReadingsSU.objects.using('meter').count(), 2)
+
+    def test_only_changed_rows_are_rewritten(self):
+        from meter_app.external_api.ledger import import_delta
+        from meter_app.external_api.parser import parse_iot_meters
+
+        header = "id,modem_id,port,serial_number,consumer,account_id,last_reading,created_at\n"
+        row1 = "1,301,3,SN1,A,ACC1,1.0,2025-04-23T16:05:09\n"
+        row2 = "2,302,1,SN2,B,ACC2,2.0,2025-04-23T16:05:09\n"
+        import_delta("iot", "meters", header + row1 + row2, parse_iot_meters, IotMeter)
+
+        result = import_delta(
+            "iot", "meters", header + row1.replace("1.0", "5.0"), parse_iot_meters, IotMeter
+        )
+        self.assertEqual((result['updated'], result['removed'], result['unchanged']), (1, 1, 0))
+
+        result = import_delta(
+            "iot", "meters", header + row1.replace("1.0", "5.0") + row2, parse_iot_meters, IotMeter
+        )
+        self.assertEqual((result['inserted'], result['unchanged']), (1, 1))
+        self.assertEqual(IotMeter.objects.using('meter').count(), 2)
+        self.assertEqual(IotMeter.objects.using('meter').get(modem_id=301).last_reading, 5)
+
+    def test_rows_sharing_a_key_are_kept(self):
+        from meter_app.external_api.ledger import import_delta
+        from meter_app.external_api.parser import parse_iot_meters
+
+        header = "id,modem_id,port,serial_number,consumer,account_id,last_reading,created_at\n"
+        row1 = "1,301,3,SN1,A,ACC1,1.0,2025-04-23T16:05:09\n"
+        row2 = "2,301,3,SN2,B,ACC2,2.0,2025-04-23T16:05:09\n"
+        result = import_delta("iot", "meters", header + row1 + row2, parse_iot_meters, IotMeter)
+        self.assertEqual((result['rows'], result['inserted']), (2, 1))
+        self.assertEqual(IotMeter.objects.using('meter').count(), 2)
+
+        # изменилась одна строка группы — группа перезаписывается целиком
+        import_delta("iot", "meters", header + row1 + row2.replace("2.0", "3.0"), parse_iot_meters, IotMeter)
+        self.assertEqual(
+            sorted(IotMeter.objects.using('meter').values_list('serial_number', 'last_reading')),
+            [('SN1', 1), ('SN2', 3)],
+        )
+
+
+    def test_fixed_row_drops_its_rejection(self):
+        from meter_app.external_api.ledger import import_delta
+        from meter_app.external_api.parser import parse_readings_su
+
+        header = "AbonentId;AccountId;PointNum;RDate;RValue;MeterId\n"
+        good = "1;2;3;20250101;12.5;7\n"
+        bad = "1;2;3;20250102;99;7\n"
+        broken = "1;x;3;20250103;1;7\n"
+
+        def run(*rows):
+            import_delta("karagandawater", "readings_su", header + "".join(rows),
+                         parse_readings_su, ReadingsSU, delimiter=";")
+            return sorted(Incorrect.objects.using('meter').values_list('rdate', 'error_reason'))
+
+        self.assertEqual(len(run(good, bad, broken)), 2)
+        # показание всё ещё вне регламента, но другое — отказ один, новый
+        rejected = run(good, bad.replace("99", "98"), broken)
+        self.assertEqual(len(rejected), 2)
+        # исправленная строка уходит в ReadingsSU, её отказ удаляется;
+        # строка без валидного ключа пропала из файла — её отказ тоже
+        self.assertEqual(run(good, bad.replace("99", "9")), [])
+        self.assertEqual(ReadingsSU.objects.using('meter').count(), 2)
+
+
+class ParallelParseTest(TestCase):
+    databases = ['meter',]
+
+    def test_split_chunks_keeps_header_and_lines(self):
+        from meter_app.external_api.parallel import split_chunks
+
+        raw = "a,b\n1,2\n3,4\n5,6"
+        chunks = split_chunks(raw, 1)
+        self.assertEqual(chunks, ["a,b\n1,2\n", "a,b\n3,4\n", "a,b\n5,6"])
+        self.assertEqual(split_chunks("a,b\n", 1), ["a,b\n"])
+
+    def test_split_chunks_keeps_quoted_newlines(self):
+        import csv
+        from meter_app.external_api.parallel import split_chunks
+
+        raw = 'a,b\n1,"x\ny"\n2,"p ""q""\nr"\n3,z\n'
+        chunks = split_chunks(raw, 1)
+        self.assertEqual(len(chunks), 3)
+        rows = [row for chunk in chunks for row in list(csv.reader(chunk.splitlines(True)))[1:]]
+        self.assertEqual(rows, [['1', 'x\ny'], ['2', 'p "q"\nr'], ['3', 'z']])
+
+    def test_parallel_rows_match_sequential(self):
+        import asyncio
+        from io import StringIO
+        from meter_app.external_api.karWater import KaragandaWater
+        from meter_app.external_api.parallel import parallel_rows
+        from meter_app.external_api.parser import iter_meters_info_rows
+
+        raw = asyncio.run(KaragandaWater().fetch_meters_info())
+        self.assertEqual(
+            list(parallel_rows(iter_meters_info_rows, raw, workers=2, chunk_size=1)),
+            list(iter_meters_info_rows(StringIO(raw))),
+        )
+
+    def test_import_with_parse_workers(self):
+        call_command('import_karagandawater', loader='orm', parse_workers=2)
+        self.assertEqual(ErcData.objects.using('meter').count(), 2)
+        self.assertEqual(ReadingsSU.objects.using('meter').count(), 2)
+        self.assertEqual(Incorrect.objects.using('meter').count(), 1)
+
+
+class ReadingsValidationTest(TestCase):
+    databases = ['meter',]
+
+    def test_rules_give_reason_codes(self):
+        from io import StringIO
+        from meter_app.external_api.parser import parse_readings_su, split_readings_su
+
+        raw = (
+            "AbonentId;AccountId;PointNum;RDate;RValue;MeterId\n"
+            "1;2;3;20250101;12.5;7\n"
+            "1;x;3;20250230;12.5;7\n"
+            "1;2;3;20240229;0;7\n"
+        )
+        good, bad = split_readings_su(StringIO(raw))
+        self.assertEqual(good, [('1', '2', '3', '20250101', '12.5', '7')])
+        self.assertEqual(bad[0][1], None)
+        self.assertEqual(bad[0][3], None)
+        self.assertEqual(
+            bad[0][-1], 'bad_id: Идентификатор не целое число; bad_rdate: Некорректная дата RDate'
+        )
+        self.assertEqual(bad[1][-1], 'rvalue_range: Не по регламенту')
+
+        parse_readings_su(raw)
+        self.assertEqual(ReadingsSU.objects.using('meter').count(), 1)
+        self.assertEqual(Incorrect.objects.using('meter').count(), 2)
+
+    def test_malformed_ids_are_rejected_per_row(self):
+        from io import StringIO
+        from meter_app.external_api.parser import split_readings_su
+
+        raw = (
+            "AbonentId;AccountId;PointNum;RDate;RValue;MeterId\n"
+            "+1;-2;3;20250101;12.5;7\n"
+            "--1;2;3;20250101;12.5;7\n"
+            "1;+-2;3;20250101;12.5;7\n"
+            "1;2;²;20250101;12.5;7\n"
+            "1;2;3;2025010²;12.5;7\n"
+        )
+        good, bad = split_readings_su(StringIO(raw))
+        self.assertEqual(len(good), 1)
+        self.assertEqual(len(bad), 4)
+
+
+class BenchmarkTest(TestCase):
+    databases = ['meter',]
+
+    def test_synthetic_dataset_parses(self):
+        import os
+        from meter_app.external_api.parser import ERC_DATA_FIELDS, iter_meters_info_rows
+        from meter_app.external_api.synthetic import write_dataset
+
+        path = write_dataset('meters_info', 50)
+        try:
+            with open(path, encoding='utf-8', newline='') as f:
+                rows = list(iter_meters_info_rows(f))
+        finally:
+            os.remove(path)
+        self.assertEqual(len(rows), 50)
+        entity, meter_id = ERC_DATA_FIELDS.index('entity'), ERC_DATA_FIELDS.index('meter_id')
+        self.assertEqual(len({r[entity] for r in rows}), 50)
+        self.assertEqual(len({r[meter_id] for r in rows}), 50)
+
+    def test_benchmark_rolls_back(self):
+        from meter_app.external_api.benchmark import run_benchmark
+
+        results = list(run_benchmark(datasets=['iot_meters', 'readings_su'], scales=[20]))
+        self.assertEqual([r['stage'] for r in results], ['parse', 'load:orm'] * 2)
+        self.assertTrue(all(r['rows_per_s'] for r in results))
+        self.assertEqual(IotMeter.objects.using('meter').count(), 0)
+        self.assertEqual(ReadingsSU.objects.using('meter').count(), 0)
+
+    def test_bot_lookup_benchmark_rolls_back(self):
+        from meter_app.external_api.bot_benchmark import LOOKUPS, run_lookup_benchmark
+        from meter_app.models import MeterUser, Seal
+
+        results = run_lookup_benchmark(users=30, repeat=5)
+        self.assertEqual([r['lookup'] for r in results], list(LOOKUPS))
+        self.assertTrue(all(r['before_ms'] > 0 and r['after_ms'] > 0 for r in results))
+        self.assertEqual(MeterUser.objects.using('meter').count(), 0)
+        # индексы вернулись вместе с откатом: частичный индекс снова в плане
+        self.assertIn(
+            'seals_new_slot_idx',
+            Seal.objects.using('meter').filter(scheduledate='2025-01-01', type='09-11', status='new').explain(),
+        )
+
+
+class OrchestratorTest(TestCase):
+    databases = ['meter',]
+
+    def test_import_all_providers(self):
+        from meter_app.external_api.orchestrator import run_import
+
+        results = run_import(loader='orm', workers=1)
+        self.assertEqual(len(results), 6)
+        self.assertTrue(all(r['ok'] for r in results), results)
+        self.assertEqual(ErcData.objects.using('meter').count(), 2)
+        self.assertEqual(EnergoDeviceData.objects.using('meter').count(), 1)
+        self.assertEqual(IotMeterData.objects.using('meter').count(), 1)
+
+    def test_registry_lists_builtin_providers(self):
+        from meter_app.external_api.registry import get_provider, provider_names
+
+        self.assertEqual(provider_names(), ['energo', 'iot', 'karagandawater'])
+        _, files = get_provider('iot')
+        self.assertEqual([f.model for f in files], [IotMeter, IotMeterData])
+        with self.assertRaises(ValueError):
+            get_provider('unknown')
+
+    def test_import_provider_command(self):
+        call_command('import_provider', 'iot', loader='orm')
+        self.assertEqual(IotMeter.objects.using('meter').count(), 1)
+        self.assertEqual(EnergoDevice.objects.using('meter').count(), 0)
+        with self.assertRaises(CommandError):
+            call_command('import_provider')
+
+
+class ImportRunMetricsTest(TestCase):
+    databases = ['meter',]
+
+    def test_each_file_records_a_run(self):
+        call_command('import_karagandawater', loader='orm')
+        runs = {r.kind: r for r in ImportRun.objects.using('meter').all()}
+        self.assertEqual(set(runs), {'meters_info', 'readings_su'})
+        su = runs['readings_su']
+        self.assertEqual(su.status, ImportRun.STATUS_OK)
+        self.assertEqual((su.rows_in, su.rows_out, su.rows_rejected), (3, 2, 1))
+        self.assertEqual(su.batches, 2)
+        self.assertGreater(su.bytes, 0)
+        self.assertGreater(su.validate_seconds, 0)
+
+    def test_delta_skip_and_stream_runs(self):
+        call_command('import_energo', delta=True)
+        call_command('import_energo', delta=True)
+        statuses = list(
+            ImportRun.objects.using('meter').filter(kind='devices').values_list('status', flat=True)
+        )
+        self.assertEqual(statuses, [ImportRun.STATUS_SKIPPED, ImportRun.STATUS_OK])
+
+        call_command('import_karagandawater', stream=True, batch_size=1, loader='orm')
+        run = ImportRun.objects.using('meter').get(kind='meters_info')
+        self.assertEqual((run.rows_out, run.batches), (2, 2))
+
+    def test_import_runs_endpoint(self):
+        with self.captureOnCommitCallbacks(using='meter', execute=True):
+            call_command('import_iot', loader='orm')
+        resp = APIClient().get(reverse('import-runs-list'), {'kind': 'meters'})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()['results']
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['provider'], 'iot')
+        self.assertIn('write_seconds', data[0])
+
+
 class ApiMeterAppTest(TestCase):
     databases = ['meter',]
 
     def setUp(self):
-        # наполняем тестовую БД данными
-        call_command('import_karagandawater')
-        call_command('import_energo')
-        call_command('import_iot')
+        # наполняем тестовую БД данными; on_commit поднимает версии таблиц для кэша API
+        with self.captureOnCommitCallbacks(using='meter', execute=True):
+            call_command('import_karagandawater')
+            call_command('import_energo')
+            call_command('import_iot')
         self.client = APIClient()
 
     def test_erc_data_list(self):
@@ -49,35 +423,532 @@ class ApiMeterAppTest(TestCase):
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 200)
         data = resp.json()
-        self.assertIsInstance(data, list)
-        self.assertTrue(len(data) > 0)
+        self.assertIsInstance(data['results'], list)
+        self.assertTrue(len(data['results']) > 0)
 
     def test_readings_su_list(self):
         url = reverse('readings-su-list')
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 200)
-        self.assertTrue(len(resp.json()) > 0)
+        self.assertTrue(len(resp.json()['results']) > 0)
 
     def test_energo_devices_list(self):
         url = reverse('energo-devices-list')
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 200)
-        self.assertTrue(len(resp.json()) > 0)
+        self.assertTrue(len(resp.json()['results']) > 0)
 
     def test_energo_data_list(self):
         url = reverse('energo-data-list')
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 200)
-        self.assertTrue(len(resp.json()) > 0)
+        self.assertTrue(len(resp.json()['results']) > 0)
 
     def test_iot_meters_list(self):
         url = reverse('iot-meters-list')
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 200)
-        self.assertTrue(len(resp.json()) > 0)
+        self.assertTrue(len(resp.json()['results']) > 0)
 
     def test_iot_data_list(self):
         url = reverse('iot-data-list')
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 200)
-        self.assertTrue(len(resp.json()) > 0)
\ No newline at end of file
+        self.assertTrue(len(resp.json()['results']) > 0)
+
+    def test_cursor_pagination_walks_all_pages(self):
+        url = reverse('erc-data-list')
+        ids = []
+        resp = self.client.get(url, {'page_size': 1})
+        while True:
+            self.assertEqual(resp.status_code, 200)
+            data = resp.json()
+            self.assertLessEqual(len(data['results']), 1)
+            ids += [row['id'] for row in data['results']]
+            if not data['next']:
+                break
+            resp = self.client.get(data['next'])
+        self.assertEqual(ids, sorted(ErcData.objects.using('meter').values_list('id', flat=True)))
+        self.assertNotIn('count', data)
+
+    def test_time_series_pages_through_equal_timestamps(self):
+        from datetime import timedelta
+        from django.db import connections
+        from django.test.utils import CaptureQueriesContext
+
+        # все счётчики отчитываются в один час: страниц больше, чем строк с разным dt
+        first = IotMeterData.objects.using('meter').get()
+        for n in range(5):
+            first.pk, first.meter_id = None, 100 + n
+            first.save(using='meter')
+        first.pk, first.dt = None, first.dt + timedelta(hours=1)
+        first.save(using='meter')
+
+        url = reverse('iot-data-list')
+        ids, pages = [], []
+        resp = self.client.get(url, {'page_size': 2})
+        while True:
+            data = resp.json()
+            ids += [row['id'] for row in data['results']]
+            pages.append(data)
+            if not data['next']:
+                break
+            with CaptureQueriesContext(connections['meter']) as queries:
+                resp = self.client.get(data['next'])
+            self.assertNotIn('OFFSET', queries[-1]['sql'].upper())
+        expected = list(IotMeterData.objects.using('meter').order_by('dt', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+        # назад — те же страницы в обратном порядке
+        back = self.client.get(pages[-1]['previous']).json()
+        self.assertEqual(back['results'], pages[-2]['results'])
+        self.assertEqual(self.client.get(url, {'cursor': 'cD1ub3RpbWU='}).status_code, 404)
+
+    def test_fast_list_matches_model_serializer(self):
+        import json
+        from meter_app.api import serializers
+
+        for basename, serializer, ordering in (
+            ('erc-data',       serializers.ErcDataSerializer,          ('id',)),
+            ('readings-su',    serializers.ReadingsSuSerializer,       ('id',)),
+            ('energo-devices', serializers.EnergoDeviceSerializer,     ('id',)),
+            ('energo-data',    serializers.EnergoDeviceDataSerializer, ('datetime', 'id')),
+            ('iot-meters',     serializers.IotMeterSerializer,         ('id',)),
+            ('iot-data',       serializers.IotMeterDataSerializer,     ('dt', 'id')),
+        ):
+            model = serializer.Meta.model
+            expected = serializer(model.objects.using('meter').order_by(*ordering), many=True).data
+            resp = self.client.get(reverse(f'{basename}-list'))
+            self.assertEqual(resp.json()['results'], json.loads(json.dumps(expected)), basename)
+
+    def test_sparse_fieldsets(self):
+        url = reverse('erc-data-list')
+        resp = self.client.get(url, {'fields': 'entity,meter_id,readings'})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(set(data['results'][0]), {'entity', 'meter_id', 'readings'})
+
+        # поле сортировки не просили — курсор всё равно работает
+        resp = self.client.get(url, {'fields': 'entity', 'page_size': 1})
+        self.assertEqual(self.client.get(resp.json()['next']).status_code, 200)
+
+        self.assertEqual(self.client.get(url, {'fields': 'entity,nope'}).status_code, 400)
+
+    def test_filters(self):
+        row = ReadingsSU.objects.using('meter').order_by('id').first()
+        expected = ReadingsSU.objects.using('meter').filter(account_id=row.account_id).count()
+        resp = self.client.get(reverse('readings-su-list'), {'account_id': row.account_id})
+        self.assertEqual(resp.status_code, 200)
+        results = resp.json()['results']
+        self.assertEqual(len(results), expected)
+        self.assertTrue(all(r['account_id'] == row.account_id for r in results))
+
+        # диапазон дат включает обе границы
+        day = row.rdate.isoformat()
+        resp = self.client.get(reverse('readings-su-list'), {'rdate_from': day, 'rdate_to': day})
+        self.assertTrue(resp.json()['results'])
+        self.assertTrue(all(r['rdate'] == day for r in resp.json()['results']))
+
+        ids = list(IotMeterData.objects.using('meter').values_list('meter_id', flat=True).distinct()[:2])
+        resp = self.client.get(reverse('iot-data-list'), {'meter_id': ','.join(map(str, ids))})
+        self.assertEqual(
+            len(resp.json()['results']),
+            IotMeterData.objects.using('meter').filter(meter_id__in=ids).count(),
+        )
+        resp = self.client.get(reverse('iot-data-list'), {'dt_from': '2999-01-01'})
+        self.assertEqual(resp.json()['results'], [])
+        # пустая граница — фильтр не задан, а не 500
+        resp = self.client.get(reverse('iot-data-list'), {'dt_from': '  ', 'dt_to': ''})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.json()['results']), IotMeterData.objects.using('meter').count())
+
+        resp = self.client.get(reverse('erc-data-list'), {'readings_date_from': '2025-05-01'})
+        self.assertEqual([r['entity'] for r in resp.json()['results']], ['2003'])
+        self.assertEqual(resp.json()['results'][0]['readings'], '30.000')
+
+        resp = self.client.get(reverse('readings-su-list'), {'account_id': 'abc', 'rdate_to': '2024-13-01'})
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(set(resp.json()), {'account_id', 'rdate_to'})
+
+
+class ResponseCacheTest(TestCase):
+    databases = ['meter',]
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(using='meter', execute=True):
+            call_command('import_iot', loader='orm')
+        self.client = APIClient()
+
+    def test_etag_and_cache_follow_table_version(self):
+        from django.test.utils import CaptureQueriesContext
+        from django.db import connections
+
+        url = reverse('iot-data-list')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+        self.assertIn('no-cache', first['Cache-Control'])
+        self.assertTrue(first['Last-Modified'])
+
+        # пока импорт не менял таблицу: 304 и кэшированный ответ без запросов к БД
+        with CaptureQueriesContext(connections['meter']) as queries:
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            cached = self.client.get(url)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(cached.json(), first.json())
+        self.assertEqual(cached['ETag'], etag)
+
+        # другой запрос — другой ETag
+        self.assertNotEqual(self.client.get(url, {'page_size': 1})['ETag'], etag)
+
+        # пока транзакция импорта не закоммичена, версия прежняя
+        with self.captureOnCommitCallbacks(using='meter', execute=False) as callbacks:
+            call_command('import_iot', loader='orm')
+        self.assertTrue(callbacks)
+        self.assertEqual(self.client.get(url)['ETag'], etag)
+
+        # закоммиченный импорт поднимает версию: новый ETag и свежие данные
+        with self.captureOnCommitCallbacks(using='meter', execute=True):
+            call_command('import_iot', loader='orm')
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp['ETag'], etag)
+        self.assertEqual(len(resp.json()['results']), 3)
+
+    def test_orm_edits_change_etag(self):
+        url = reverse('iot-data-list')
+        etag = self.client.get(url)['ETag']
+        # правка и удаление через ORM (админка) шлют сигналы — версия поднимается
+        row = IotMeterData.objects.using('meter').first()
+        row.rssi = -1
+        with self.captureOnCommitCallbacks(using='meter', execute=True):
+            row.save(using='meter')
+        edited = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(edited.status_code, 200)
+        self.assertEqual(edited.json()['results'][0]['rssi'], -1)
+
+        with self.captureOnCommitCallbacks(using='meter', execute=True):
+            row.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=edited['ETag']).status_code, 200)
+
+    @override_settings(METER_API_VERSION_TTL=1)
+    def test_version_expires(self):
+        import time
+        from meter_app.api.cache import bump_table_version, table_version
+
+        bump_table_version(IotMeterData)
+        version = table_version(IotMeterData)
+        time.sleep(1.1)
+        self.assertNotEqual(table_version(IotMeterData), version)
+
+    def test_errors_are_not_cached(self):
+        url = reverse('iot-data-list')
+        self.assertEqual(self.client.get(url, {'dt_from': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'dt_from': 'x'}).status_code, 400)
+
+    def test_host_is_part_of_the_key(self):
+        url = reverse('iot-data-list')
+        first = self.client.get(url, {'page_size': 1}, HTTP_HOST='a.example')
+        other = self.client.get(url, {'page_size': 1}, HTTP_HOST='b.example')
+        # в данных ответа абсолютные ссылки next/previous — ключ зависит от хоста
+        self.assertNotEqual(first['ETag'], other['ETag'])
+
+    def test_unavailable_cache_falls_back_to_database(self):
+        from unittest import mock
+        from redis.exceptions import ConnectionError
+
+        url = reverse('iot-data-list')
+        with mock.patch('django.core.cache.backends.locmem.LocMemCache.get', side_effect=ConnectionError):
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(resp.has_header('ETag'))
+        self.assertEqual(len(resp.json()['results']), IotMeterData.objects.using('meter').count())
+
+
+class AggregateTest(TestCase):
+    databases = ['meter',]
+
+    def setUp(self):
+        import datetime
+        from decimal import Decimal
+
+        rows = (
+            # счётчик, лицевой счёт, дата, показание
+            (1, 10, datetime.date(2025, 1, 10), '100'),
+            (1, 10, datetime.date(2025, 1, 20), '110'),
+            (1, 10, datetime.date(2025, 2, 5),  '125'),
+            (1, 10, datetime.date(2025, 2, 25), '130'),
+            (2, 10, datetime.date(2025, 2, 1),  '5'),
+            (3, 20, datetime.date(2025, 2, 3),  '7'),
+        )
+        ReadingsSU.objects.using('meter').bulk_create([
+            ReadingsSU(abonent_id=1, account_id=account, point_num=1, rdate=day, rvalue=Decimal(value), meter_id=meter)
+            for meter, account, day, value in rows
+        ])
+        self.client = APIClient()
+
+    def _get(self, **params):
+        resp = self.client.get(reverse('aggregates', args=['readings-su']), params)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return resp.json()
+
+    def test_live_aggregates(self):
+        data = self._get(group='meter')
+        self.assertEqual(data[:2], [
+            {'meter': '1', 'period': '2025-01-01', 'readings': 2,
+             'sum': '210.000', 'min': '100.000', 'max': '110.000', 'last': '110.000', 'delta': '10.000'},
+            # расход февраля считается и от последнего показания января
+            {'meter': '1', 'period': '2025-02-01', 'readings': 2,
+             'sum': '255.000', 'min': '125.000', 'max': '130.000', 'last': '130.000', 'delta': '20.000'},
+        ])
+        # у первого показания счётчика нет предыдущего
+        self.assertIsNone(data[2]['delta'])
+
+        data = self._get(group='account', account='10', **{'from': '2025-02-01'})
+        self.assertEqual(data, [
+            {'account': '10', 'period': '2025-02-01', 'readings': 3,
+             'sum': '260.000', 'min': '5.000', 'max': '130.000', 'last': '135.000', 'delta': '20.000'},
+        ])
+        self.assertEqual(len(self._get(period='day', meter='1')), 4)
+
+        resp = self.client.get(reverse('aggregates', args=['readings-su']), {'group': 'x', 'to': '2025-13-01'})
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(set(resp.json()), {'group', 'to'})
+        self.assertEqual(self.client.get(reverse('aggregates', args=['nope'])).status_code, 404)
+
+    def test_rollup_matches_live_and_refreshes_incrementally(self):
+        import datetime
+        from meter_app.external_api.rollup import refresh_rollup
+
+        with self.captureOnCommitCallbacks(using='meter', execute=True):
+            self.assertEqual(refresh_rollup('readings-su'), 4)
+        for group in ('meter', 'account', 'sector'):
+            self.assertEqual(self._get(group=group), self._get(group=group, live=1), group)
+
+        # новое показание пересчитывает только свой счётчик начиная со своего месяца
+        ReadingsSU.objects.using('meter').create(
+            abonent_id=1, account_id=10, point_num=1, rdate=datetime.date(2025, 3, 1), rvalue=140, meter_id=1,
+        )
+        with self.captureOnCommitCallbacks(using='meter', execute=True):
+            self.assertEqual(refresh_rollup('readings-su'), 1)
+        self.assertEqual(refresh_rollup('readings-su'), 0)
+        march = ConsumptionRollup.objects.using('meter').get(source='readings-su', meter_id=1, period='2025-03-01')
+        self.assertEqual(march.delta, 10)
+        self.assertEqual(self._get(group='account'), self._get(group='account', live=1))
+
+        call_command('refresh_rollups', 'readings-su', full=True, stdout=StringIO())
+        self.assertEqual(ConsumptionRollup.objects.using('meter').filter(source='readings-su').count(), 5)
+
+    def test_rows_updated_in_place_are_recomputed(self):
+        import datetime
+        from meter_app.external_api.rollup import refresh_for_model, refresh_rollup
+
+        refresh_rollup('readings-su')
+        # upsert меняет строку без нового id — по одному id изменения не видно
+        ReadingsSU.objects.using('meter').filter(meter_id=1, rdate=datetime.date(2025, 1, 20)).update(rvalue=115)
+        self.assertEqual(refresh_rollup('readings-su'), 0)
+        self.assertEqual(refresh_for_model(ReadingsSU, updated=[{'meter_id': 1}]), 2)
+        self.assertEqual(self._get(group='meter'), self._get(group='meter', live=1))
+
+    def test_import_refreshes_rollup(self):
+        ReadingsSU.objects.using('meter').all().delete()
+        call_command('import_karagandawater', stdout=StringIO())
+        rollups = ConsumptionRollup.objects.using('meter').filter(source='readings-su')
+        self.assertEqual(rollups.count(), 2)
+        # участок подтягивается из MetersInfo по лицевому счёту
+        erc = ErcData.objects.using('meter').filter(entity='2002').first()
+        self.assertEqual(rollups.get(account='2002').sector, erc.sector)
+
+
+class AsyncApiTest(TestCase):
+    databases = ['meter',]
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(using='meter', execute=True):
+            call_command('import_karagandawater', loader='orm', stdout=StringIO())
+            call_command('import_iot', loader='orm', stdout=StringIO())
+
+    async def test_async_list_matches_sync_api(self):
+        from django.test import AsyncClient
+
+        client = AsyncClient()
+        resp = await client.get(reverse('async-list', args=['erc-data']), {'page_size': 1})
+        self.assertEqual(resp.status_code, 200)
+        first = resp.json()
+        self.assertEqual(len(first['results']), 1)
+        resp = await client.get(first['next'])
+        second = resp.json()
+        self.assertIsNone(second['next'])
+
+        expected = await sync_to_async(lambda: APIClient().get(reverse('erc-data-list')).json()['results'])()
+        self.assertEqual(first['results'] + second['results'], expected)
+
+        resp = await client.get(reverse('async-list', args=['readings-su']), {'account_id': '2002', 'fields': 'account_id'})
+        self.assertEqual(resp.json()['results'], [{'account_id': 2002}])
+        resp = await client.get(reverse('async-list', args=['readings-su']), {'account_id': 'x'})
+        self.assertEqual(resp.status_code, 400)
+
+        resp = await client.get(reverse('async-list', args=['iot-data']))
+        etag = resp['ETag']
+        resp = await client.get(reverse('async-list', args=['iot-data']), headers={'If-None-Match': etag})
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual((await client.get(reverse('async-list', args=['nope']))).status_code, 404)
+
+    async def test_async_detail_and_export(self):
+        from django.test import AsyncClient
+
+        client = AsyncClient()
+        row = await IotMeterData.objects.using('meter').afirst()
+        resp = await client.get(reverse('async-detail', args=['iot-data', row.pk]))
+        self.assertEqual(resp.json()['data'], {'raw': '0x1A2B'})
+        resp = await client.get(reverse('async-detail', args=['iot-data', row.pk + 100]))
+        self.assertEqual(resp.status_code, 404)
+
+        resp = await client.get(reverse('async-export', args=['readings-su', 'csv']))
+        self.assertEqual(resp.status_code, 200)
+        body = b''.join([chunk async for chunk in resp.streaming_content]).decode('utf-8')
+        lines = body.splitlines()
+        self.assertEqual(lines[0], 'id,abonent_id,account_id,point_num,rdate,rvalue,meter_id')
+        self.assertEqual(len(lines), 3)
+
+
+class ExportApiTest(TestCase):
+    databases = ['meter',]
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(using='meter', execute=True):
+            call_command('import_karagandawater', loader='orm')
+            call_command('import_iot', loader='orm')
+        self.client = APIClient()
+
+    def _body(self, resp):
+        self.assertTrue(resp.streaming)
+        return b''.join(resp.streaming_content).decode('utf-8')
+
+    def test_ndjson_export(self):
+        import json
+
+        resp = self.client.get(reverse('export', args=['iot-data', 'ndjson']))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in self._body(resp).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['data'], {'raw': '0x1A2B'})
+
+    def test_csv_export_and_resume(self):
+        url = reverse('export', args=['readings-su', 'csv'])
+        lines = self._body(self.client.get(url)).splitlines()
+        self.assertEqual(lines[0], 'id,abonent_id,account_id,point_num,rdate,rvalue,meter_id')
+        self.assertEqual(len(lines), 3)
+
+        first_id = ReadingsSU.objects.using('meter').order_by('id').first().id
+        lines = self._body(self.client.get(url, {'after': first_id})).splitlines()
+        self.assertEqual(len(lines), 2)
+
+    def test_unknown_table(self):
+        self.assertEqual(self.client.get('/api/export/incorrect.csv').status_code, 404)
+
+    def test_conditional_export(self):
+        url = reverse('export', args=['readings-su', 'csv'])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class PartitionTest(TestCase):
+    databases = ['meter',]
+
+    def test_month_arithmetic(self):
+        from datetime import date
+        from meter_app.external_api.partitions import add_months, month_start, partition_name
+
+        self.assertEqual(month_start(date(2025, 3, 17)), date(2025, 3, 1))
+        self.assertEqual(add_months(date(2025, 11, 1), 3), date(2026, 2, 1))
+        self.assertEqual(add_months(date(2025, 1, 1), -1), date(2024, 12, 1))
+        self.assertEqual(partition_name('iot_meter_data', date(2025, 2, 1)), 'iot_meter_data_p202502')
+
+    def test_command_requires_postgresql(self):
+        if connections['meter'].vendor == 'postgresql':
+            self.skipTest("проверка для СУБД без секционирования")
+        with self.assertRaises(CommandError):
+            call_command('manage_partitions', stdout=StringIO())
+
+    @skipUnless(connections['meter'].vendor == 'postgresql', "секционирование есть только в PostgreSQL")
+    def test_ensure_and_detach(self):
+        from datetime import datetime, timezone as dt_timezone
+        from django.utils import timezone
+        from meter_app.external_api.partitions import (
+            add_months, create_partition, detach_partitions, ensure_partitions,
+            list_partitions, month_start, partition_name,
+        )
+
+        current = month_start(timezone.now())
+        old = add_months(current, -24)
+        ensure_partitions('iot_meter_data', ahead=2)
+        with connections['meter'].cursor() as cursor:
+            create_partition(cursor, 'iot_meter_data', 'dt', old)
+            months = [month for month, _ in list_partitions(cursor, 'iot_meter_data')]
+        self.assertIn(add_months(current, 2), months)
+        self.assertIn(old, months)
+
+        call_command('import_iot', loader='orm')
+        IotMeterData.objects.using('meter').update(dt=datetime(old.year, old.month, 5, tzinfo=dt_timezone.utc))
+        detached = detach_partitions('iot_meter_data', retain_months=12, drop=True)
+        self.assertIn(partition_name('iot_meter_data', old), detached)
+        self.assertEqual(IotMeterData.objects.using('meter').count(), 0)
+
+
+class AccountIndexTest(TestCase):
+    databases = ['meter',]
+
+    def setUp(self):
+        from meter_app.external_api.accounts import publish_refresh
+        from meter_app.external_api.bot_benchmark import seed_bot_tables
+
+        seed_bot_tables(3, using='meter', months=1, seals=0, areas=1)
+        # индексы общие для процесса — не берём их из других тестов
+        publish_refresh()
+
+    def test_lookups_hit_database_once(self):
+        from meter_app.external_api.accounts import account_exists, user_exists
+
+        self.assertTrue(account_exists('10000000'))
+        with self.assertNumQueries(0, using='meter'):
+            self.assertTrue(account_exists('10000002'))
+            self.assertFalse(account_exists('1000000O'))
+            self.assertFalse(account_exists("' OR 1=1 --"))
+        self.assertTrue(user_exists('10000001'))
+
+    def test_refresh_and_added_values(self):
+        from meter_app.external_api.accounts import publish_added, publish_refresh, user_exists
+        from meter_app.models import MeterUser
+
+        self.assertFalse(user_exists('20000000'))
+        publish_added('users', '20000000')
+        with self.assertNumQueries(0, using='meter'):
+            self.assertTrue(user_exists('20000000'))
+
+        MeterUser.objects.using('meter').filter(number='10000001').delete()
+        call_command('refresh_account_index', 'users', stdout=StringIO())
+        self.assertFalse(user_exists('10000001'))
+        with self.assertRaises(CommandError):
+            call_command('refresh_account_index', 'accounts', stdout=StringIO())
+
+    def test_invalidation_during_load_is_kept(self):
+        from meter_app.external_api.accounts import AccountIndex
+        from meter_app.models import Meter
+
+        index = AccountIndex(Meter, 'punumber')
+        rows = Meter.objects.using('meter').values_list('punumber', flat=True)
+
+        def snapshot(**kwargs):
+            # сообщение об изменении пришло, пока читалась таблица
+            index.invalidate()
+            yield from rows
+
+        with mock.patch.object(type(rows), 'iterator', side_effect=snapshot):
+            self.assertIn('10000000', index.load())
+        with self.assertNumQueries(1, using='meter'):
+            self.assertTrue('10000000' in index)
+        # свежий индекс второй раз не читается, даже если ждали блокировку
+        with self.assertNumQueries(0, using='meter'):
+            index.load()
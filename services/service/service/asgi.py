@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+
+Асинхронные эндпоинты /api/async/... (meter_app/api/async_views.py) держат
+медленные списки и выгрузки, не занимая поток, только под ASGI:
+
+    uvicorn service.asgi:application --workers 2
 """
 
 import os
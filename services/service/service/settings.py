@@ -161,6 +161,13 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 DATABASE_ROUTERS = ["service.dbrouters.AppRouter"]
 
+# API отдаёт списки страницами по курсору (keyset), без OFFSET
+REST_FRAMEWORK = {
+    "DEFAULT_PAGINATION_CLASS": "meter_app.api.pagination.IdCursorPagination",
+    "PAGE_SIZE": 100,
+    "DEFAULT_FILTER_BACKENDS": ["meter_app.api.filters.QueryParamFilter"],
+}
+
 
 CELERY_RESULT_BACKEND = "redis://localhost:6379/1"  # или ваш backend
 CELERY_ACCEPT_CONTENT = ["json"]
@@ -168,7 +175,9 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "UTC"  # или ваш часовой пояс
 
-CELERY_TASK_ALWAYS_EAGER = True
+# по умолчанию задачи выполняются сразу в вызывающем процессе; с воркером
+# (фоновая запись вебхука, аудит сессий) — CELERY_TASK_ALWAYS_EAGER=0
+CELERY_TASK_ALWAYS_EAGER = os.environ.get("CELERY_TASK_ALWAYS_EAGER", "1") == "1"
 CELERY_TASK_EAGER_PROPAGATES = True
 
 TWILIO_ACCOUNT_SID   = os.getenv("TWILIO_ACCOUNT_SID")
@@ -187,4 +196,12 @@ CACHES = {
             # если нужно, здесь же можно добавить PASSWORD, SSL и т.п.
         },
     }
-}
\ No newline at end of file
+}
+
+# Сессии WhatsApp-вебхука: "cache" — Redis из CACHES с копией в WhatsAppSession, "db" — только WhatsAppSession
+WHATSAPP_SESSION_BACKEND = os.environ.get("WHATSAPP_SESSION_BACKEND", "cache")
+WHATSAPP_SESSION_CACHE   = "default"
+WHATSAPP_SESSION_TTL     = 24 * 60 * 60  # сессия без сообщений сбрасывается через сутки
+
+# Индекс ЛС ботов в памяти процесса перечитывается не реже чем раз в столько секунд
+ACCOUNT_INDEX_MAX_AGE = 10 * 60